@@ -0,0 +1,146 @@
+# backend/available_weights.py
+"""
+Ensemble trié et immuable des poids réalisables d'un utilisateur.
+
+Remplace les listes parcourues linéairement (min(..., key=abs), `in`) par des
+recherches dichotomiques : nearest / floor / ceil / next_up / next_down en O(log n).
+Les poids sont aussi indexés par famille d'équipement (barbell, dumbbells, ...)
+pour pouvoir restreindre une recherche à l'équipement réellement utilisé.
+
+Se comporte comme une séquence en lecture seule (len, itération, index, `in`)
+afin de rester compatible avec le code qui manipulait des listes.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# Tolérance de comparaison (les poids sont des multiples de 0.25 kg au plus fin)
+EPSILON = 1e-6
+
+
+class AvailableWeights:
+    """Poids réalisables triés, avec sous-ensembles par équipement"""
+
+    __slots__ = ('_weights', '_by_equipment')
+
+    def __init__(self, weights: Iterable[float] = (), by_equipment: Optional[Dict[str, Iterable[float]]] = None):
+        by_equipment = by_equipment or {}
+        subsets = {
+            equipment: tuple(sorted({float(w) for w in values}))
+            for equipment, values in by_equipment.items()
+        }
+        merged = {float(w) for w in weights}
+        for values in subsets.values():
+            merged.update(values)
+        object.__setattr__(self, '_weights', tuple(sorted(merged)))
+        object.__setattr__(self, '_by_equipment', {k: v for k, v in subsets.items() if v})
+
+    def __setattr__(self, name, value):
+        raise AttributeError("AvailableWeights est immuable")
+
+    @classmethod
+    def coerce(cls, weights: Union['AvailableWeights', Iterable[float], None]) -> Optional['AvailableWeights']:
+        """Accepte une liste (anciens appelants) ou une instance déjà construite"""
+        if weights is None or isinstance(weights, cls):
+            return weights
+        return cls(weights)
+
+    # ===== SÉQUENCE EN LECTURE SEULE =====
+
+    def __len__(self) -> int:
+        return len(self._weights)
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self._weights)
+
+    def __getitem__(self, index):
+        return self._weights[index]
+
+    def __contains__(self, weight) -> bool:
+        try:
+            weight = float(weight)
+        except (TypeError, ValueError):
+            return False
+        index = bisect_left(self._weights, weight - EPSILON)
+        return index < len(self._weights) and abs(self._weights[index] - weight) <= EPSILON
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, AvailableWeights):
+            return self._weights == other._weights and self._by_equipment == other._by_equipment
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self._weights)
+
+    def __repr__(self) -> str:
+        return f"AvailableWeights({len(self._weights)} poids, équipements={sorted(self._by_equipment)})"
+
+    def to_list(self) -> List[float]:
+        return list(self._weights)
+
+    # ===== SOUS-ENSEMBLES PAR ÉQUIPEMENT =====
+
+    @property
+    def equipment(self) -> Tuple[str, ...]:
+        return tuple(sorted(self._by_equipment))
+
+    def for_equipment(self, equipment: str) -> 'AvailableWeights':
+        """Poids réalisables avec une seule famille d'équipement (vide si absente)"""
+        return AvailableWeights(self._by_equipment.get(equipment, ()))
+
+    def equipment_range(self, equipment: str) -> Optional[Tuple[float, float]]:
+        """(min, max) des poids d'un équipement, None si absent"""
+        values = self._by_equipment.get(equipment)
+        return (values[0], values[-1]) if values else None
+
+    def ranges(self) -> Dict[str, Tuple[float, float]]:
+        return {equipment: (values[0], values[-1]) for equipment, values in self._by_equipment.items()}
+
+    # ===== RECHERCHES DICHOTOMIQUES =====
+
+    def floor(self, weight: float) -> Optional[float]:
+        """Plus grand poids <= weight"""
+        index = bisect_right(self._weights, weight + EPSILON)
+        return self._weights[index - 1] if index > 0 else None
+
+    def ceil(self, weight: float) -> Optional[float]:
+        """Plus petit poids >= weight"""
+        index = bisect_left(self._weights, weight - EPSILON)
+        return self._weights[index] if index < len(self._weights) else None
+
+    def next_up(self, weight: float) -> Optional[float]:
+        """Plus petit poids strictement supérieur"""
+        index = bisect_right(self._weights, weight + EPSILON)
+        return self._weights[index] if index < len(self._weights) else None
+
+    def next_down(self, weight: float) -> Optional[float]:
+        """Plus grand poids strictement inférieur"""
+        index = bisect_left(self._weights, weight - EPSILON)
+        return self._weights[index - 1] if index > 0 else None
+
+    def nearest(self, weight: float, low: Optional[float] = None, high: Optional[float] = None) -> Optional[float]:
+        """
+        Poids le plus proche (le plus léger en cas d'égalité, comme min(..., key=abs)).
+        low / high restreignent la recherche à un intervalle ; None si aucun poids dedans.
+        """
+        if low is not None and high is not None and low > high:
+            return None
+        target = weight
+        if low is not None:
+            target = max(target, low)
+        if high is not None:
+            target = min(target, high)
+        below, above = self.floor(target), self.ceil(target)
+        if below is not None and low is not None and below < low - EPSILON:
+            below = None
+        if above is not None and high is not None and above > high + EPSILON:
+            above = None
+        if below is None or above is None:
+            return above if below is None else below
+        return below if weight - below <= above - weight else above
+
+    def between(self, low: float, high: float) -> List[float]:
+        """Poids compris dans [low, high]"""
+        start = bisect_left(self._weights, low - EPSILON)
+        end = bisect_right(self._weights, high + EPSILON)
+        return list(self._weights[start:end])
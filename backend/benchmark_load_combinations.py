@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Benchmark du moteur de combinaisons de charges sur de gros inventaires.
+Usage : python -m backend.benchmark_load_combinations
+"""
+
+import time
+from itertools import combinations
+
+from backend.load_combinations import reachable_totals, reachable_assignments
+
+# Salle très équipée : 10 tailles de disques, 20 disques de chaque
+LARGE_PLATES = {str(w): 20 for w in [0.5, 1.25, 2.5, 5, 7.5, 10, 15, 20, 25, 50]}
+# 12 tensions d'élastiques, 4 exemplaires de chaque
+LARGE_BANDS = {str(t): 4 for t in range(5, 65, 5)}
+
+
+def _timed(label, func, repeat=5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    elapsed_ms = (time.perf_counter() - start) / repeat * 1000
+    print(f"{label:<55} {elapsed_ms:8.2f} ms  ({len(result)} totaux)")
+    return result
+
+
+def _bands_bruteforce(tensions: dict, max_combined: int) -> list:
+    """Ancienne approche : liste à plat + itertools.combinations"""
+    flat = []
+    for tension, count in tensions.items():
+        flat.extend([float(tension)] * count)
+    totals = set()
+    for size in range(2, max_combined + 1):
+        for combo in combinations(flat, size):
+            totals.add(sum(combo))
+    return sorted(totals)
+
+
+if __name__ == "__main__":
+    print("🏋️ Benchmark combinaisons de charges\n")
+    _timed("Barre : paires de disques, charge max 500 kg",
+           lambda: reachable_totals(LARGE_PLATES, group_size=2, max_load=500))
+    _timed("Barre : paires de disques + répartition minimale",
+           lambda: reachable_assignments(LARGE_PLATES, group_size=2, max_load=500))
+    _timed("Haltères : quadruplets de disques, charge max 200 kg",
+           lambda: reachable_totals(LARGE_PLATES, group_size=4, max_load=200))
+    engine = _timed("Élastiques : 2 à 4 ensemble (moteur)",
+                    lambda: reachable_totals(LARGE_BANDS, min_pieces=2, max_pieces=4))
+    brute = _timed("Élastiques : 2 à 4 ensemble (itertools)",
+                   lambda: _bands_bruteforce(LARGE_BANDS, 4), repeat=1)
+    print(f"\nRésultats identiques élastiques : {engine == brute}")
@@ -1,10 +1,20 @@
-from typing import List, Dict, Set
+from typing import List, Dict, Set, Iterable, Optional
+from collections import OrderedDict
+import hashlib
+import json
 import logging
+import threading
 from sqlalchemy.orm import Session
 from .models import User, Exercise
+from .load_combinations import reachable_totals
+from .available_weights import AvailableWeights
+from .plate_layouts import PlateLayoutTable, get_layout_table, layout_to_plates
 
 logger = logging.getLogger(__name__)
 
+# Nombre d'entrées (profil équipement, équipements requis, poids du corps) gardées en cache
+AVAILABLE_WEIGHTS_CACHE_SIZE = 512
+
 class EquipmentService:
     
     # Mapping unifié des équipements
@@ -49,42 +59,19 @@ class EquipmentService:
         'accessories': ['bench', 'weight_plates'],
         'always_available': ['bodyweight']
     }
+
+    # Cache LRU des poids réalisables, partagé par le worker
+    _weights_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+    _weights_cache_lock = threading.Lock()
+    _weights_cache_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
         
     @classmethod
     def _calculate_resistance_combinations(cls, tensions_dict: dict, max_combined: int = 3) -> List[float]:
-        """Calcule les combinaisons possibles d'élastiques"""
+        """Calcule les combinaisons possibles d'élastiques (2 à max_combined ensemble, quantités respectées)"""
         if not tensions_dict:
             return []
         
-        combinations = set()
-        available_tensions = []
-        
-        # Créer une liste avec les quantités disponibles
-        for tension_str, count in tensions_dict.items():
-            tension = float(tension_str)
-            available_tensions.extend([tension] * count)
-        
-        # Générer les combinaisons (jusqu'à max_combined élastiques ensemble)
-        from itertools import combinations as iter_combinations
-        
-        for combo_size in range(2, min(len(available_tensions) + 1, max_combined + 1)):
-            for combo in iter_combinations(available_tensions, combo_size):
-                # Vérifier qu'on ne dépasse pas les quantités disponibles
-                tension_counts = {}
-                for t in combo:
-                    tension_counts[t] = tension_counts.get(t, 0) + 1
-                
-                # Valider que chaque tension n'est pas utilisée plus que disponible
-                valid = True
-                for tension, used_count in tension_counts.items():
-                    if used_count > tensions_dict.get(str(int(tension)), 0):
-                        valid = False
-                        break
-                
-                if valid:
-                    combinations.add(sum(combo))
-        
-        return sorted(list(combinations))
+        return reachable_totals(tensions_dict, min_pieces=2, max_pieces=max_combined)
 
     @classmethod
     def get_available_bench_types(cls, config: dict) -> List[str]:
@@ -144,17 +131,12 @@ class EquipmentService:
         return available
 
     @classmethod
-    def get_available_weights(cls, db: Session, user_id: int, exercise: 'Exercise' = None) -> List[float]:
-        """Version corrigée : SEULS les poids réellement réalisables"""
-        from .weight_calculator import WeightCalculator
-        
+    def get_available_weights(cls, db: Session, user_id: int, exercise: 'Exercise' = None) -> AvailableWeights:
+        """Version corrigée : SEULS les poids réellement réalisables (mis en cache par profil d'équipement)"""
         user = db.query(User).filter(User.id == user_id).first()
         if not user or not user.equipment_config:
-            return [user.weight if user else 0.0]  # Bodyweight seulement
+            return AvailableWeights([user.weight if user else 0.0])  # Bodyweight seulement
             
-        config = user.equipment_config
-        all_weights = set([user.weight])  # Poids du corps
-        
         # Déterminer les types d'équipement pour cet exercice
         if exercise:
             required_equipment = exercise.equipment_required
@@ -163,126 +145,148 @@ class EquipmentService:
             required_equipment = ['barbell', 'dumbbells', 'kettlebells', 'resistance_bands', 
                      'cable_machine', 'lat_pulldown', 'chest_press', 'leg_press']
         
+        key = (
+            cls.equipment_fingerprint(user.equipment_config),
+            tuple(sorted(set(required_equipment or []))),
+            user.weight
+        )
+        with cls._weights_cache_lock:
+            cached = cls._weights_cache.get(key)
+            if cached is not None:
+                cls._weights_cache.move_to_end(key)
+                cls._weights_cache_stats['hits'] += 1
+                return cached
+            cls._weights_cache_stats['misses'] += 1
+        
+        valid_weights = cls._compute_available_weights(user.equipment_config, required_equipment, user.weight)
+        logger.info(f"Poids calculés pour user {user_id}: {len(valid_weights)} options")
+        
+        with cls._weights_cache_lock:
+            cls._weights_cache[key] = valid_weights
+            if len(cls._weights_cache) > AVAILABLE_WEIGHTS_CACHE_SIZE:
+                cls._weights_cache.popitem(last=False)
+        
+        return valid_weights
+
+    @classmethod
+    def invalidate_weights_cache(cls, equipment_config: Optional[dict] = None) -> int:
+        """
+        Retire du cache les entrées d'un profil d'équipement (ou tout le cache si None).
+        Retourne le nombre d'entrées supprimées.
+        """
+        with cls._weights_cache_lock:
+            if equipment_config is None:
+                removed = len(cls._weights_cache)
+                cls._weights_cache.clear()
+            else:
+                fingerprint = cls.equipment_fingerprint(equipment_config)
+                stale_keys = [key for key in cls._weights_cache if key[0] == fingerprint]
+                for key in stale_keys:
+                    del cls._weights_cache[key]
+                removed = len(stale_keys)
+            cls._weights_cache_stats['invalidations'] += 1
+        return removed
+
+    @classmethod
+    def get_weights_cache_stats(cls) -> Dict[str, float]:
+        """Compteurs du cache des poids réalisables"""
+        with cls._weights_cache_lock:
+            stats = dict(cls._weights_cache_stats)
+            stats['size'] = len(cls._weights_cache)
+            stats['max_size'] = AVAILABLE_WEIGHTS_CACHE_SIZE
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        return stats
+
+    @classmethod
+    def _compute_available_weights(cls, config: dict, required_equipment: List[str], user_weight: float) -> AvailableWeights:
+        """Énumère tous les poids réalisables pour un profil d'équipement, regroupés par équipement"""
+        from .weight_calculator import WeightCalculator
+        
+        by_equipment = {'bodyweight': [user_weight]}  # Poids du corps
+        
         # 1. Poids barbell (si requis)
-        if any(eq in ['barbell', 'barbell_athletic'] for eq in required_equipment):
-            barbell_weights = WeightCalculator.get_barbell_weights(config)
-            all_weights.update(barbell_weights)
-        if 'barbell_ez' in required_equipment:
-            barbell_weights = WeightCalculator.get_barbell_weights(config)  
-            all_weights.update(barbell_weights)
+        if any(eq in ['barbell', 'barbell_athletic', 'barbell_ez'] for eq in required_equipment):
+            by_equipment['barbell'] = WeightCalculator.get_barbell_weights(config)
         
         # 2. Poids dumbbells (si requis)  
         if 'dumbbells' in required_equipment:
             dumbbell_weights = WeightCalculator.get_dumbbell_weights(config)
             # Forcer uniquement des poids pairs pour les dumbbells
-            dumbbell_weights = [w for w in dumbbell_weights if w % 2 == 0]
-            all_weights.update(dumbbell_weights)
+            by_equipment['dumbbells'] = [w for w in dumbbell_weights if w % 2 == 0]
         
         # 3. Kettlebells (si requis)
         if 'kettlebells' in required_equipment:
-            kettlebell_weights = WeightCalculator.get_kettlebell_weights(config)
-            all_weights.update(kettlebell_weights)
+            by_equipment['kettlebells'] = WeightCalculator.get_kettlebell_weights(config)
         
         # 4. Machines (pas de problème de symétrie)
-        machine_weights = WeightCalculator.get_machine_weights(config, required_equipment)
-        all_weights.update(machine_weights)
+        by_equipment['machines'] = WeightCalculator.get_machine_weights(config, required_equipment)
         
         # 5. Élastiques (tensions équivalentes)
-        if 'resistance_bands' in required_equipment and config.get('resistance_bands', {}).get('available', False):
-            tensions = config['resistance_bands'].get('tensions', {})
+        if 'resistance_bands' in required_equipment:
+            band_weights = set(WeightCalculator.get_resistance_bands_weights(config))
             
-            # Ajouter les tensions individuelles
-            for tension_str, count in tensions.items():
-                tension = float(tension_str)
-                if count > 0:
-                    all_weights.add(tension)
+            if config.get('resistance_bands', {}).get('available', False):
+                tensions = config['resistance_bands'].get('tensions', {})
+                
+                # Ajouter les tensions individuelles
+                for tension_str, count in tensions.items():
+                    if count > 0:
+                        band_weights.add(float(tension_str))
+                
+                # Si combinables, ajouter les combinaisons
+                if config['resistance_bands'].get('combinable', False):
+                    band_weights.update(cls._calculate_resistance_combinations(tensions))
             
-            # Si combinables, ajouter les combinaisons
-            if config['resistance_bands'].get('combinable', False):
-                combinations = cls._calculate_resistance_combinations(tensions)
-                all_weights.update(combinations)
+            by_equipment['resistance_bands'] = band_weights
         
         # 6. Poids corporel avec variations (assistance, lest)
         if 'pull_up_bar' in required_equipment or 'dip_bar' in required_equipment:
-            bodyweight_weights = WeightCalculator.get_bodyweight_weights(config, user.weight)
-            all_weights.update(bodyweight_weights)
-
-        # 7. Résistance élastiques (si pas déjà traité)
-        if 'resistance_bands' in required_equipment:
-            resistance_weights = WeightCalculator.get_resistance_bands_weights(config)
-            all_weights.update(resistance_weights)
+            by_equipment['bodyweight'] = WeightCalculator.get_bodyweight_weights(config, user_weight)
 
-        # Filtrer et trier
-        valid_weights = sorted([w for w in all_weights if 0 <= w <= 500])  # Limite raisonnable
-        
-        logger.info(f"Poids calculés pour user {user_id}: {len(valid_weights)} options")
-        return valid_weights
+        # Filtrer (limite raisonnable) et trier
+        return AvailableWeights(by_equipment={
+            equipment: [w for w in weights if 0 <= w <= 500]
+            for equipment, weights in by_equipment.items()
+        })
         
     @classmethod
     def _calculate_plate_combinations(cls, plates_dict: dict, max_per_side: float = 50) -> List[float]:
         """
         Calcule UNIQUEMENT les combinaisons symétriques réalisables
-        Pour dumbbells : doit pouvoir équiper 2 barres identiquement
-        Pour barbell : doit pouvoir équiper les 2 côtés identiquement
+        Pour barbell : doit pouvoir équiper les 2 côtés identiquement (disques par paires)
         """
         if not plates_dict:
             return [0]
         
-        # Pour dumbbells, on a besoin de 4 disques identiques (2 par barre)
-        # Pour barbell, on a besoin de 2 disques identiques (1 par côté)
-        # Cette fonction est utilisée pour les deux, donc on prend le cas le plus restrictif
-        
-        combinations = set([0])  # Toujours possible sans disques
-        
-        # Convertir et trier les disques
-        sorted_plates = sorted(
-            [(float(w), count) for w, count in plates_dict.items()],
-            key=lambda x: x[0]
-        )
-        
-        # Générer toutes les combinaisons possibles
-        def generate_combinations(plates, current_weight, current_index, used_plates):
-            if current_index >= len(plates):
-                return
-            
-            plate_weight, available_count = plates[current_index]
-            
-            # Pour chaque nombre de paires possibles avec ce poids
-            for pairs in range(0, available_count // 2 + 1):
-                if pairs > 0:
-                    # Poids ajouté (2 disques par paire)
-                    added_weight = pairs * plate_weight * 2
-                    new_weight = current_weight + added_weight
-                    
-                    if new_weight <= max_per_side * 2:
-                        combinations.add(new_weight)
-                        
-                        # Continuer avec les disques suivants
-                        new_used = used_plates.copy()
-                        new_used[plate_weight] = pairs * 2
-                        generate_combinations(plates, new_weight, current_index + 1, new_used)
-                else:
-                    # Cas où on n'utilise pas ce disque
-                    generate_combinations(plates, current_weight, current_index + 1, used_plates)
-        
-        generate_combinations(sorted_plates, 0, 0, {})
-        
-        return sorted(list(combinations))
+        return reachable_totals(plates_dict, group_size=2, max_load=max_per_side * 2)
         
     @classmethod
-    def can_perform_exercise(cls, exercise: Exercise, available_equipment: List[str]) -> bool:
-        if not exercise.equipment_required:
-            return True
-        
+    def equipment_fingerprint(cls, config: dict) -> str:
+        """Empreinte canonique d'une configuration d'équipement (ordre des clés ignoré)"""
+        payload = json.dumps(config or {}, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def expand_equipment_equivalences(cls, available_equipment: Iterable[str]) -> Set[str]:
+        """Ajoute les équipements équivalents à ceux disponibles"""
         available_set = set(available_equipment)
         # Équivalences robustes
-        for available in list(available_equipment):
+        for available in list(available_set):
             if available == 'barbell':
                 available_set.add('barbell_athletic')  # Barbell peut remplacer athletic
             elif available == 'ez_curl':
                 available_set.add('barbell_ez')
             elif available == 'dumbbells':
                 available_set.add('barbell_short_pair')  # Déjà géré en amont mais sécurité
+        return available_set
+
+    @classmethod
+    def can_perform_exercise(cls, exercise: Exercise, available_equipment: List[str]) -> bool:
+        if not exercise.equipment_required:
+            return True
+        
+        available_set = cls.expand_equipment_equivalences(available_equipment)
             
         # AJOUT DE DEBUG
         logger.debug(f"Exercice: {exercise.name}")
@@ -307,7 +311,10 @@ class EquipmentService:
         if exercise_type == 'dumbbells':
             return cls._get_dumbbell_setup(config, target_weight)
         elif exercise_type in ['barbell', 'ez_curl']:
-            bar_weight = 20 if exercise_type == 'barbell' else 10
+            if exercise_type == 'barbell':
+                bar_weight = config.get('barbell_athletic', {}).get('weight', 20)
+            else:
+                bar_weight = config.get('barbell_ez', {}).get('weight', 10)
             return cls._get_barbell_setup(config, target_weight, bar_weight)
         elif exercise_type == 'resistance_bands':
             return cls._get_resistance_setup(config, target_weight)
@@ -400,29 +407,20 @@ class EquipmentService:
                     'setup': f"Dumbbells fixes: {closest}kg × 2"
                 }
         
-        # 2. Utiliser barres courtes + disques
-        barres_courtes = config.get('barbell_short_pair', {})
-        plates = config.get('weight_plates', {}).get('weights', {})
+        # 2. Utiliser barres courtes + disques (table exacte précalculée)
+        from .weight_calculator import WeightCalculator
+        loadings = WeightCalculator.get_short_bar_pair_loadings(config)
         
-        if (barres_courtes.get('available', False) and 
-            barres_courtes.get('count', 0) >= 2 and plates):
-            
-            bar_weight = barres_courtes.get('weight', 2.5)
-            target_per_bar = target_weight / 2
-            plate_weight_needed = max(0, target_per_bar - bar_weight)
-            
-            plate_setup = cls._optimize_plate_distribution(plates, plate_weight_needed)
-            
-            if plate_setup:
-                actual_weight = bar_weight + sum(p['weight'] * p['count'] for p in plate_setup)
-                return {
-                    'type': 'adjustable_dumbbells',
-                    'bar_weight': bar_weight,
-                    'plates_per_bar': plate_setup,
-                    'weight_each': actual_weight,
-                    'total_weight': actual_weight * 2,
-                    'setup': f"Barres courtes: {bar_weight}kg + disques"
-                }
+        if loadings:
+            loading = loadings.loading(loadings.nearest(target_weight))
+            return {
+                'type': 'adjustable_dumbbells',
+                'bar_weight': loading['bar_weight'],
+                'plates_per_bar': layout_to_plates(loadings.layout(loading['total_weight'])),
+                'weight_each': loading['per_bar'],
+                'total_weight': loading['total_weight'],
+                'setup': f"Barres courtes: {loading['bar_weight']}kg + disques"
+            }
         
         return {'type': 'unavailable', 'target_weight': target_weight}
     
@@ -439,18 +437,18 @@ class EquipmentService:
                 'setup': f"Barre seule: {bar_weight}kg"
             }
         
-        plate_weight_needed = max(0, target_weight - bar_weight)
-        plate_weight_per_side = plate_weight_needed / 2
-        
-        plate_setup = cls._optimize_plate_distribution(plates, plate_weight_per_side)
+        # Chargement canonique précalculé pour ce profil (barre + inventaire)
+        table = get_layout_table(bar_weight, plates)
+        total_weight = table.nearest(target_weight)
+        layout = table.layout(total_weight)
         
-        if plate_setup:
-            actual_plate_weight = sum(p['weight'] * p['count'] for p in plate_setup) * 2
+        if layout:
+            actual_plate_weight = round(total_weight - bar_weight, 3)
             return {
                 'type': 'barbell_loaded',
                 'bar_weight': bar_weight,
-                'plates_per_side': plate_setup,
-                'total_weight': bar_weight + actual_plate_weight,
+                'plates_per_side': layout_to_plates(layout),
+                'total_weight': total_weight,
                 'setup': f"Barre {bar_weight}kg + {actual_plate_weight}kg disques"
             }
         
@@ -461,6 +459,31 @@ class EquipmentService:
             'setup': f"Barre seule: {bar_weight}kg"
         }
     
+    @classmethod
+    def get_plate_layout_table(cls, config: dict, equipment_type: str) -> Optional[PlateLayoutTable]:
+        """
+        Table de chargements du profil pour un type d'équipement à disques
+        ('barbell', 'barbell_athletic', 'barbell_ez', 'dumbbells', 'dumbbells_adjustable').
+        None si l'équipement n'est pas disponible.
+        """
+        from .weight_calculator import WeightCalculator
+        
+        config = config or {}
+        if equipment_type in ['dumbbells', 'dumbbells_adjustable', 'barbell_short_pair']:
+            return WeightCalculator.get_short_bar_pair_loadings(config)
+        
+        if equipment_type not in ['barbell', 'barbell_athletic', 'barbell_ez']:
+            return None
+        
+        bar_key = 'barbell_ez' if equipment_type == 'barbell_ez' else 'barbell_athletic'
+        bar_config = config.get(bar_key, {})
+        if not bar_config.get('available', False):
+            return None
+        
+        default_weight = 10 if bar_key == 'barbell_ez' else 20
+        plates = config.get('weight_plates', {}).get('weights', {})
+        return get_layout_table(bar_config.get('weight', default_weight), plates)
+    
     @classmethod
     def get_plate_layout(cls, user_id: int, target_weight: float, exercise_equipment: List[str], config: dict) -> dict:
         """Protection contre équipements incompatibles"""
@@ -542,27 +565,3 @@ class EquipmentService:
             'feasible': False, 
             'reason': f'Impossible de réaliser {target_weight}kg avec votre équipement'
         }
-        
-    @classmethod
-    def _optimize_plate_distribution(cls, available_plates: dict, target_weight: float) -> List[dict]:
-        """Optimise la distribution de disques pour UN CÔTÉ de la barre"""
-        result = []
-        remaining = target_weight
-        
-        # Trier par poids décroissant pour mettre les gros disques à l'intérieur
-        sorted_plates = sorted(
-            [(float(w), count) for w, count in available_plates.items()],
-            key=lambda x: x[0],
-            reverse=True
-        )
-        
-        for weight, available_count in sorted_plates:
-            while remaining >= weight and available_count >= 2:  # PAIRES uniquement
-                result.append({'weight': weight, 'count': 1})  # 1 disque par côté
-                remaining -= weight
-                available_count -= 2  # On utilise une paire
-                
-            if remaining < 0.1:  # Tolérance floating point
-                break
-        
-        return result  # Ordre : gros disques d'abord
\ No newline at end of file
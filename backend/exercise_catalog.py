@@ -0,0 +1,339 @@
+# backend/exercise_catalog.py
+"""
+Catalogue d'exercices en mémoire, chargé une fois par worker.
+
+La table `exercises` ne change qu'au chargement de exercises.json : on la
+garde donc en mémoire sous forme d'instantané immuable, avec des index
+secondaires (groupe musculaire, PPL, équipement, difficulté, type d'exercice,
+type de poids). Les handlers consultent le catalogue au lieu de requêter la DB.
+
+Chaque exercice occupe un bit (sa position dans le catalogue) : les filtres
+(faisabilité selon l'équipement, PPL, groupe musculaire) sont des masques
+entiers combinés par ET binaire.
+"""
+
+import hashlib
+import json
+import threading
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import insert, update, text
+from sqlalchemy.orm import Session
+
+from backend.models import Exercise, CatalogSyncState
+from backend.equipment_service import EquipmentService
+
+logger = logging.getLogger(__name__)
+
+# Champs copiés depuis le modèle Exercise
+EXERCISE_FIELDS = (
+    'id', 'name', 'muscle_groups', 'muscles', 'equipment_required', 'difficulty',
+    'default_sets', 'default_reps_min', 'default_reps_max', 'base_rest_time_seconds',
+    'instructions', 'exercise_type', 'intensity_factor', 'weight_type',
+    'base_weights_kg', 'bodyweight_percentage', 'ppl'
+)
+
+# Champs JSON de type liste, figés en tuples dans l'instantané
+LIST_FIELDS = ('muscle_groups', 'muscles', 'equipment_required', 'ppl')
+
+# Nombre de profils d'équipement dont le masque de faisabilité est gardé en cache
+FEASIBILITY_CACHE_SIZE = 256
+
+
+class CatalogExercise:
+    """Copie en lecture seule d'une ligne Exercise, détachée de toute session"""
+    __slots__ = EXERCISE_FIELDS
+
+    def __init__(self, exercise: Exercise):
+        for field in EXERCISE_FIELDS:
+            value = getattr(exercise, field, None)
+            if field in LIST_FIELDS and value is not None:
+                value = tuple(value)
+            elif isinstance(value, dict):
+                value = dict(value)
+            object.__setattr__(self, field, value)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("CatalogExercise est en lecture seule")
+
+    @property
+    def body_part(self) -> Optional[str]:
+        """Groupe musculaire principal (compatibilité avec l'ancien champ body_part)"""
+        return self.muscle_groups[0] if self.muscle_groups else None
+
+    def to_dict(self) -> Dict:
+        return {
+            field: list(getattr(self, field)) if field in LIST_FIELDS and getattr(self, field) is not None
+            else getattr(self, field)
+            for field in EXERCISE_FIELDS
+        }
+
+    def __repr__(self):
+        return f"<CatalogExercise {self.id} {self.name!r}>"
+
+
+class ExerciseCatalog:
+    """Instantané immuable de la table exercises avec index secondaires"""
+
+    def __init__(self, exercises: Iterable[Exercise]):
+        records = sorted((CatalogExercise(ex) for ex in exercises), key=lambda ex: ex.id)
+        self._exercises: Tuple[CatalogExercise, ...] = tuple(records)
+        self._by_id: Dict[int, CatalogExercise] = {ex.id: ex for ex in records}
+
+        self._by_muscle_group = self._build_index(records, lambda ex: ex.muscle_groups or ())
+        self._by_ppl = self._build_index(records, lambda ex: ex.ppl or ())
+        self._by_equipment = self._build_index(records, lambda ex: ex.equipment_required or ())
+        self._by_difficulty = self._build_index(records, lambda ex: (ex.difficulty,))
+        self._by_exercise_type = self._build_index(records, lambda ex: (ex.exercise_type,))
+        self._by_weight_type = self._build_index(records, lambda ex: (ex.weight_type,))
+
+        # Bitsets : bit n = exercice en position n
+        self._positions: Dict[int, int] = {ex.id: pos for pos, ex in enumerate(records)}
+        self.full_mask = (1 << len(records)) - 1
+        self._no_equipment_mask = self.mask(ex for ex in records if not ex.equipment_required)
+        self._equipment_masks = {eq: self.mask(exs) for eq, exs in self._by_equipment.items()}
+        self._feasibility_cache: "OrderedDict[str, int]" = OrderedDict()
+        self._feasibility_lock = threading.Lock()
+
+    @staticmethod
+    def _build_index(records: List[CatalogExercise], keys_for) -> Dict[str, Tuple[CatalogExercise, ...]]:
+        """Construit un index clé -> exercices (ordre des ids conservé)"""
+        index: Dict[str, List[CatalogExercise]] = {}
+        for ex in records:
+            for key in dict.fromkeys(keys_for(ex)):
+                if key is not None:
+                    index.setdefault(key, []).append(ex)
+        return {key: tuple(values) for key, values in index.items()}
+
+    def __len__(self) -> int:
+        return len(self._exercises)
+
+    def all(self) -> Tuple[CatalogExercise, ...]:
+        return self._exercises
+
+    def get(self, exercise_id: int) -> Optional[CatalogExercise]:
+        return self._by_id.get(exercise_id)
+
+    def by_muscle_group(self, muscle_group: str) -> Tuple[CatalogExercise, ...]:
+        return self._by_muscle_group.get(muscle_group, ())
+
+    def by_muscle_groups(self, muscle_groups: Iterable[str]) -> List[CatalogExercise]:
+        """Exercices touchant au moins un des groupes donnés (sans doublon, ordre des ids)"""
+        matched = {}
+        for muscle_group in muscle_groups:
+            for ex in self.by_muscle_group(muscle_group):
+                matched[ex.id] = ex
+        return [matched[ex_id] for ex_id in sorted(matched)]
+
+    def by_ppl(self, category: str) -> Tuple[CatalogExercise, ...]:
+        return self._by_ppl.get(category, ())
+
+    def by_equipment(self, equipment: str) -> Tuple[CatalogExercise, ...]:
+        return self._by_equipment.get(equipment, ())
+
+    def by_difficulty(self, difficulty: str) -> Tuple[CatalogExercise, ...]:
+        return self._by_difficulty.get(difficulty, ())
+
+    def by_exercise_type(self, exercise_type: str) -> Tuple[CatalogExercise, ...]:
+        return self._by_exercise_type.get(exercise_type, ())
+
+    def by_weight_type(self, weight_type: str) -> Tuple[CatalogExercise, ...]:
+        return self._by_weight_type.get(weight_type, ())
+
+    # ===== BITSETS =====
+
+    def mask(self, exercises: Iterable) -> int:
+        """Masque des exercices donnés (ignore ceux absents du catalogue)"""
+        result = 0
+        for ex in exercises:
+            pos = self._positions.get(ex.id)
+            if pos is not None:
+                result |= 1 << pos
+        return result
+
+    def from_mask(self, mask: int) -> List[CatalogExercise]:
+        """Exercices dont le bit est à 1, dans l'ordre des ids"""
+        result = []
+        while mask:
+            low_bit = mask & -mask
+            result.append(self._exercises[low_bit.bit_length() - 1])
+            mask ^= low_bit
+        return result
+
+    def is_in_mask(self, exercise, mask: int) -> bool:
+        pos = self._positions.get(exercise.id)
+        return pos is not None and bool(mask >> pos & 1)
+
+    def muscle_group_mask(self, muscle_group: str) -> int:
+        return self.mask(self.by_muscle_group(muscle_group))
+
+    def ppl_mask(self, category: str) -> int:
+        return self.mask(self.by_ppl(category))
+
+    def feasibility_mask(self, equipment_config: Optional[Dict]) -> int:
+        """
+        Exercices réalisables avec cette configuration d'équipement
+        (même règles que EquipmentService.can_perform_exercise).
+        Mis en cache par empreinte de configuration.
+        """
+        key = EquipmentService.equipment_fingerprint(equipment_config)
+        with self._feasibility_lock:
+            cached = self._feasibility_cache.get(key)
+            if cached is not None:
+                self._feasibility_cache.move_to_end(key)
+                return cached
+
+        available = EquipmentService.expand_equipment_equivalences(
+            EquipmentService.get_available_equipment_types(equipment_config)
+        )
+        mask = self._no_equipment_mask
+        for eq, eq_mask in self._equipment_masks.items():
+            # Mapping spécial banc : un banc plat couvre toutes les positions
+            if eq in available or (eq.startswith('bench_') and 'bench_flat' in available):
+                mask |= eq_mask
+
+        with self._feasibility_lock:
+            self._feasibility_cache[key] = mask
+            if len(self._feasibility_cache) > FEASIBILITY_CACHE_SIZE:
+                self._feasibility_cache.popitem(last=False)
+        return mask
+
+    def filter_feasible(self, exercises: Iterable, equipment_config: Optional[Dict]) -> List:
+        """Filtre une liste d'exercices du catalogue selon l'équipement"""
+        feasible = self.feasibility_mask(equipment_config)
+        return self.from_mask(self.mask(exercises) & feasible)
+
+
+# ===== INSTANCE PARTAGÉE PAR WORKER =====
+
+_catalog: Optional[ExerciseCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def rebuild_catalog(db: Session) -> ExerciseCatalog:
+    """Recharge le catalogue depuis la DB et remplace l'instantané courant d'un bloc"""
+    global _catalog
+    with _catalog_lock:
+        catalog = ExerciseCatalog(db.query(Exercise).all())
+        _catalog = catalog
+    logger.info(f"📚 Catalogue exercices reconstruit: {len(catalog)} exercices")
+    return catalog
+
+
+def get_catalog(db: Optional[Session] = None) -> ExerciseCatalog:
+    """Retourne le catalogue courant, chargé à la première utilisation"""
+    catalog = _catalog
+    if catalog is not None:
+        return catalog
+
+    if db is not None:
+        return rebuild_catalog(db)
+
+    from backend.database import SessionLocal
+    session = SessionLocal()
+    try:
+        return rebuild_catalog(session)
+    finally:
+        session.close()
+
+
+# ===== SYNCHRONISATION exercises.json -> DB =====
+
+EXERCISES_SOURCE = "exercises.json"
+# Clé de verrou consultatif PostgreSQL : un seul worker synchronise par déploiement
+CATALOG_SYNC_LOCK_KEY = 7415002
+
+
+def _canonical(value: Any) -> Any:
+    """Normalise une valeur pour l'empreinte (1.0 == 1, tuples == listes)"""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    return value
+
+
+def fingerprint(data: Dict[str, Any]) -> str:
+    """Empreinte sha256 stable d'un exercice (clés triées)"""
+    payload = json.dumps(_canonical(data), sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _acquire_sync_lock(db: Session):
+    """Verrou inter-workers, libéré au commit/rollback (no-op hors PostgreSQL)"""
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": CATALOG_SYNC_LOCK_KEY})
+
+
+def _is_up_to_date(db: Session, file_hash: str) -> bool:
+    state = db.query(CatalogSyncState).filter(CatalogSyncState.source == EXERCISES_SOURCE).first()
+    if not state or state.file_hash != file_hash:
+        return False
+    # Table vidée depuis la dernière synchro : on resynchronise
+    return db.query(Exercise.id).count() >= (state.exercise_count or 0)
+
+
+def sync_exercises_from_file(db: Session, path: str) -> Dict[str, Any]:
+    """
+    Synchronise la table exercises avec exercises.json.
+    - fichier inchangé depuis la dernière synchro : aucune écriture
+    - sinon : seules les lignes dont l'empreinte diffère sont écrites,
+      en un UPDATE groupé et un INSERT groupé
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    file_hash = hashlib.sha256(raw).hexdigest()
+
+    if _is_up_to_date(db, file_hash):
+        return {"skipped": True, "inserted": 0, "updated": 0, "unchanged": 0}
+
+    _acquire_sync_lock(db)
+    # Un autre worker a pu synchroniser pendant l'attente du verrou
+    if _is_up_to_date(db, file_hash):
+        db.rollback()
+        return {"skipped": True, "inserted": 0, "updated": 0, "unchanged": 0}
+
+    exercises_data = json.loads(raw.decode("utf-8"))
+
+    # Une seule requête pour l'existant (premier id par nom, comme l'ancien chargement)
+    columns = [getattr(Exercise, field) for field in EXERCISE_FIELDS]
+    existing = {}
+    for row in db.query(*columns).order_by(Exercise.id).all():
+        existing.setdefault(row.name, row)
+
+    to_insert, to_update = [], []
+    for exercise_data in exercises_data:
+        row = existing.get(exercise_data["name"])
+        if row is None:
+            to_insert.append(exercise_data)
+            continue
+        current = {key: getattr(row, key, None) for key in exercise_data}
+        if fingerprint(current) != fingerprint(exercise_data):
+            to_update.append({"id": row.id, **exercise_data})
+
+    if to_update:
+        db.execute(update(Exercise), to_update)
+    if to_insert:
+        db.execute(insert(Exercise), to_insert)
+
+    state = db.query(CatalogSyncState).filter(CatalogSyncState.source == EXERCISES_SOURCE).first()
+    if not state:
+        state = CatalogSyncState(source=EXERCISES_SOURCE)
+        db.add(state)
+    state.file_hash = file_hash
+    state.exercise_count = len(existing) + len(to_insert)
+    state.synced_at = datetime.now(timezone.utc)
+
+    db.commit()
+
+    return {
+        "skipped": False,
+        "inserted": len(to_insert),
+        "updated": len(to_update),
+        "unchanged": len(exercises_data) - len(to_insert) - len(to_update)
+    }
@@ -0,0 +1,126 @@
+# backend/exercise_stats.py
+"""
+Mise à jour de la table de cache exercise_completion_stats.
+
+Toutes les statistiques d'un utilisateur (totales, 7 jours, 30 jours) sont calculées
+par agrégation conditionnelle en une seule requête, et écrites par un upsert
+INSERT ... SELECT ... ON CONFLICT (PostgreSQL et SQLite) : un seul aller-retour,
+quel que soit le nombre d'exercices concernés.
+
+L'upsert s'appuie sur l'index unique (user_id, exercise_id), créé au démarrage
+sur les bases existantes (ensure_stats_unique_index).
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import case, delete, distinct, func, inspect, insert, literal, select, text, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from .models import ExerciseCompletionStats, Workout, WorkoutSet
+
+logger = logging.getLogger(__name__)
+
+STATS_INDEX_NAME = "idx_user_exercise_stats"
+# Clé de verrou consultatif PostgreSQL (cf. exercise_catalog.CATALOG_SYNC_LOCK_KEY)
+STATS_INDEX_LOCK_KEY = 7415003
+
+STATS_COLUMNS = (
+    'user_id', 'exercise_id', 'total_sessions', 'total_sets', 'last_performed',
+    'avg_weight_all_time', 'max_weight_all_time', 'avg_fatigue_level',
+    'sessions_last_7d', 'sets_last_7d', 'sessions_last_30d', 'avg_weight_last_30d',
+    'last_updated'
+)
+
+
+def ensure_stats_unique_index(db: Session) -> bool:
+    """
+    Rend l'index (user_id, exercise_id) unique sur une base créée avant l'upsert.
+    Les doublons éventuels (même couple) sont supprimés en gardant la ligne la plus récente.
+    Retourne True si l'index a été recréé.
+    """
+    table = ExerciseCompletionStats.__tablename__
+    for index in inspect(db.get_bind()).get_indexes(table):
+        if index.get('unique') and list(index['column_names']) == ['user_id', 'exercise_id']:
+            return False
+
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": STATS_INDEX_LOCK_KEY})
+
+    latest = select(func.max(ExerciseCompletionStats.id)).group_by(
+        ExerciseCompletionStats.user_id, ExerciseCompletionStats.exercise_id
+    )
+    db.execute(delete(ExerciseCompletionStats).where(ExerciseCompletionStats.id.not_in(latest)))
+    db.execute(text(f"DROP INDEX IF EXISTS {STATS_INDEX_NAME}"))
+    db.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS {STATS_INDEX_NAME} ON {table} (user_id, exercise_id)"))
+    db.commit()
+    logger.info(f"Index unique {STATS_INDEX_NAME} créé")
+    return True
+
+
+def stats_select(user_id: int, exercise_ids: Optional[Iterable[int]] = None,
+                 workout_id: Optional[int] = None, now: Optional[datetime] = None):
+    """
+    Statistiques par exercice d'un utilisateur (séances terminées), restreintes aux
+    exercices donnés ou à ceux d'une séance. Colonnes dans l'ordre de STATS_COLUMNS.
+    """
+    now = now or datetime.now(timezone.utc)
+    seven_days_ago = now - timedelta(days=7)
+    thirty_days_ago = now - timedelta(days=30)
+    last_7d = Workout.started_at >= seven_days_ago
+    last_30d = Workout.started_at >= thirty_days_ago
+
+    filters = [Workout.user_id == user_id, Workout.status == 'completed']
+    if exercise_ids is not None:
+        filters.append(WorkoutSet.exercise_id.in_(list(exercise_ids)))
+    if workout_id is not None:
+        filters.append(WorkoutSet.exercise_id.in_(
+            select(WorkoutSet.exercise_id).where(WorkoutSet.workout_id == workout_id).distinct()
+        ))
+
+    return select(
+        Workout.user_id,
+        WorkoutSet.exercise_id,
+        func.count(distinct(WorkoutSet.workout_id)),
+        func.count(WorkoutSet.id),
+        func.max(Workout.started_at),
+        func.avg(WorkoutSet.weight),
+        func.max(WorkoutSet.weight),
+        func.avg(WorkoutSet.fatigue_level),
+        func.count(distinct(case((last_7d, WorkoutSet.workout_id)))),
+        func.count(case((last_7d, WorkoutSet.id))),
+        func.count(distinct(case((last_30d, WorkoutSet.workout_id)))),
+        func.avg(case((last_30d, WorkoutSet.weight))),
+        literal(now, ExerciseCompletionStats.last_updated.type)
+    ).join(
+        Workout, WorkoutSet.workout_id == Workout.id
+    ).where(*filters).group_by(Workout.user_id, WorkoutSet.exercise_id)
+
+
+def refresh_exercise_stats(db: Session, user_id: int, exercise_ids: Optional[Iterable[int]] = None,
+                           workout_id: Optional[int] = None) -> int:
+    """
+    Recalcule et écrit les statistiques d'un utilisateur en une requête (sans commit).
+    Sans filtre, tous ses exercices sont recalculés. Retourne le nombre de lignes écrites.
+    """
+    source = stats_select(user_id, exercise_ids, workout_id)
+    columns = [getattr(ExerciseCompletionStats, name) for name in STATS_COLUMNS]
+    dialect = db.get_bind().dialect.name
+
+    if dialect in ("postgresql", "sqlite"):
+        insert_for = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        statement = insert_for(ExerciseCompletionStats).from_select(columns, source)
+        statement = statement.on_conflict_do_update(
+            index_elements=[ExerciseCompletionStats.user_id, ExerciseCompletionStats.exercise_id],
+            set_={name: getattr(statement.excluded, name) for name in STATS_COLUMNS[2:]}
+        )
+        return db.execute(statement).rowcount
+
+    # Autres bases : remplacement des lignes concernées
+    keys = source.with_only_columns(Workout.user_id, WorkoutSet.exercise_id)
+    db.execute(delete(ExerciseCompletionStats).where(
+        tuple_(ExerciseCompletionStats.user_id, ExerciseCompletionStats.exercise_id).in_(keys)
+    ))
+    return db.execute(insert(ExerciseCompletionStats).from_select(columns, source)).rowcount
@@ -0,0 +1,298 @@
+# backend/fitness_fatigue.py
+"""
+Modèle impulsion-réponse fitness / fatigue (Banister) par (utilisateur, exercice).
+
+Chaque série réalisée est une impulsion de charge (score d'Epley, ou durée / reps pour
+isométriques et poids du corps). À un instant t :
+    fitness(t) = Σ charge_i · exp(-(t - t_i) / τ_fitness)
+    fatigue(t) = Σ charge_i · exp(-(t - t_i) / τ_fatigue)
+Le potentiel est la moyenne des scores des séries réussies pondérée par le noyau de
+fitness, et la fatigue aiguë (0-1) la part de fatigue dans k1·fitness + k2·fatigue.
+
+Les sommes se décalent dans le temps par un simple facteur exp(-Δt/τ) : elles sont
+stockées (table fitness_fatigue_states) et mises à jour en O(1) à chaque série
+enregistrée (décroissance jusqu'à la série puis ajout de son impulsion, cf.
+add_set), puis projetées à l'instant de la recommandation sans relire l'historique.
+
+precompute_all() recalcule et enregistre les sommes de toutes les paires (utilisateur,
+exercice) en une passe vectorisée groupée (NumPy), dans le processus courant : tâche
+fitness_fatigue_rebuild (base antérieure à la table) ou
+`python -m backend.fitness_fatigue [user_id]`.
+"""
+
+import logging
+import math
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from .models import FitnessFatigueSums, SetHistory
+
+logger = logging.getLogger(__name__)
+
+FITNESS_TAU_DAYS = 42.0
+FATIGUE_TAU_DAYS = 7.0
+FITNESS_GAIN = 1.0   # k1
+FATIGUE_GAIN = 2.0   # k2
+
+SECONDS_PER_DAY = 86400.0
+
+
+def to_epoch(moment: Optional[datetime]) -> float:
+    """Secondes epoch (les dates naïves sont en UTC)"""
+    if moment is None:
+        return 0.0
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def set_scores(weights: np.ndarray, reps: np.ndarray, isometric: np.ndarray) -> np.ndarray:
+    """Score de performance par série : Epley avec poids, reps (ou secondes) sinon"""
+    weights = np.nan_to_num(np.asarray(weights, dtype=float))
+    reps = np.nan_to_num(np.asarray(reps, dtype=float))
+    epley = weights * (1.0 + reps / 30.0)
+    return np.where(np.asarray(isometric, dtype=bool) | (weights <= 0), reps, epley)
+
+
+def set_score(weight: Optional[float], reps: Optional[int], isometric: bool = False) -> float:
+    """Score d'une série (cf. set_scores)"""
+    return float(set_scores([weight or 0.0], [reps or 0], [isometric])[0])
+
+
+class FitnessFatigueState:
+    """Sommes du modèle à l'instant as_of (epoch)"""
+
+    __slots__ = ('as_of', 'fitness', 'fatigue', 'potential_sum', 'potential_weight', 'count')
+
+    def __init__(self, as_of: float, fitness: float, fatigue: float,
+                 potential_sum: float, potential_weight: float, count: int):
+        self.as_of = as_of
+        self.fitness = fitness
+        self.fatigue = fatigue
+        self.potential_sum = potential_sum
+        self.potential_weight = potential_weight
+        self.count = count
+
+    @classmethod
+    def from_row(cls, row: FitnessFatigueSums) -> 'FitnessFatigueState':
+        return cls(to_epoch(row.as_of), row.fitness or 0.0, row.fatigue or 0.0,
+                   row.potential_sum or 0.0, row.potential_weight or 0.0, row.set_count or 0)
+
+    def at(self, moment: float) -> Dict[str, float]:
+        """Valeurs du modèle décalées à moment (epoch), sans recalcul sur l'historique"""
+        days = max(0.0, (moment - self.as_of) / SECONDS_PER_DAY)
+        fitness = self.fitness * np.exp(-days / FITNESS_TAU_DAYS)
+        fatigue = self.fatigue * np.exp(-days / FATIGUE_TAU_DAYS)
+        total = FITNESS_GAIN * fitness + FATIGUE_GAIN * fatigue
+        return {
+            'fitness': float(fitness),
+            'fatigue': float(fatigue),
+            'performance': float(FITNESS_GAIN * fitness - FATIGUE_GAIN * fatigue),
+            # Même noyau au numérateur et au dénominateur : la moyenne ne dépend pas du décalage
+            'potential': float(self.potential_sum / self.potential_weight) if self.potential_weight > 0 else None,
+            'acute_fatigue': float(FATIGUE_GAIN * fatigue / total) if total > 0 else 0.0,
+            'count': self.count
+        }
+
+
+def compute_state(timestamps: np.ndarray, scores: np.ndarray, success: np.ndarray,
+                  as_of: float) -> FitnessFatigueState:
+    """État du modèle pour un historique (ordre indifférent), en une passe vectorisée"""
+    timestamps = np.asarray(timestamps, dtype=float)
+    scores = np.asarray(scores, dtype=float)
+    success = np.asarray(success, dtype=bool)
+    ages = np.maximum(0.0, (as_of - timestamps) / SECONDS_PER_DAY)
+    fitness_kernel = np.exp(-ages / FITNESS_TAU_DAYS)
+    fatigue_kernel = np.exp(-ages / FATIGUE_TAU_DAYS)
+    successful_kernel = fitness_kernel * success
+    return FitnessFatigueState(
+        as_of=as_of,
+        fitness=float(scores @ fitness_kernel),
+        fatigue=float(scores @ fatigue_kernel),
+        potential_sum=float(scores @ successful_kernel),
+        potential_weight=float(successful_kernel.sum()),
+        count=int(len(scores))
+    )
+
+
+def compute_states_grouped(group_starts: np.ndarray, timestamps: np.ndarray, scores: np.ndarray,
+                           success: np.ndarray, as_of: float) -> np.ndarray:
+    """
+    États de plusieurs groupes contigus en une passe (np.add.reduceat).
+    Retourne un tableau (n_groupes, 5) : fitness, fatigue, potential_sum, potential_weight, count.
+    """
+    ages = np.maximum(0.0, (as_of - timestamps) / SECONDS_PER_DAY)
+    fitness_kernel = np.exp(-ages / FITNESS_TAU_DAYS)
+    fatigue_kernel = np.exp(-ages / FATIGUE_TAU_DAYS)
+    successful_kernel = fitness_kernel * success
+    columns = np.stack([
+        scores * fitness_kernel,
+        scores * fatigue_kernel,
+        scores * successful_kernel,
+        successful_kernel,
+        np.ones_like(scores)
+    ], axis=1)
+    return np.add.reduceat(columns, group_starts, axis=0)
+
+
+def _history_state(db: Session, user_id: int, exercise_id: int, isometric: bool) -> FitnessFatigueState:
+    """État recalculé sur tout l'historique (paire sans sommes stockées)"""
+    rows = db.query(
+        SetHistory.date_performed, SetHistory.weight, SetHistory.actual_reps, SetHistory.success
+    ).filter(
+        SetHistory.user_id == user_id,
+        SetHistory.exercise_id == exercise_id
+    ).all()
+
+    timestamps = np.fromiter((to_epoch(row[0]) for row in rows), dtype=float, count=len(rows))
+    weights = np.fromiter((row[1] or 0.0 for row in rows), dtype=float, count=len(rows))
+    reps = np.fromiter((row[2] or 0 for row in rows), dtype=float, count=len(rows))
+    success = np.fromiter((bool(row[3]) for row in rows), dtype=bool, count=len(rows))
+
+    return compute_state(
+        timestamps, set_scores(weights, reps, np.full(len(rows), isometric)), success,
+        as_of=datetime.now(timezone.utc).timestamp()
+    )
+
+
+def _load_row(db: Session, user_id: int, exercise_id: int) -> Optional[FitnessFatigueSums]:
+    return db.query(FitnessFatigueSums).filter(
+        FitnessFatigueSums.user_id == user_id,
+        FitnessFatigueSums.exercise_id == exercise_id
+    ).first()
+
+
+def get_state(db: Session, user_id: int, exercise_id: int, isometric: bool = False) -> FitnessFatigueState:
+    """
+    État du modèle pour un utilisateur et un exercice : sommes stockées (une lecture
+    indexée), ou recalcul sur l'historique pour une paire pas encore enregistrée.
+    """
+    row = _load_row(db, user_id, exercise_id)
+    if row is not None:
+        return FitnessFatigueState.from_row(row)
+    return _history_state(db, user_id, exercise_id, isometric)
+
+
+def load_for_update(db: Session, user_id: int, exercise_id: int, isometric: bool = False) -> FitnessFatigueSums:
+    """Sommes à mettre à jour (créées depuis l'historique si absentes, ajoutées à la session)"""
+    row = _load_row(db, user_id, exercise_id)
+    if row is None:
+        state = _history_state(db, user_id, exercise_id, isometric)
+        row = FitnessFatigueSums(user_id=user_id, exercise_id=exercise_id)
+        _store(row, state)
+        db.add(row)
+    return row
+
+
+def _store(row: FitnessFatigueSums, state: FitnessFatigueState):
+    row.as_of = datetime.fromtimestamp(state.as_of, timezone.utc)
+    row.fitness = float(state.fitness)
+    row.fatigue = float(state.fatigue)
+    row.potential_sum = float(state.potential_sum)
+    row.potential_weight = float(state.potential_weight)
+    row.set_count = int(state.count)
+
+
+def add_set(row: FitnessFatigueSums, score: float, success: bool, moment: Optional[datetime] = None):
+    """
+    Ajoute l'impulsion d'une série en O(1) : les sommes sont décrues jusqu'à la série
+    (exp(-Δt/τ)) puis la charge est ajoutée (une série antérieure à as_of est décrue à sa place).
+    """
+    moment = to_epoch(moment or datetime.now(timezone.utc))
+    as_of = to_epoch(row.as_of) if row.as_of is not None else moment
+    days = (moment - as_of) / SECONDS_PER_DAY
+    if days >= 0:
+        fitness_decay, fatigue_decay = math.exp(-days / FITNESS_TAU_DAYS), math.exp(-days / FATIGUE_TAU_DAYS)
+        row.fitness = (row.fitness or 0.0) * fitness_decay
+        row.fatigue = (row.fatigue or 0.0) * fatigue_decay
+        row.potential_sum = (row.potential_sum or 0.0) * fitness_decay
+        row.potential_weight = (row.potential_weight or 0.0) * fitness_decay
+        row.as_of = datetime.fromtimestamp(moment, timezone.utc)
+        fitness_kernel = fatigue_kernel = 1.0
+    else:
+        fitness_kernel, fatigue_kernel = math.exp(days / FITNESS_TAU_DAYS), math.exp(days / FATIGUE_TAU_DAYS)
+    row.fitness = (row.fitness or 0.0) + score * fitness_kernel
+    row.fatigue = (row.fatigue or 0.0) + score * fatigue_kernel
+    if success:
+        row.potential_sum = (row.potential_sum or 0.0) + score * fitness_kernel
+        row.potential_weight = (row.potential_weight or 0.0) + fitness_kernel
+    row.set_count = (row.set_count or 0) + 1
+
+
+def delete_user_rows(db: Session, user_id: int):
+    db.query(FitnessFatigueSums).filter(FitnessFatigueSums.user_id == user_id).delete(synchronize_session=False)
+
+
+def is_empty(db: Session) -> bool:
+    return db.query(FitnessFatigueSums.id).first() is None
+
+
+def precompute_all(db: Session, isometric_exercise_ids: Iterable[int] = (),
+                   user_id: Optional[int] = None) -> int:
+    """
+    Recalcule depuis set_history et enregistre les sommes de toutes les paires (utilisateur,
+    exercice) ayant un historique (un utilisateur ou tous), puis commit.
+    Retourne le nombre de paires calculées.
+    """
+    history = db.query(
+        SetHistory.user_id, SetHistory.exercise_id, SetHistory.date_performed,
+        SetHistory.weight, SetHistory.actual_reps, SetHistory.success
+    )
+    cleared = db.query(FitnessFatigueSums)
+    if user_id is not None:
+        history = history.filter(SetHistory.user_id == user_id)
+        cleared = cleared.filter(FitnessFatigueSums.user_id == user_id)
+    rows = history.order_by(SetHistory.user_id, SetHistory.exercise_id).all()
+    cleared.delete(synchronize_session=False)
+    if not rows:
+        db.commit()
+        return 0
+
+    count = len(rows)
+    users = np.fromiter((row[0] for row in rows), dtype=np.int64, count=count)
+    exercises = np.fromiter((row[1] for row in rows), dtype=np.int64, count=count)
+    timestamps = np.fromiter((to_epoch(row[2]) for row in rows), dtype=float, count=count)
+    weights = np.fromiter((row[3] or 0.0 for row in rows), dtype=float, count=count)
+    reps = np.fromiter((row[4] or 0 for row in rows), dtype=float, count=count)
+    success = np.fromiter((bool(row[5]) for row in rows), dtype=bool, count=count)
+    isometric = np.isin(exercises, np.fromiter(isometric_exercise_ids, dtype=np.int64))
+    scores = set_scores(weights, reps, isometric)
+
+    # Début de chaque groupe (lignes triées par utilisateur puis exercice)
+    boundaries = np.flatnonzero((np.diff(users) != 0) | (np.diff(exercises) != 0)) + 1
+    group_starts = np.concatenate(([0], boundaries))
+    as_of = datetime.now(timezone.utc).timestamp()
+    results = compute_states_grouped(group_starts, timestamps, scores, success, as_of)
+
+    sums = []
+    for start, (fitness, fatigue, potential_sum, potential_weight, group_count) in zip(group_starts, results):
+        row = FitnessFatigueSums(user_id=int(users[start]), exercise_id=int(exercises[start]))
+        _store(row, FitnessFatigueState(as_of, fitness, fatigue, potential_sum, potential_weight, int(group_count)))
+        sums.append(row)
+    db.add_all(sums)
+    db.commit()
+
+    logger.info(f"Modèle fitness/fatigue précalculé: {len(group_starts)} paires, {count} séries")
+    return len(group_starts)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    from .database import SessionLocal
+    from .exercise_catalog import get_catalog
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        target = int(sys.argv[1]) if len(sys.argv) > 1 else None
+        isometric_ids = [exercise.id for exercise in get_catalog(db).by_exercise_type("isometric")]
+        start = time.perf_counter()
+        pairs = precompute_all(db, isometric_ids, user_id=target)
+        print(f"{pairs} paires enregistrées en {(time.perf_counter() - start) * 1000:.1f} ms")
+    finally:
+        db.close()
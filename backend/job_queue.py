@@ -0,0 +1,244 @@
+# backend/job_queue.py
+"""
+File de traitements différés stockée en base (table background_jobs).
+
+Les endpoints de fin de séance enregistrent des tâches (enqueue) dans leur propre
+transaction puis répondent immédiatement ; des threads de traitement, démarrés dans
+chaque worker gunicorn, exécutent les tâches en attente.
+
+- Réservation par compare-and-swap (UPDATE ... WHERE status = 'pending') : une tâche
+  n'est exécutée que par le worker dont la mise à jour a abouti, sans doublon.
+- Une tâche en cours dont le worker a disparu est reprise après JOB_LOCK_TIMEOUT_SECONDS.
+- Échec : nouvelle tentative avec délai exponentiel, 'failed' après max_attempts.
+- dedupe_key : une seule tâche en attente par clé (les demandes identiques fusionnent).
+
+Les types de tâches doivent être idempotents (une tâche reprise peut être rejouée) ;
+ils sont enregistrés avec le décorateur job_handler.
+"""
+
+import logging
+import os
+import socket
+import threading
+import traceback
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKER_THREADS = int(os.environ.get("JOB_WORKER_THREADS", "1"))
+JOB_POLL_INTERVAL_SECONDS = 5.0
+JOB_LOCK_TIMEOUT_SECONDS = 10 * 60
+JOB_RETRY_BASE_SECONDS = 30
+JOB_RETENTION_DAYS = 7
+
+# Types de tâches : nom -> fonction(db, payload)
+JOB_HANDLERS: Dict[str, Callable[[Session, Dict], None]] = {}
+
+_wake = threading.Event()
+
+
+def job_handler(job_type: str):
+    """Enregistre la fonction de traitement d'un type de tâche"""
+    def register(func: Callable[[Session, Dict], None]):
+        JOB_HANDLERS[job_type] = func
+        return func
+    return register
+
+
+def enqueue(db: Session, job_type: str, payload: Optional[Dict] = None,
+            dedupe_key: Optional[str] = None, max_attempts: int = 5) -> BackgroundJob:
+    """
+    Ajoute une tâche (sans commit : elle est durable avec la transaction de l'appelant).
+    Si une tâche en attente porte déjà dedupe_key, elle est réutilisée.
+    """
+    if dedupe_key:
+        existing = db.query(BackgroundJob).filter(
+            BackgroundJob.dedupe_key == dedupe_key,
+            BackgroundJob.status == "pending"
+        ).first()
+        if existing:
+            return existing
+
+    job = BackgroundJob(
+        job_type=job_type,
+        payload=payload or {},
+        dedupe_key=dedupe_key,
+        max_attempts=max_attempts,
+        run_after=datetime.now(timezone.utc)
+    )
+    db.add(job)
+    return job
+
+
+def notify():
+    """Réveille les threads de ce worker (tâches ajoutées et commitées)"""
+    _wake.set()
+
+
+def _claimable(now: datetime):
+    return or_(
+        and_(BackgroundJob.status == "pending", BackgroundJob.run_after <= now),
+        and_(
+            BackgroundJob.status == "running",
+            BackgroundJob.locked_at < now - timedelta(seconds=JOB_LOCK_TIMEOUT_SECONDS)
+        )
+    )
+
+
+def claim_next(db: Session, worker_id: str, batch: int = 10) -> Optional[BackgroundJob]:
+    """Réserve la prochaine tâche exécutable pour worker_id (None si aucune)"""
+    now = datetime.now(timezone.utc)
+    candidates = [
+        job_id for (job_id,) in db.query(BackgroundJob.id).filter(
+            _claimable(now)
+        ).order_by(BackgroundJob.run_after, BackgroundJob.id).limit(batch)
+    ]
+    for job_id in candidates:
+        claimed = db.query(BackgroundJob).filter(
+            BackgroundJob.id == job_id,
+            _claimable(now)
+        ).update({
+            BackgroundJob.status: "running",
+            BackgroundJob.locked_by: worker_id,
+            BackgroundJob.locked_at: now,
+            BackgroundJob.attempts: BackgroundJob.attempts + 1
+        }, synchronize_session=False)
+        db.commit()
+        if claimed:
+            return db.query(BackgroundJob).filter(BackgroundJob.id == job_id).first()
+    return None
+
+
+def run_job(db: Session, job: BackgroundJob, worker_id: str) -> bool:
+    """Exécute une tâche réservée et enregistre le résultat ; True si elle a réussi"""
+    handler = JOB_HANDLERS.get(job.job_type)
+    job_id, attempts, max_attempts = job.id, job.attempts, job.max_attempts
+    try:
+        if handler is None:
+            raise ValueError(f"Type de tâche inconnu: {job.job_type}")
+        handler(db, dict(job.payload or {}))
+        db.commit()
+        error = None
+    except Exception as e:
+        db.rollback()
+        error = f"{e}\n{traceback.format_exc(limit=5)}"
+        logger.warning(f"Tâche {job_id} ({job.job_type}) en échec, tentative {attempts}/{max_attempts}: {e}")
+
+    now = datetime.now(timezone.utc)
+    if error is None:
+        values = {BackgroundJob.status: "done", BackgroundJob.finished_at: now, BackgroundJob.last_error: None}
+    elif attempts >= max_attempts:
+        values = {BackgroundJob.status: "failed", BackgroundJob.finished_at: now, BackgroundJob.last_error: error}
+    else:
+        values = {
+            BackgroundJob.status: "pending",
+            BackgroundJob.run_after: now + timedelta(seconds=JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1)),
+            BackgroundJob.last_error: error
+        }
+    # Seul le worker qui détient encore la tâche enregistre le résultat
+    db.query(BackgroundJob).filter(
+        BackgroundJob.id == job_id,
+        BackgroundJob.locked_by == worker_id,
+        BackgroundJob.status == "running"
+    ).update(values, synchronize_session=False)
+    db.commit()
+    return error is None
+
+
+def drain(worker_id: Optional[str] = None, limit: Optional[int] = None) -> int:
+    """Exécute les tâches disponibles jusqu'à épuisement (ou limit) ; retourne le nombre traité"""
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+    processed = 0
+    db = SessionLocal()
+    try:
+        while limit is None or processed < limit:
+            job = claim_next(db, worker_id)
+            if job is None:
+                break
+            run_job(db, job, worker_id)
+            processed += 1
+    finally:
+        db.close()
+    return processed
+
+
+def purge_finished(db: Session, older_than_days: int = JOB_RETENTION_DAYS) -> int:
+    """Supprime les tâches terminées depuis plus de older_than_days jours"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    deleted = db.query(BackgroundJob).filter(
+        BackgroundJob.status == "done",
+        BackgroundJob.finished_at < cutoff
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+class JobWorker:
+    """Threads de traitement de la file pour ce worker (démarrés au lancement de l'application)"""
+
+    _threads: List[threading.Thread] = []
+    _stop = threading.Event()
+    _lock = threading.Lock()
+    _stats = {'processed': 0, 'errors': 0}
+
+    @classmethod
+    def start(cls, threads: int = JOB_WORKER_THREADS):
+        with cls._lock:
+            if cls._threads or threads <= 0:
+                return
+            cls._stop.clear()
+            for index in range(threads):
+                thread = threading.Thread(target=cls._run, name=f"job-worker-{index}", daemon=True)
+                thread.start()
+                cls._threads.append(thread)
+        logger.info(f"File de tâches: {threads} thread(s) démarré(s)")
+
+    @classmethod
+    def stop(cls, timeout: float = 10.0):
+        with cls._lock:
+            threads, cls._threads = cls._threads, []
+        cls._stop.set()
+        _wake.set()
+        for thread in threads:
+            thread.join(timeout)
+
+    @classmethod
+    def _run(cls):
+        worker_id = f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+        last_purge = datetime.min.replace(tzinfo=timezone.utc)
+        while not cls._stop.is_set():
+            try:
+                processed = drain(worker_id)
+                with cls._lock:
+                    cls._stats['processed'] += processed
+                now = datetime.now(timezone.utc)
+                if now - last_purge > timedelta(hours=1):
+                    db = SessionLocal()
+                    try:
+                        purge_finished(db)
+                    finally:
+                        db.close()
+                    last_purge = now
+            except Exception as e:
+                with cls._lock:
+                    cls._stats['errors'] += 1
+                logger.error(f"Erreur file de tâches: {e}")
+            _wake.wait(JOB_POLL_INTERVAL_SECONDS)
+            _wake.clear()
+
+    @classmethod
+    def get_stats(cls, db: Session) -> Dict:
+        counts = dict(db.query(BackgroundJob.status, func.count(BackgroundJob.id)).group_by(BackgroundJob.status).all())
+        with cls._lock:
+            stats = dict(cls._stats)
+            stats['threads'] = len(cls._threads)
+        stats['jobs'] = {status: counts.get(status, 0) for status in ('pending', 'running', 'done', 'failed')}
+        stats['handlers'] = sorted(JOB_HANDLERS)
+        return stats
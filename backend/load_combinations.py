@@ -0,0 +1,137 @@
+# backend/load_combinations.py
+"""
+Moteur de combinaisons de charges (disques, élastiques).
+
+Calcule tous les totaux atteignables à partir d'un inventaire {poids: quantité}
+par programmation dynamique sur les totaux distincts (somme de sous-ensembles
+bornée). Chaque quantité est découpée en blocs binaires (1, 2, 4, ...) :
+le coût est proportionnel à nb_totaux_distincts × nb_types × log(quantité),
+au lieu d'énumérer toutes les combinaisons de pièces.
+
+Contraintes supportées :
+- group_size : les pièces s'utilisent par groupes identiques
+  (2 = une par côté de barre, 4 = une par côté de chacune des 2 barres courtes)
+- max_load : charge totale maximale
+- min_pieces / max_pieces : nombre de groupes utilisés (ex: 2 à 3 élastiques)
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+# Précision des calculs : 1 g (évite les erreurs d'arrondi sur 1.25 kg, 0.5 kg...)
+SCALE = 1000
+
+
+def _to_units(weight: float) -> int:
+    return int(round(float(weight) * SCALE))
+
+
+def _normalize_inventory(inventory: Dict, group_size: int) -> List[Tuple[int, int]]:
+    """Convertit {poids: quantité} en [(poids d'un groupe en g, nb de groupes)]"""
+    merged: Dict[int, int] = {}
+    for weight, count in (inventory or {}).items():
+        try:
+            units = _to_units(weight)
+            groups = int(count or 0) // group_size
+        except (TypeError, ValueError):
+            continue
+        if units > 0 and groups > 0:
+            merged[units] = merged.get(units, 0) + groups
+    return sorted(merged.items())
+
+
+def _binary_chunks(groups: int) -> List[int]:
+    """Découpe une quantité en blocs 1, 2, 4, ..., reste (toute quantité 0..n est une somme de blocs)"""
+    chunks = []
+    size = 1
+    while groups > 0:
+        chunk = min(size, groups)
+        chunks.append(chunk)
+        groups -= chunk
+        size *= 2
+    return chunks
+
+
+def _solve(inventory: Dict, group_size: int, max_load: Optional[float],
+           max_pieces: Optional[int], with_assignments: bool) -> Dict[Tuple[int, int], Optional[Tuple[int, ...]]]:
+    """
+    Programmation dynamique sur les états (total en g, nb de groupes utilisés).
+
+    Sans max_pieces, seul le nombre minimal de groupes est conservé par total
+    (un état par total distinct). Avec max_pieces, chaque nombre de groupes
+    0..max_pieces est conservé, ce qui permet de filtrer sur min_pieces.
+    La répartition par type n'est conservée que si with_assignments.
+    """
+    plate_types = _normalize_inventory(inventory, group_size)
+    cap = _to_units(max_load) if max_load is not None else None
+    keep_all_piece_counts = max_pieces is not None
+
+    empty = tuple([0] * len(plate_types)) if with_assignments else None
+    # clé : total (ou (total, groupes)) -> (groupes, répartition)
+    states: Dict = {(0, 0) if keep_all_piece_counts else 0: (0, empty)}
+
+    for type_index, (group_units, groups) in enumerate(plate_types):
+        group_weight = group_units * group_size
+        for chunk in _binary_chunks(groups):
+            added = group_weight * chunk
+            updates = {}
+            for key, (pieces, counts) in states.items():
+                total = key[0] if keep_all_piece_counts else key
+                new_total = total + added
+                if cap is not None and new_total > cap:
+                    continue
+                new_pieces = pieces + chunk
+                if keep_all_piece_counts:
+                    if new_pieces > max_pieces:
+                        continue
+                    new_key = (new_total, new_pieces)
+                    if new_key in states or new_key in updates:
+                        continue
+                else:
+                    new_key = new_total
+                    # updates ne contient que des améliorations de states
+                    current = updates.get(new_key, states.get(new_key))
+                    if current is not None and current[0] <= new_pieces:
+                        continue
+                if with_assignments:
+                    counts = counts[:type_index] + (counts[type_index] + chunk,) + counts[type_index + 1:]
+                updates[new_key] = (new_pieces, counts)
+            states.update(updates)
+
+    # Ramener à un état par (total, groupes)
+    solved = {}
+    for key, (pieces, counts) in states.items():
+        total = key[0] if keep_all_piece_counts else key
+        if with_assignments:
+            type_weights = [group_units / SCALE for group_units, _ in plate_types]
+            counts = tuple(zip(type_weights, counts))
+        solved[(total, pieces)] = counts
+    return solved
+
+
+def reachable_totals(inventory: Dict, group_size: int = 1, max_load: Optional[float] = None,
+                     min_pieces: int = 0, max_pieces: Optional[int] = None) -> List[float]:
+    """
+    Liste triée des charges totales atteignables (0 inclus si min_pieces == 0).
+    Les pièces sont comptées par groupe : avec group_size=2, max_pieces=3 signifie 3 paires.
+    min_pieces n'est exact que combiné à max_pieces.
+    """
+    states = _solve(inventory, group_size, max_load, max_pieces, with_assignments=False)
+    return sorted({total / SCALE for total, pieces in states if pieces >= min_pieces})
+
+
+def reachable_assignments(inventory: Dict, group_size: int = 1, max_load: Optional[float] = None,
+                          max_pieces: Optional[int] = None) -> Dict[float, Dict[float, int]]:
+    """
+    Pour chaque charge totale atteignable, une répartition utilisant le moins de pièces possible.
+    La répartition donne le nombre de pièces de chaque poids PAR EMPLACEMENT
+    (par côté pour une barre, par côté de chaque barre pour une paire d'haltères).
+    """
+    states = _solve(inventory, group_size, max_load, max_pieces, with_assignments=True)
+    best: Dict[int, Tuple[int, Tuple]] = {}
+    for (total, pieces), counts in states.items():
+        if total not in best or pieces < best[total][0]:
+            best[total] = (pieces, counts)
+    return {
+        total / SCALE: {weight: count for weight, count in counts if count > 0}
+        for total, (pieces, counts) in sorted(best.items())
+    }
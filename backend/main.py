@@ -1,6 +1,6 @@
 # ===== backend/main.py - VERSION REFACTORISÉE =====
 import traceback
-from fastapi import FastAPI, HTTPException, Depends, Query, Body
+from fastapi import FastAPI, HTTPException, Depends, Query, Body, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
@@ -14,18 +14,26 @@ from contextlib import asynccontextmanager
 import json
 import os
 import logging
+import numpy as np
 from backend.ml_recommendations import FitnessRecommendationEngine
-from backend.ml_engine import FitnessMLEngine, RecoveryTracker, VolumeOptimizer, ProgressionAnalyzer
+from backend.ml_engine import FitnessMLEngine, RecoveryTracker, VolumeOptimizer, ProgressionAnalyzer, RealTimeAdapter
 from backend.constants import normalize_muscle_group, exercise_matches_focus_area
 from backend.database import engine, get_db, SessionLocal
 from backend.models import Base, User, Exercise, Workout, WorkoutSet, SetHistory, UserCommitment, AdaptiveTargets, UserAdaptationCoefficients, PerformanceStates, ExerciseCompletionStats, SwapLog
 from backend.schemas import (
     UserCreate, UserResponse, WorkoutResponse, WorkoutCreate, 
     SetCreate, ExerciseResponse, UserPreferenceUpdate,
-    GenerateExercisesRequest, GenerateExercisesResponse, AIGenerationParams
+    GenerateExercisesRequest, GenerateExercisesResponse, AIGenerationParams,
+    PlatePlanRequest, SetBatchCreate, SetLogAndRecommendRequest, SessionRecommendationsRequest
 )
 
 from backend.equipment_service import EquipmentService
+from backend.exercise_catalog import get_catalog, rebuild_catalog, sync_exercises_from_file
+from backend.recommendation_context import RecommendationContextCache, SetSnapshot, HistorySnapshot
+from backend.volume import compute_volumes
+from backend.exercise_stats import refresh_exercise_stats, ensure_stats_unique_index
+from backend.job_queue import JobWorker, enqueue, job_handler, notify as notify_jobs
+from backend import muscle_volume, personal_records, fitness_fatigue, timeseries, stats_frame
 from sqlalchemy import extract, and_
 import calendar
 from collections import defaultdict
@@ -58,105 +66,17 @@ def safe_datetime_subtract(dt1, dt2):
     
     return dt1 - dt2
 
-def update_exercise_stats_for_user(db: Session, user_id: int, exercise_id: int = None):
-    """Met à jour les stats d'exercices - Alternative légère à la vue matérialisée"""
+def update_exercise_stats_for_user(db: Session, user_id: int, exercise_id: int = None, workout_id: int = None):
+    """
+    Met à jour les stats d'exercices - Alternative légère à la vue matérialisée.
+    Un seul upsert pour tous les exercices concernés (cf. backend.exercise_stats).
+    """
     try:
-        # Si exercise_id spécifié, ne mettre à jour que celui-ci
-        exercise_filter = []
-        if exercise_id:
-            exercise_filter.append(WorkoutSet.exercise_id == exercise_id)
-        
-        # Requête optimisée pour récupérer toutes les stats d'un coup
-        stats_query = db.query(
-            Workout.user_id,
-            WorkoutSet.exercise_id,
-            func.count(distinct(WorkoutSet.workout_id)).label('total_sessions'),
-            func.count(WorkoutSet.id).label('total_sets'),
-            func.max(Workout.started_at).label('last_performed'),
-            func.avg(WorkoutSet.weight).label('avg_weight_all_time'),
-            func.max(WorkoutSet.weight).label('max_weight_all_time'),
-            func.avg(WorkoutSet.fatigue_level).label('avg_fatigue_level')
-        ).join(
-            Workout, WorkoutSet.workout_id == Workout.id
-        ).filter(
-            Workout.user_id == user_id,
-            Workout.status == 'completed',
-            *exercise_filter
-        ).group_by(
-            Workout.user_id,
-            WorkoutSet.exercise_id
+        refresh_exercise_stats(
+            db, user_id,
+            exercise_ids=[exercise_id] if exercise_id else None,
+            workout_id=workout_id
         )
-        
-        # Récupérer aussi les stats sur 7 et 30 jours
-        now = datetime.now(timezone.utc)
-        seven_days_ago = now - timedelta(days=7)
-        thirty_days_ago = now - timedelta(days=30)
-        
-        for stat_row in stats_query.all():
-            # Stats 7 jours
-            stats_7d = db.query(
-                func.count(distinct(WorkoutSet.workout_id)).label('sessions'),
-                func.count(WorkoutSet.id).label('sets')
-            ).join(
-                Workout, WorkoutSet.workout_id == Workout.id
-            ).filter(
-                Workout.user_id == user_id,
-                WorkoutSet.exercise_id == stat_row.exercise_id,
-                Workout.started_at >= seven_days_ago,
-                Workout.status == 'completed'
-            ).first()
-            
-            # Stats 30 jours
-            stats_30d = db.query(
-                func.count(distinct(WorkoutSet.workout_id)).label('sessions'),
-                func.avg(WorkoutSet.weight).label('avg_weight')
-            ).join(
-                Workout, WorkoutSet.workout_id == Workout.id
-            ).filter(
-                Workout.user_id == user_id,
-                WorkoutSet.exercise_id == stat_row.exercise_id,
-                Workout.started_at >= thirty_days_ago,
-                Workout.status == 'completed'
-            ).first()
-            
-            # Mettre à jour ou créer l'entrée
-            existing_stat = db.query(ExerciseCompletionStats).filter(
-                ExerciseCompletionStats.user_id == user_id,
-                ExerciseCompletionStats.exercise_id == stat_row.exercise_id
-            ).first()
-            
-            if existing_stat:
-                # Mettre à jour
-                existing_stat.total_sessions = stat_row.total_sessions
-                existing_stat.total_sets = stat_row.total_sets
-                existing_stat.last_performed = stat_row.last_performed
-                existing_stat.avg_weight_all_time = stat_row.avg_weight_all_time
-                existing_stat.max_weight_all_time = stat_row.max_weight_all_time
-                existing_stat.avg_fatigue_level = stat_row.avg_fatigue_level
-                existing_stat.sessions_last_7d = stats_7d.sessions if stats_7d else 0
-                existing_stat.sets_last_7d = stats_7d.sets if stats_7d else 0
-                existing_stat.sessions_last_30d = stats_30d.sessions if stats_30d else 0
-                existing_stat.avg_weight_last_30d = stats_30d.avg_weight if stats_30d else None
-                existing_stat.last_updated = now
-            else:
-                # Créer nouvelle entrée
-                new_stat = ExerciseCompletionStats(
-                    user_id=user_id,
-                    exercise_id=stat_row.exercise_id,
-                    total_sessions=stat_row.total_sessions,
-                    total_sets=stat_row.total_sets,
-                    last_performed=stat_row.last_performed,
-                    avg_weight_all_time=stat_row.avg_weight_all_time,
-                    max_weight_all_time=stat_row.max_weight_all_time,
-                    avg_fatigue_level=stat_row.avg_fatigue_level,
-                    sessions_last_7d=stats_7d.sessions if stats_7d else 0,
-                    sets_last_7d=stats_7d.sets if stats_7d else 0,
-                    sessions_last_30d=stats_30d.sessions if stats_30d else 0,
-                    avg_weight_last_30d=stats_30d.avg_weight if stats_30d else None,
-                    last_updated=now
-                )
-                db.add(new_stat)
-        
         db.commit()
         logger.info(f"Stats mises à jour pour user {user_id}")
         
@@ -164,16 +84,19 @@ def update_exercise_stats_for_user(db: Session, user_id: int, exercise_id: int =
         logger.error(f"Erreur mise à jour stats: {e}")
         db.rollback()
 
-def analyze_skip_patterns_realtime(user_id: int, current_skips: List[Dict], db: Session):
+def analyze_skip_patterns_realtime(user_id: int, current_skips: List[Dict], db: Session, exclude_workout_id: int = None):
     """Analyse immédiate des patterns de skip pour ajustements ML"""
     from collections import defaultdict
     
-    # Récupérer les 10 dernières séances
-    recent_workouts = db.query(Workout).filter(
+    # Récupérer les 10 dernières séances (hors séance courante, comptée via current_skips)
+    recent_query = db.query(Workout).filter(
         Workout.user_id == user_id,
         Workout.status == 'completed',
         Workout.skipped_exercises.isnot(None)
-    ).order_by(desc(Workout.completed_at)).limit(10).all()
+    )
+    if exclude_workout_id:
+        recent_query = recent_query.filter(Workout.id != exclude_workout_id)
+    recent_workouts = recent_query.order_by(desc(Workout.completed_at)).limit(10).all()
     
     # Compter les skips par exercice
     skip_counts = defaultdict(int)
@@ -201,6 +124,56 @@ def analyze_skip_patterns_realtime(user_id: int, current_skips: List[Dict], db:
         logger.info(f"User {user_id}: Critical skip pattern detected for exercises {critical_exercises}")
 
 
+# ===== TÂCHES DIFFÉRÉES (cf. backend.job_queue) =====
+
+@job_handler("stats_refresh")
+def _job_stats_refresh(db: Session, payload: Dict):
+    """Stats d'exercices d'une séance terminée (upsert idempotent)"""
+    refresh_exercise_stats(db, payload["user_id"], workout_id=payload.get("workout_id"))
+
+@job_handler("skip_patterns")
+def _job_skip_patterns(db: Session, payload: Dict):
+    """Patterns de skip à partir des exercices sautés d'une séance"""
+    workout = db.query(Workout).filter(Workout.id == payload["workout_id"]).first()
+    if workout and workout.skipped_exercises:
+        analyze_skip_patterns_realtime(workout.user_id, workout.skipped_exercises, db, exclude_workout_id=workout.id)
+
+@job_handler("muscle_volume_rebuild")
+def _job_muscle_volume_rebuild(db: Session, payload: Dict):
+    """Reconstruction du cumul de volume musculaire (base existante, utilisateur ou tous)"""
+    muscle_volume.rebuild(db, payload.get("user_id"))
+
+@job_handler("fitness_fatigue_rebuild")
+def _job_fitness_fatigue_rebuild(db: Session, payload: Dict):
+    """Sommes du modèle fitness/fatigue recalculées depuis l'historique (base existante, utilisateur ou tous)"""
+    isometric_ids = [exercise.id for exercise in get_catalog(db).by_exercise_type("isometric")]
+    fitness_fatigue.precompute_all(db, isometric_ids, user_id=payload.get("user_id"))
+
+@job_handler("progression_backfill")
+def _job_progression_backfill(db: Session, payload: Dict):
+    """État de progression reconstruit depuis l'historique récent (état incrémental absent)"""
+    perf_state = db.query(PerformanceStates).filter(
+        PerformanceStates.user_id == payload["user_id"],
+        PerformanceStates.exercise_id == payload["exercise_id"]
+    ).first()
+    if perf_state is not None:
+        FitnessRecommendationEngine(db).rebuild_progression_pattern(
+            payload["user_id"], payload["exercise_id"], perf_state
+        )
+
+@job_handler("pr_update")
+def _job_pr_update(db: Session, payload: Dict):
+    """Reconstruction des records personnels depuis l'historique (base existante, utilisateur ou tous)"""
+    personal_records.rebuild(db, payload.get("user_id"))
+
+@job_handler("targets_recalibration")
+def _job_targets_recalibration(db: Session, payload: Dict):
+    """Volumes réalisés, détection de surentraînement et recalibrage des targets adaptatifs"""
+    workout = db.query(Workout).filter(Workout.id == payload["workout_id"]).first()
+    if workout:
+        RealTimeAdapter(db).handle_session_completed(workout)
+
+
 def score_exercise_alternative(
     source_exercise: Exercise, 
     candidate: Exercise, 
@@ -247,37 +220,48 @@ async def lifespan(app: FastAPI):
     # Charger les exercices si nécessaire
     db = SessionLocal()
     try:
-        if db.query(Exercise).count() == 0:
-            await load_exercises(db)
+        # Synchronisation no-op si exercises.json n'a pas changé depuis le dernier déploiement
+        await load_exercises(db)
+        # Charger le catalogue en mémoire pour ce worker
+        get_catalog(db)
+        try:
+            ensure_stats_unique_index(db)
+        except Exception as e:
+            logger.error(f"Erreur création index unique des stats: {e}")
+            db.rollback()
+        # Base antérieure au cumul de volume musculaire : reconstruction en tâche de fond
+        if muscle_volume.is_empty(db) and db.query(WorkoutSet.id).first() is not None:
+            enqueue(db, "muscle_volume_rebuild", {}, dedupe_key="muscle_volume_rebuild")
+            db.commit()
+        # Idem pour les records personnels et les sommes du modèle fitness/fatigue
+        if personal_records.is_empty(db) and db.query(SetHistory.id).first() is not None:
+            enqueue(db, "pr_update", {}, dedupe_key="pr_update")
+            db.commit()
+        if fitness_fatigue.is_empty(db) and db.query(SetHistory.id).first() is not None:
+            enqueue(db, "fitness_fatigue_rebuild", {}, dedupe_key="fitness_fatigue_rebuild")
+            db.commit()
     finally:
         db.close()
+    JobWorker.start()
     yield
+    JobWorker.stop()
 
 async def load_exercises(db: Session):
-    """Charge les exercices depuis exercises.json"""
+    """Synchronise les exercices depuis exercises.json (seules les lignes modifiées sont écrites)"""
     exercises_path = os.path.join(os.path.dirname(__file__), "..", "exercises.json")
     
     try:
         if os.path.exists(exercises_path):
-            with open(exercises_path, "r", encoding="utf-8") as f:
-                exercises_data = json.load(f)
-                
-            for exercise_data in exercises_data:
-                # Vérifier si l'exercice existe déjà
-                existing = db.query(Exercise).filter(
-                    Exercise.name == exercise_data["name"]
-                ).first()
-                
-                if not existing:
-                    exercise = Exercise(**exercise_data)
-                    db.add(exercise)
-                else:
-                    # Mettre à jour avec les nouveaux champs
-                    for key, value in exercise_data.items():
-                        setattr(existing, key, value)
+            result = sync_exercises_from_file(db, exercises_path)
             
-            db.commit()
-            logger.info(f"Chargé/mis à jour {len(exercises_data)} exercices")
+            if result["skipped"]:
+                logger.info("exercises.json inchangé, synchronisation ignorée")
+            else:
+                logger.info(
+                    f"Exercices synchronisés: {result['inserted']} ajoutés, "
+                    f"{result['updated']} mis à jour, {result['unchanged']} inchangés"
+                )
+                rebuild_catalog(db)
         else:
             logger.warning(f"Fichier exercises.json non trouvé à {exercises_path}")
             
@@ -348,12 +332,28 @@ def update_user(user_id: int, user_data: Dict[str, Any], db: Session = Depends(g
     if not user:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
     
+    previous_equipment_config = user.equipment_config
+    previous_profile = (user.weight, user.experience_level)
+    
     for key, value in user_data.items():
         if hasattr(user, key):
             setattr(user, key, value)
     
+    # Volumes poids du corps / hybrides du cumul musculaire calculés avec le profil : recalcul différé
+    rebuild_muscle_volume = (user.weight, user.experience_level) != previous_profile
+    if rebuild_muscle_volume:
+        enqueue(db, "muscle_volume_rebuild", {"user_id": user_id}, dedupe_key=f"muscle_volume_rebuild:{user_id}")
+    
     db.commit()
     db.refresh(user)
+    if rebuild_muscle_volume:
+        notify_jobs()
+    
+    # L'équipement ou le poids a pu changer : purger les poids réalisables de l'ancien profil
+    if 'equipment_config' in user_data or 'weight' in user_data:
+        EquipmentService.invalidate_weights_cache(previous_equipment_config)
+        RecommendationContextCache.evict_user(user_id)
+    
     return user
 
 @app.put("/api/users/{user_id}/preferences")
@@ -383,6 +383,8 @@ def update_user_preferences(
         
     db.commit()
     db.refresh(user)
+    EquipmentService.invalidate_weights_cache(user.equipment_config)
+    RecommendationContextCache.evict_user(user_id)
     
     logger.info(f"Préférences mises à jour pour user {user_id}: poids variables = {user.prefer_weight_changes_between_sets}, sons = {user.sound_notifications_enabled}, motion = {user.motion_detection_enabled}")
     
@@ -442,7 +444,9 @@ def get_progression_analysis(
     
     # Utiliser le moteur ML pour détecter les patterns
     ml_engine = FitnessRecommendationEngine(db)
-    patterns = ml_engine._detect_progression_patterns(user_id, exercise_id)
+    patterns = ml_engine._detect_progression_patterns(user_id, exercise_id, perf_state)
+    db.commit()  # reconstruction du pattern éventuellement planifiée
+    notify_jobs()
     
     # Générer des suggestions
     suggestions = []
@@ -493,11 +497,16 @@ def delete_user(user_id: int, db: Session = Depends(get_db)):
     db.query(SwapLog).filter(SwapLog.user_id == user_id).delete(synchronize_session=False)
 
     # Les workouts ont cascade configuré, donc seront supprimés automatiquement
+    muscle_volume.delete_user_rows(db, user_id)
+    personal_records.delete_user_rows(db, user_id)
+    fitness_fatigue.delete_user_rows(db, user_id)
     db.query(ExerciseCompletionStats).filter(ExerciseCompletionStats.user_id == user_id).delete(synchronize_session=False)
     db.query(UserAdaptationCoefficients).filter(UserAdaptationCoefficients.user_id == user_id).delete(synchronize_session=False)
     db.query(PerformanceStates).filter(PerformanceStates.user_id == user_id).delete(synchronize_session=False)
+    equipment_config = user.equipment_config
     db.delete(user)
     db.commit()
+    EquipmentService.invalidate_weights_cache(equipment_config)
     return {"message": "Profil supprimé avec succès"}
 
 @app.delete("/api/workouts/{workout_id}")
@@ -507,12 +516,14 @@ def delete_workout(workout_id: int, db: Session = Depends(get_db)):
     if not workout:
         raise HTTPException(status_code=404, detail="Workout not found")
     
-    # Supprimer toutes les séries associées d'abord
+    # Retirer les séries du cumul de volume, puis les supprimer
+    muscle_volume.remove_workouts(db, [workout_id])
     db.query(WorkoutSet).filter(WorkoutSet.workout_id == workout_id).delete()
     
     # Puis supprimer la séance
     db.delete(workout)
     db.commit()
+    RecommendationContextCache.evict(workout_id)
     
     return {"message": "Workout deleted successfully"}
 
@@ -584,6 +595,7 @@ def clear_user_history(user_id: int, db: Session = Depends(get_db)):
     workout_ids = [w.id for w in workout_ids]
     
     if workout_ids:
+        muscle_volume.delete_user_rows(db, user_id)
         db.query(WorkoutSet).filter(WorkoutSet.workout_id.in_(workout_ids)).delete(synchronize_session=False)
         db.query(Workout).filter(Workout.user_id == user_id).delete(synchronize_session=False)
     
@@ -599,14 +611,20 @@ def get_exercises(
     db: Session = Depends(get_db)
 ):
     """Récupérer les exercices disponibles, filtrés par équipement utilisateur"""
-    query = db.query(Exercise)
-        
+    catalog = get_catalog(db)
+    
     if muscle_group:
-        query = query.filter(
-            cast(Exercise.muscle_groups, JSONB).contains([muscle_group])
-        )
+        exercises_mask = catalog.muscle_group_mask(muscle_group)
+    else:
+        exercises_mask = catalog.full_mask
+    
+    # Filtrer par équipement disponible si user_id fourni (ET binaire sur le catalogue)
+    if user_id:
+        user = db.query(User).filter(User.id == user_id).first()
+        if user and user.equipment_config:
+            exercises_mask &= catalog.feasibility_mask(user.equipment_config)
     
-    exercises = query.all()
+    exercises = catalog.from_mask(exercises_mask)
     
     # AJOUT TEMPORAIRE - Log pour debug
     if exercises:
@@ -615,13 +633,6 @@ def get_exercises(
         logger.info(f"weight_type: {getattr(first_exercise, 'weight_type', 'NON DÉFINI')}")
         logger.info(f"bodyweight_percentage: {getattr(first_exercise, 'bodyweight_percentage', 'NON DÉFINI')}")
     
-    # Filtrer par équipement disponible si user_id fourni
-    if user_id:
-        user = db.query(User).filter(User.id == user_id).first()
-        if user and user.equipment_config:
-            available_equipment = get_available_equipment(user.equipment_config)
-            exercises = [ex for ex in exercises if can_perform_exercise(ex, available_equipment)]
-    
     return exercises
 
 @app.get("/api/exercises/{exercise_id}", response_model=ExerciseResponse)
@@ -634,30 +645,6 @@ def get_exercise(exercise_id: int, db: Session = Depends(get_db)):
     # Retourne l'objet directement, FastAPI utilisera ExerciseResponse pour la sérialisation
     return exercise
 
-def get_available_equipment(equipment_config: Dict[str, Any]) -> List[str]:
-    """Utiliser EquipmentService pour cohérence"""
-    available_types = EquipmentService.get_available_equipment_types(equipment_config)
-    return list(available_types)
-
-def can_perform_exercise(exercise: Exercise, available_equipment: List[str]) -> bool:
-    """Vérifier si un exercice peut être effectué avec l'équipement disponible"""
-    if not exercise.equipment_required:
-        return True
-    
-    # Convertir la liste en set pour performance
-    available_set = set(available_equipment)
-    
-    # Vérifier qu'au moins un équipement requis est disponible
-    for eq in exercise.equipment_required:
-        if eq in available_set:
-            return True
-            
-        # Mapping spécial banc
-        if eq.startswith('bench_') and 'bench_flat' in available_set:
-            return True
-    
-    return False
-
 # ===== ENDPOINTS PROG/SESSIONS =====
 def calculate_session_quality_score(exercise_pool, user_id, db):
     """Calcule le score de qualité d'une session côté serveur"""
@@ -941,16 +928,8 @@ def get_resumable_workout(user_id: int, db: Session = Depends(get_db)):
     # Aucune séance reprenables trouvée
     return None
 
-@app.post("/api/workouts/{workout_id}/sets")
-def add_set(workout_id: int, set_data: SetCreate, db: Session = Depends(get_db)):
-    """Ajouter une série à la séance avec enregistrement ML"""
-    workout = db.query(Workout).filter(Workout.id == workout_id).first()
-    if not workout:
-        raise HTTPException(status_code=404, detail="Séance non trouvée")
-    
-    ml_engine = FitnessRecommendationEngine(db)
-    
-    db_set = WorkoutSet(
+def _build_workout_set(workout_id: int, set_data: SetCreate) -> WorkoutSet:
+    return WorkoutSet(
         workout_id=workout_id,
         exercise_id=set_data.exercise_id,
         set_number=set_data.set_number,
@@ -972,33 +951,25 @@ def add_set(workout_id: int, set_data: SetCreate, db: Session = Depends(get_db))
         ml_adjustment_enabled=set_data.ml_adjustment_enabled,
         voice_data=set_data.voice_data.dict() if set_data.voice_data else None
     )
-    
-    db.add(db_set)
-    db.commit()
-    db.refresh(db_set)
-    
-    # Enregistrer pour l'apprentissage ML
-    if set_data.fatigue_level and set_data.effort_level:
-        performance_data = {
-            "weight": set_data.weight or 0,
-            "actual_reps": set_data.reps,
-            "target_reps": set_data.target_reps or set_data.reps,
-            "fatigue_level": set_data.fatigue_level,
-            "effort_level": set_data.effort_level,
-            "exercise_order": set_data.exercise_order_in_session or 1,
-            "set_order_global": set_data.set_order_in_session or 1,
-            "set_number": set_data.set_number,
-            "rest_before_seconds": set_data.base_rest_time_seconds,
-            "session_fatigue_start": workout.overall_fatigue_start
-        }
-        
-        ml_engine.record_set_performance(
-            workout.user_id, 
-            set_data.exercise_id, 
-            performance_data
-        )
-    
-    # Retourner l'objet avec tous les champs sérialisés
+
+def _set_performance_data(set_data: SetCreate, workout: Workout) -> Optional[Dict[str, Any]]:
+    """Données d'apprentissage ML d'une série (None sans fatigue/effort)"""
+    if not (set_data.fatigue_level and set_data.effort_level):
+        return None
+    return {
+        "weight": set_data.weight or 0,
+        "actual_reps": set_data.reps,
+        "target_reps": set_data.target_reps or set_data.reps,
+        "fatigue_level": set_data.fatigue_level,
+        "effort_level": set_data.effort_level,
+        "exercise_order": set_data.exercise_order_in_session or 1,
+        "set_order_global": set_data.set_order_in_session or 1,
+        "set_number": set_data.set_number,
+        "rest_before_seconds": set_data.base_rest_time_seconds,
+        "session_fatigue_start": workout.overall_fatigue_start
+    }
+
+def _serialize_set(db_set: WorkoutSet) -> Dict[str, Any]:
     return {
         "id": db_set.id,
         "workout_id": db_set.workout_id,
@@ -1014,6 +985,102 @@ def add_set(workout_id: int, set_data: SetCreate, db: Session = Depends(get_db))
         "completed_at": db_set.completed_at.isoformat() if db_set.completed_at else None
     }
 
+def _new_records(history_record: Optional[SetHistory]) -> List[str]:
+    """Records personnels battus par la série (cf. backend.personal_records)"""
+    return list(history_record.new_records) if history_record is not None else []
+
+def _context_snapshots(db_set: WorkoutSet, history_record: Optional[SetHistory]):
+    """Copies pour le contexte de recommandation, à prendre après flush et avant commit"""
+    return SetSnapshot(db_set), HistorySnapshot(history_record) if history_record is not None else None
+
+def _log_sets(db: Session, workout: Workout, sets_data: List[SetCreate], ml_engine: FitnessRecommendationEngine):
+    """
+    Ajoute des séries (dans l'ordre) et leur apprentissage ML (SetHistory, état de performance,
+    coefficients) à la transaction courante, sans la valider. Si l'apprentissage échoue, la
+    transaction est annulée et seules les séries sont rajoutées : une série n'est jamais perdue.
+    Retourne (WorkoutSets, SetHistory ou None pour chaque série).
+    """
+    db_sets = [_build_workout_set(workout.id, set_data) for set_data in sets_data]
+    db.add_all(db_sets)
+    
+    history_records = [None] * len(db_sets)
+    entries, indices = [], []
+    for index, set_data in enumerate(sets_data):
+        performance_data = _set_performance_data(set_data, workout)
+        if performance_data:
+            entries.append((set_data.exercise_id, performance_data))
+            indices.append(index)
+    
+    if entries:
+        try:
+            records = ml_engine.record_sets_performance(workout.user_id, entries, user=workout.user)
+            for index, record in zip(indices, records):
+                history_records[index] = record
+        except Exception as e:
+            logger.error(f"Erreur enregistrement performance: {e}")
+            db.rollback()
+            db.add_all(db_sets)
+            history_records = [None] * len(db_sets)
+    
+    # Le cumul ne compte que les séances terminées (séries ajoutées après coup)
+    if workout.status == "completed":
+        muscle_volume.apply_sets(db, workout.user, workout, db_sets, estimate_weight=ml_engine._estimate_initial_weight)
+    return db_sets, history_records
+
+@app.post("/api/workouts/{workout_id}/sets")
+def add_set(workout_id: int, set_data: SetCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """Ajouter une série à la séance avec enregistrement ML (une seule transaction)"""
+    workout = db.query(Workout).filter(Workout.id == workout_id).first()
+    if not workout:
+        raise HTTPException(status_code=404, detail="Séance non trouvée")
+    
+    ml_engine = FitnessRecommendationEngine(db)
+    (db_set,), (history_record,) = _log_sets(db, workout, [set_data], ml_engine)
+    
+    # Sérialiser et copier avant le commit (évite le rechargement des attributs expirés)
+    db.flush()
+    response = _serialize_set(db_set)
+    response["new_records"] = _new_records(history_record)
+    set_snapshot, history_snapshot = _context_snapshots(db_set, history_record)
+    db.commit()
+    
+    RecommendationContextCache.record_set(workout_id, set_snapshot, history_snapshot)
+    _schedule_speculation(background_tasks, workout_id, _next_set_requests(set_data))
+    
+    # Retourner l'objet avec tous les champs sérialisés
+    return response
+
+@app.post("/api/workouts/{workout_id}/sets/batch")
+def add_sets_batch(workout_id: int, batch: SetBatchCreate, db: Session = Depends(get_db)):
+    """
+    Ajoute une suite ordonnée de séries (séance saisie hors ligne) en une transaction :
+    insertion groupée des séries et de l'historique ML, état de performance et
+    coefficients mis à jour une fois par exercice, dans l'ordre des séries.
+    """
+    workout = db.query(Workout).filter(Workout.id == workout_id).first()
+    if not workout:
+        raise HTTPException(status_code=404, detail="Séance non trouvée")
+    if not batch.sets:
+        raise HTTPException(status_code=400, detail="Aucune série à enregistrer")
+    
+    ml_engine = FitnessRecommendationEngine(db)
+    db_sets, history_records = _log_sets(db, workout, batch.sets, ml_engine)
+    
+    db.flush()
+    response = {
+        "workout_id": workout_id,
+        "set_ids": [db_set.id for db_set in db_sets],
+        "sets": [_serialize_set(db_set) for db_set in db_sets],
+        "ml_recorded": sum(1 for record in history_records if record is not None),
+        "new_records": [_new_records(record) for record in history_records]
+    }
+    db.commit()
+    
+    # Contexte de recommandation rechargé à la prochaine demande (une lecture au lieu de N mises à jour)
+    RecommendationContextCache.evict(workout_id)
+    
+    return response
+
 @app.get("/api/workouts/{workout_id}/sets")
 def get_workout_sets(workout_id: int, db: Session = Depends(get_db)):
     """Récupérer toutes les séries d'une séance"""
@@ -1042,58 +1109,150 @@ def get_set_recommendations(
     db: Session = Depends(get_db)
 ):
     """Obtenir des recommandations ML pour la prochaine série avec historique séance"""
-    workout = db.query(Workout).filter(Workout.id == workout_id).first()
-    if not workout:
-        raise HTTPException(status_code=404, detail="Séance non trouvée")
-    
-    user = workout.user
-    exercise = db.query(Exercise).filter(Exercise.id == request["exercise_id"]).first()
+    return _compute_set_recommendations(db, workout_id, request)
+
+def _recommendation_params(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Paramètres d'une demande de recommandation utilisés par le moteur ML"""
+    return {
+        "exercise_id": request["exercise_id"],
+        "set_number": request.get("set_number", 1),
+        "current_fatigue": request.get("current_fatigue", 3),
+        # Le client envoie l'effort de la série précédente sous le nom previous_effort
+        "current_effort": request.get("current_effort", request.get("previous_effort", 3)),
+        "last_rest_duration": request.get("last_rest_duration", None),
+        "exercise_order": request.get("exercise_order", 1),
+        "set_order_global": request.get("set_order_global", 1)
+    }
+
+def _context_available_weights(db: Session, context, user: User, exercise):
+    available_weights = context.available_weights.get(exercise.id)
+    if available_weights is None:
+        available_weights = EquipmentService.get_available_weights(db, user.id, exercise)
+        context.available_weights[exercise.id] = available_weights
+    return available_weights
+
+def _last_set_voice_data(context, exercise_id: int, set_number: int) -> Optional[Dict[str, Any]]:
+    """Données vocales de la série précédente du même exercice"""
+    if set_number > 1:
+        last_set = context.find_set(exercise_id, set_number - 1)
+        if last_set and last_set.voice_data:
+            logger.info(f"[ML] Données vocales trouvées pour série précédente: tempo={last_set.voice_data.get('tempo_avg')}ms")
+            return last_set.voice_data
+    return None
+
+def _engine_recommendations(db: Session, context, user: User, exercise, params: Dict[str, Any], available_weights=None) -> Dict[str, Any]:
+    """Appel au moteur ML (sans effet de bord) pour des paramètres normalisés"""
+    if available_weights is None:
+        available_weights = _context_available_weights(db, context, user, exercise)
+    ml_engine = FitnessRecommendationEngine(db, context=context)
+    return ml_engine.get_set_recommendations(
+        user=user,
+        exercise=exercise,
+        set_number=params["set_number"],
+        current_fatigue=params["current_fatigue"],
+        current_effort=params["current_effort"],
+        last_rest_duration=params["last_rest_duration"],
+        exercise_order=params["exercise_order"],
+        set_order_global=params["set_order_global"],
+        available_weights=available_weights,
+        workout_id=context.workout_id,
+        last_set_voice_data=_last_set_voice_data(context, exercise.id, params["set_number"])
+    )
+
+def _next_set_requests(set_data: SetCreate, last_rest_duration: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Demandes de recommandation probables après une série, avec les paramètres que le
+    client enverra : série suivante du même exercice (effort de la série enregistrée),
+    puis série 1 de l'exercice prévu ensuite si indiqué (effort par défaut). La fatigue
+    est la fatigue de séance si le client la transmet, sinon celle de la série.
+    """
+    exercise_order = set_data.exercise_order_in_session or 1
+    set_order_global = (set_data.set_order_in_session or 1) + 1
+    common = {
+        "current_fatigue": set_data.session_fatigue or set_data.fatigue_level or 3,
+        "last_rest_duration": last_rest_duration,
+        "set_order_global": set_order_global
+    }
+    requests = [dict(common, exercise_id=set_data.exercise_id, set_number=set_data.set_number + 1,
+                     current_effort=set_data.effort_level or 3, exercise_order=exercise_order)]
+    if set_data.next_exercise_id and set_data.next_exercise_id != set_data.exercise_id:
+        requests.append(dict(common, exercise_id=set_data.next_exercise_id, set_number=1,
+                             current_effort=3, exercise_order=exercise_order + 1))
+    return requests
+
+def _schedule_speculation(background_tasks: BackgroundTasks, workout_id: int, requests: List[Dict[str, Any]]):
+    """Précalcul en tâche de fond, seulement pour une séance dont le contexte est en cache"""
+    context = RecommendationContextCache.peek(workout_id)
+    if context is None or not requests:
+        return
+    version = context.set_speculation_requests(requests)
+    background_tasks.add_task(_precompute_recommendations, workout_id, version)
+
+def _precompute_recommendations(workout_id: int, version: int):
+    """Tâche de fond : calcule les recommandations probables avec sa propre session"""
+    context = RecommendationContextCache.peek(workout_id)
+    if context is None or context.version != version:
+        return
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == context.user_id).first()
+        catalog = get_catalog(db)
+        for params in context.speculation_requests:
+            if context.version != version:
+                return  # Nouvelle série ou repos saisi entre-temps
+            exercise = catalog.get(params["exercise_id"])
+            if user is None or exercise is None:
+                continue
+            result = _engine_recommendations(db, context, user, exercise, params)
+            context.store_speculative(params, result, version)
+    except Exception as e:
+        logger.warning(f"Précalcul recommandations séance {workout_id}: {e}")
+    finally:
+        db.close()
+
+def _compute_set_recommendations(
+    db: Session,
+    workout_id: int,
+    request: Dict[str, Any],
+    workout: Optional[Workout] = None,
+    user: Optional[User] = None
+) -> Dict[str, Any]:
+    """Recommandations de la prochaine série (workout / user évitent leur relecture s'ils sont déjà chargés)"""
+    # Contexte de séance en cache : séries, historique et poids déjà chargés aux séries précédentes
+    context = RecommendationContextCache.get(workout_id)
+    if context is None:
+        if workout is None:
+            workout = db.query(Workout).filter(Workout.id == workout_id).first()
+        if not workout:
+            raise HTTPException(status_code=404, detail="Séance non trouvée")
+        context = RecommendationContextCache.load(db, workout)
+    
+    if user is None:
+        user = db.query(User).filter(User.id == context.user_id).first()
+    exercise = get_catalog(db).get(request["exercise_id"])
     if not exercise:
         raise HTTPException(status_code=404, detail="Exercice non trouvé")
-    available_weights = EquipmentService.get_available_weights(db, user.id, exercise)
     
-    # Importer et utiliser le moteur ML
-    from backend.ml_recommendations import FitnessRecommendationEngine
-    ml_engine = FitnessRecommendationEngine(db)
+    available_weights = _context_available_weights(db, context, user, exercise)
     
     # Extraire toutes les données de la requête
     session_history = request.get('session_history', [])
     completed_sets_count = request.get('completed_sets_this_exercise', 0)
-    set_number = request.get("set_number", 1)
-    current_fatigue = request.get("current_fatigue", 3)
-    current_effort = request.get("current_effort", 3)  # Effort de la dernière série
-    last_rest_duration = request.get("last_rest_duration", None)
-    exercise_order = request.get("exercise_order", 1)
-    set_order_global = request.get("set_order_global", 1)
-    # Récupérer les données vocales de la dernière série
-    last_set_voice_data = None
-    if workout_id and set_number > 1:
-        last_set = db.query(WorkoutSet).filter(
-            WorkoutSet.workout_id == workout_id,
-            WorkoutSet.exercise_id == exercise.id,
-            WorkoutSet.set_number == set_number - 1
-        ).first()
-        if last_set and last_set.voice_data:
-            last_set_voice_data = last_set.voice_data
-            logger.info(f"[ML] Données vocales trouvées pour série précédente: tempo={last_set_voice_data.get('tempo_avg')}ms")
-
+    params = _recommendation_params(request)
+    set_number = params["set_number"]
+    current_fatigue = params["current_fatigue"]
+    current_effort = params["current_effort"]  # Effort de la dernière série
+    
     # Transmettre les données vocales au moteur ML
+    last_set_voice_data = _last_set_voice_data(context, exercise.id, set_number)
     if last_set_voice_data:
         request['last_set_voice_data'] = last_set_voice_data
-    # Appel au moteur ML avec les bonnes variables
-    base_recommendations = ml_engine.get_set_recommendations(
-        user=user,
-        exercise=exercise,
-        set_number=set_number,
-        current_fatigue=current_fatigue,
-        current_effort=current_effort,
-        last_rest_duration=last_rest_duration,
-        exercise_order=exercise_order,
-        set_order_global=set_order_global,
-        available_weights=available_weights,
-        workout_id=workout_id,
-        last_set_voice_data=last_set_voice_data  # AJOUT
-    )
+    
+    # Résultat précalculé après la série précédente, sinon appel au moteur ML
+    base_recommendations = context.get_speculative(params)
+    RecommendationContextCache.count_speculative(base_recommendations is not None)
+    if base_recommendations is None:
+        base_recommendations = _engine_recommendations(db, context, user, exercise, params, available_weights)
         
     if base_recommendations.get('weight_recommendation') is None or base_recommendations.get('weight_recommendation') == 0:
         logger.warning(f"Recommandation poids invalide pour exercise {exercise.id}, calcul fallback")
@@ -1149,7 +1308,7 @@ def get_set_recommendations(
                 
                 # Arrondir au poids disponible le plus proche
                 if available_weights:
-                    adjusted_weight = min(available_weights, key=lambda x: abs(x - adjusted_weight))
+                    adjusted_weight = available_weights.nearest(adjusted_weight)
                 else:
                     adjusted_weight = round(adjusted_weight * 2) / 2
                 
@@ -1239,6 +1398,67 @@ def get_set_recommendations(
     
     return base_recommendations
 
+@app.post("/api/users/{user_id}/session-recommendations")
+def get_session_recommendations(user_id: int, request: SessionRecommendationsRequest, db: Session = Depends(get_db)):
+    """
+    Poids, reps et repos de départ de chaque exercice d'une séance planifiée (liste issue de
+    /api/ai/generate-exercises par exemple), calculés en un appel avec historique,
+    états de performance, coefficients, poids disponibles et récupération partagés.
+    """
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
+    if not request.exercises:
+        raise HTTPException(status_code=400, detail="Aucun exercice planifié")
+    
+    context = None
+    if request.workout_id is not None:
+        context = RecommendationContextCache.get(request.workout_id)
+        if context is None:
+            workout = db.query(Workout).filter(Workout.id == request.workout_id).first()
+            if not workout:
+                raise HTTPException(status_code=404, detail="Séance non trouvée")
+            context = RecommendationContextCache.load(db, workout)
+        if context.user_id != user_id:
+            raise HTTPException(status_code=403, detail="Séance d'un autre utilisateur")
+    
+    ml_engine = FitnessRecommendationEngine(db, context=context)
+    recommendations = ml_engine.get_session_recommendations(
+        user,
+        [planned.dict() for planned in request.exercises],
+        current_fatigue=request.current_fatigue
+    )
+    
+    # Récupération musculaire calculée une fois pour toute la séance
+    muscle_readiness = AIExerciseGenerator(db)._get_all_muscle_readiness(user_id)
+    catalog = get_catalog(db)
+    for entry in recommendations:
+        muscles = [m for m in (catalog.get(entry['exercise_id']).muscle_groups or []) if m in muscle_readiness]
+        entry['readiness'] = min(muscle_readiness[m] for m in muscles) if muscles else None
+    
+    return {
+        "user_id": user_id,
+        "exercises": recommendations,
+        "muscle_readiness": muscle_readiness
+    }
+
+@app.post("/api/workouts/{workout_id}/plate-plan")
+def plan_workout_plates(workout_id: int, request: PlatePlanRequest, db: Session = Depends(get_db)):
+    """Choisit les poids des séries prévues pour minimiser les changements de disques sur la séance"""
+    workout = db.query(Workout).filter(Workout.id == workout_id).first()
+    if not workout:
+        raise HTTPException(status_code=404, detail="Séance non trouvée")
+    
+    user = workout.user
+    if not user.equipment_config:
+        raise HTTPException(status_code=400, detail="Configuration manquante")
+    
+    from backend.ml_recommendations import FitnessRecommendationEngine
+    ml_engine = FitnessRecommendationEngine(db)
+    return ml_engine.plan_session_plate_changes(
+        user, [planned.dict() for planned in request.sets], workout_id=workout_id
+    )
+
 @app.put("/api/users/{user_id}/voice-counting")
 def toggle_voice_counting(
     user_id: int, 
@@ -1271,17 +1491,14 @@ async def get_exercise_alternatives(
     """
     logger.info(f"🔄 Alternatives pour exercice {exercise_id}, user {user_id}")
     
-    # 1. Validation en une requête
-    base_query = db.query(Exercise, User).filter(
-        Exercise.id == exercise_id,
-        User.id == user_id
-    ).first()
+    # 1. Validation (exercice via le catalogue en mémoire)
+    catalog = get_catalog(db)
+    source_exercise = catalog.get(exercise_id)
+    user = db.query(User).filter(User.id == user_id).first()
     
-    if not base_query:
+    if not source_exercise or not user:
         raise HTTPException(status_code=404, detail="Exercise or user not found")
     
-    source_exercise, user = base_query
-    
     # 2. Récupérer exercices récents (7 derniers jours) en 1 requête
     recent_cutoff = datetime.now(timezone.utc) - timedelta(days=7)
     recent_exercise_ids = db.query(WorkoutSet.exercise_id).join(Workout).filter(
@@ -1296,18 +1513,13 @@ async def get_exercise_alternatives(
     if not primary_muscle:
         return {"alternatives": [], "keep_current": {"advice": "Exercice sans groupe musculaire défini"}}
     
-    # Query principale pour candidats
-    candidates_query = db.query(Exercise).filter(
-        Exercise.id != exercise_id,
-        cast(Exercise.muscle_groups, JSONB).contains([primary_muscle])
-    )
+    # Candidats depuis l'index par groupe musculaire
+    candidates = [ex for ex in catalog.by_muscle_group(primary_muscle) if ex.id != exercise_id]
     
     # Ajustement selon raison
     if reason == "pain":
         # Pour douleur : éviter même pattern ou chercher variations plus douces
-        candidates_query = candidates_query.filter(Exercise.difficulty.in_(['beginner', 'intermediate']))
-    
-    candidates = candidates_query.all()
+        candidates = [ex for ex in candidates if ex.difficulty in ('beginner', 'intermediate')]
     
     # 4. Scoring en mémoire (rapide)
     user_equipment = EquipmentService.get_available_equipment_types(user.equipment_config)
@@ -1537,26 +1749,19 @@ def complete_workout(workout_id: int, data: Dict[str, Any] = {}, db: Session = D
     if not workout:
         raise HTTPException(status_code=404, detail="Séance non trouvée")
     
+    if workout.status != "completed":
+        muscle_volume.apply_workout(db, workout)
     workout.status = "completed"
     workout.completed_at = datetime.now(timezone.utc)
     db.commit()  # Forcer le commit immédiatement
     db.refresh(workout)  # Rafraîchir l'objet
+    RecommendationContextCache.evict(workout_id)
 
-    # CORRECTION : Gestion robuste des erreurs lors de la mise à jour des stats
-    try:
-        exercise_ids = db.query(distinct(WorkoutSet.exercise_id)).filter(
-            WorkoutSet.workout_id == workout_id
-        ).all()
-        for (exercise_id,) in exercise_ids:
-            try:
-                update_exercise_stats_for_user(db, workout.user_id, exercise_id)
-            except Exception as stats_error:
-                logger.warning(f"Erreur mise à jour stats pour exercise {exercise_id}: {stats_error}")
-                # Continuer même si une stat échoue
-                continue
-    except Exception as global_error:
-        logger.error(f"Erreur lors de la mise à jour des stats workout {workout_id}: {global_error}")
-        # Ne pas faire crasher l'endpoint, juste logger l'erreur
+    # Traitements post-séance différés (file de tâches), la réponse n'attend pas
+    enqueue(db, "stats_refresh", {"user_id": workout.user_id, "workout_id": workout_id},
+            dedupe_key=f"stats_refresh:{workout_id}")
+    enqueue(db, "targets_recalibration", {"workout_id": workout_id},
+            dedupe_key=f"targets_recalibration:{workout_id}")
     
     # Continuer avec le reste de la logique...
     if "total_duration" in data:
@@ -1579,17 +1784,13 @@ def complete_workout(workout_id: int, data: Dict[str, Any] = {}, db: Session = D
     if skipped_exercises:
         workout.skipped_exercises = skipped_exercises
         logger.info(f"Workout {workout_id}: {len(skipped_exercises)} exercises skipped")
-        
-        # Analyse temps réel des patterns de skip  
-        try:
-            analyze_skip_patterns_realtime(workout.user_id, skipped_exercises, db)
-        except Exception as e:
-            logger.warning(f"Skip pattern analysis failed: {e}")
+        enqueue(db, "skip_patterns", {"workout_id": workout_id}, dedupe_key=f"skip_patterns:{workout_id}")
 
     if session_metadata:
         workout.session_metadata = session_metadata
 
     db.commit()
+    notify_jobs()
     return {"message": "Séance terminée", "workout": workout}
 
 @app.delete("/api/workouts/{workout_id}/abandon")
@@ -1604,21 +1805,76 @@ def abandon_workout_smart(workout_id: int, db: Session = Depends(get_db)):
         WorkoutSet.workout_id == workout_id
     ).scalar() or 0
     
+    RecommendationContextCache.evict(workout_id)
+    
     if total_reps == 0:
         # Supprimer complètement la séance vide
+        muscle_volume.remove_workouts(db, [workout_id])
         db.query(WorkoutSet).filter(WorkoutSet.workout_id == workout_id).delete(synchronize_session=False)
         db.query(Workout).filter(Workout.id == workout_id).delete(synchronize_session=False)
         db.commit()
         return {"action": "deleted", "reason": "empty_session", "total_reps": 0}
     else:
-        # Marquer comme abandonnée pour recovery future
+        # Marquer comme abandonnée pour recovery future (hors cumul des séances terminées)
+        muscle_volume.remove_workouts(db, [workout_id])
         workout.status = "abandoned"
         workout.completed_at = datetime.now(timezone.utc)
         db.commit()
         return {"action": "abandoned", "reason": "has_content", "total_reps": total_reps}
 
+@app.post("/api/workouts/{workout_id}/sets/log-and-recommend")
+def log_set_and_recommend(workout_id: int, payload: SetLogAndRecommendRequest, db: Session = Depends(get_db)):
+    """
+    Série en direct en un seul aller-retour : enregistre la série, met à jour le repos réel
+    de la série précédente (optionnel) dans la même transaction, puis renvoie la
+    recommandation de la série suivante calculée sur le même contexte chargé.
+    """
+    workout = db.query(Workout).filter(Workout.id == workout_id).first()
+    if not workout:
+        raise HTTPException(status_code=404, detail="Séance non trouvée")
+    
+    previous_set = None
+    if payload.previous_set_id is not None and payload.previous_rest_duration_seconds is not None:
+        previous_set = db.query(WorkoutSet).filter(
+            WorkoutSet.id == payload.previous_set_id,
+            WorkoutSet.workout_id == workout_id
+        ).first()
+        if not previous_set:
+            raise HTTPException(status_code=404, detail="Série précédente non trouvée")
+    
+    ml_engine = FitnessRecommendationEngine(db)
+    user = workout.user
+    (db_set,), (history_record,) = _log_sets(db, workout, [payload.set_data], ml_engine)
+    # Après _log_sets (dont le repli peut annuler la transaction)
+    if previous_set is not None:
+        previous_set.actual_rest_duration_seconds = payload.previous_rest_duration_seconds
+    
+    db.flush()
+    response = {"set": _serialize_set(db_set), "new_records": _new_records(history_record), "recommendation": None}
+    set_snapshot, history_snapshot = _context_snapshots(db_set, history_record)
+    db.commit()
+    
+    if previous_set is not None:
+        RecommendationContextCache.update_rest(workout_id, payload.previous_set_id, payload.previous_rest_duration_seconds)
+    RecommendationContextCache.record_set(workout_id, set_snapshot, history_snapshot)
+    
+    if payload.next_recommendation:
+        request = dict(payload.next_recommendation)
+        if payload.previous_rest_duration_seconds is not None:
+            request.setdefault("last_rest_duration", payload.previous_rest_duration_seconds)
+        # La série est déjà enregistrée : une erreur de recommandation ne doit pas la faire rejouer
+        try:
+            response["recommendation"] = _compute_set_recommendations(db, workout_id, request, workout=workout, user=user)
+        except HTTPException as e:
+            response["recommendation_error"] = e.detail
+        except Exception as e:
+            logger.error(f"Erreur recommandation après enregistrement série {db_set.id}: {e}")
+            response["recommendation_error"] = "Erreur calcul recommandation"
+    
+    return response
+
 @app.put("/api/sets/{set_id}/rest-duration")
-def update_set_rest_duration(set_id: int, data: Dict[str, int], db: Session = Depends(get_db)):
+def update_set_rest_duration(set_id: int, data: Dict[str, int], background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     """Mettre à jour la durée de repos réelle d'une série"""
     workout_set = db.query(WorkoutSet).filter(WorkoutSet.id == set_id).first()
     if not workout_set:
@@ -1626,6 +1882,18 @@ def update_set_rest_duration(set_id: int, data: Dict[str, int], db: Session = De
     
     workout_set.actual_rest_duration_seconds = data.get("actual_rest_duration_seconds")
     db.commit()
+    RecommendationContextCache.update_rest(
+        workout_set.workout_id, workout_set.id, workout_set.actual_rest_duration_seconds
+    )
+    
+    # Le repos réel sera transmis avec la prochaine demande : précalcul avec cette valeur
+    context = RecommendationContextCache.peek(workout_set.workout_id)
+    if context is not None and context.speculation_requests:
+        requests = [
+            dict(request, last_rest_duration=workout_set.actual_rest_duration_seconds)
+            for request in context.speculation_requests
+        ]
+        _schedule_speculation(background_tasks, workout_set.workout_id, requests)
     return {"message": "Durée de repos mise à jour"}
 
 # ===== ENDPOINTS STATISTIQUES =====
@@ -1742,32 +2010,32 @@ def get_progress_data(user_id: int, days: int = 30, db: Session = Depends(get_db
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
     
     ml_engine = FitnessRecommendationEngine(db)
+    catalog = get_catalog(db)
     
-    # Volume par jour - récupérer les données brutes
-    workout_sets = db.query(
+    # Volume par jour - colonnes brutes, volumes calculés en une passe
+    rows = db.query(
         func.date(Workout.completed_at).label('date'),
-        WorkoutSet,
-        Exercise
+        WorkoutSet.weight,
+        WorkoutSet.reps,
+        WorkoutSet.exercise_id
     ).join(
         WorkoutSet, Workout.id == WorkoutSet.workout_id
-    ).join(
-        Exercise, WorkoutSet.exercise_id == Exercise.id
     ).filter(
         Workout.user_id == user_id,
         Workout.completed_at >= cutoff_date
     ).all()
+    rows = [row for row in rows if catalog.get(row.exercise_id) is not None]
     
-    # Calculer le volume par date
-    volume_by_date = defaultdict(float)
-    for date, workout_set, exercise in workout_sets:
-        volume = ml_engine.calculate_exercise_volume(
-            workout_set.weight, workout_set.reps, exercise, user
-        )
-        volume_by_date[date] += volume
+    volumes = compute_volumes(
+        [row.weight for row in rows], [row.reps for row in rows], None,
+        [catalog.get(row.exercise_id) for row in rows], user,
+        estimate_weight=ml_engine._estimate_initial_weight
+    )
+    dates, totals = timeseries.group_sum([str(row.date) for row in rows], volumes)
     
     daily_volume = [
-        {"date": str(date), "volume": float(volume)} 
-        for date, volume in sorted(volume_by_date.items())
+        {"date": date, "volume": round(float(volume), 1)}
+        for date, volume in zip(dates.tolist(), totals)
     ]
     
     # Progression par exercice (records) - gérer les bodyweight
@@ -1948,46 +2216,29 @@ def calculate_trend(values):
 
 @app.get("/api/users/{user_id}/stats/personal-records")
 def get_personal_records(user_id: int, db: Session = Depends(get_db)):
-    """Graphique 4: Records personnels avec contexte"""
-    # Sous-requête pour trouver le max weight par exercice
-    subquery = db.query(
-        SetHistory.exercise_id,
-        func.max(SetHistory.weight).label('max_weight')
-    ).filter(
-        SetHistory.user_id == user_id
-    ).group_by(SetHistory.exercise_id).subquery()
-    
-    # Jointure pour obtenir les détails complets
-    records = db.query(
-        SetHistory,
-        Exercise.name,
-        Exercise.muscle_groups,
-        Exercise.muscles
-    ).join(
-        Exercise, SetHistory.exercise_id == Exercise.id
-    ).join(
-        subquery,
-        and_(
-            SetHistory.exercise_id == subquery.c.exercise_id,
-            SetHistory.weight == subquery.c.max_weight
-        )
-    ).filter(
-        SetHistory.user_id == user_id
-    ).all()
+    """Graphique 4: Records personnels avec contexte (table personal_records, une ligne par exercice)"""
+    catalog = get_catalog(db)
+    now = datetime.now(timezone.utc)
     
     result = []
-    for record, ex_name, muscle_groups, muscles in records:
+    for record in personal_records.records_for_user(db, user_id):
+        exercise = catalog.get(record.exercise_id)
+        if not exercise:
+            continue
         result.append({
-            "exercise": ex_name,
+            "exercise": exercise.name,
             "exerciseId": record.exercise_id,
-            "muscleGroups": muscle_groups,
-            "muscles": muscles if muscles else [],
-            "weight": record.weight,
-            "reps": record.actual_reps,
-            "date": record.date_performed.isoformat(),
-            "fatigue": record.fatigue_level,
-            "effort": record.effort_level,
-            "daysAgo": int(safe_timedelta_hours(datetime.now(timezone.utc), record.date_performed) / 24)
+            "muscleGroups": exercise.muscle_groups,
+            "muscles": exercise.muscles if exercise.muscles else [],
+            "weight": record.max_weight,
+            "reps": record.max_weight_reps,
+            "date": record.max_weight_at.isoformat(),
+            "fatigue": record.max_weight_fatigue,
+            "effort": record.max_weight_effort,
+            "daysAgo": int(safe_timedelta_hours(now, record.max_weight_at) / 24),
+            "best1RM": round(record.best_1rm, 1) if record.best_1rm is not None else None,
+            "maxHoldSeconds": record.max_hold_seconds,
+            "repsByWeight": {band: best["reps"] for band, best in (record.reps_by_weight or {}).items()}
         })
     
     return sorted(result, key=lambda x: x["weight"], reverse=True)
@@ -2003,18 +2254,14 @@ def get_attendance_calendar(user_id: int, months: int = 6, db: Session = Depends
     workouts_with_sets = db.query(
         Workout.id,
         Workout.started_at,
-        Workout.total_duration_minutes,
-        func.count(WorkoutSet.id).label('total_sets'),
-        func.sum(WorkoutSet.weight * WorkoutSet.reps).label('total_volume_simple')
-    ).outerjoin(
-        WorkoutSet, Workout.id == WorkoutSet.workout_id
+        Workout.total_duration_minutes
     ).filter(
         Workout.user_id == user_id,
         Workout.started_at >= cutoff_date,
         Workout.status == 'completed'  # Seulement les séances terminées
-    ).group_by(
-        Workout.id, Workout.started_at, Workout.total_duration_minutes
     ).all()
+    # Volume (poids × reps) par jour depuis le cumul de volume musculaire
+    daily_volume = muscle_volume.daily_totals(db, user_id, cutoff_date.date())
     
     # Récupérer l'engagement utilisateur
     commitment = db.query(UserCommitment).filter(
@@ -2027,36 +2274,36 @@ def get_attendance_calendar(user_id: int, months: int = 6, db: Session = Depends
     calendar_data = defaultdict(lambda: {"workouts": 0, "volume": 0, "duration": 0})
     
     for workout_data in workouts_with_sets:
-        date_key = workout_data.started_at.date().isoformat()
+        workout_day = workout_data.started_at.date()
+        date_key = workout_day.isoformat()
+        if calendar_data[date_key]["workouts"] == 0 and workout_day in daily_volume:
+            calendar_data[date_key]["volume"] = daily_volume[workout_day]["volume"]
         calendar_data[date_key]["workouts"] += 1
         
         if workout_data.total_duration_minutes:
             calendar_data[date_key]["duration"] += workout_data.total_duration_minutes
-        
-        # Volume simplifié (poids × reps) au lieu du calcul ML complexe
-        if workout_data.total_volume_simple:
-            calendar_data[date_key]["volume"] += float(workout_data.total_volume_simple)
     
-    # Identifier les semaines avec séances manquées - INCHANGÉ
+    # Identifier les semaines avec séances manquées : jours actifs par semaine ISO en une passe
+    weeks, active_days = timeseries.group_by_week(list(calendar_data.keys()))
+    active_days_by_week = dict(zip(weeks.tolist(), active_days.tolist()))
+    
     weeks_analysis = []
     current_date = datetime.now(timezone.utc).date()
+    # Ne pas compter les semaines avant la création du profil
+    user = db.query(User).filter(User.id == user_id).first()
+    profile_start = user.created_at.date() if user and user.created_at else None
     
     for week_offset in range(months * 4):
         week_start = current_date - timedelta(days=current_date.weekday() + week_offset * 7)
         week_end = week_start + timedelta(days=6)
         
-        # Ne pas compter les semaines avant la création du profil
-        user = db.query(User).filter(User.id == user_id).first()
-        if user and week_end < user.created_at.date():
+        if profile_start and week_end < profile_start:
             continue
         
         if week_start < cutoff_date.date():
             break
         
-        week_workouts = sum(
-            1 for date, data in calendar_data.items()
-            if week_start <= datetime.fromisoformat(date).date() <= week_end
-        )
+        week_workouts = int(active_days_by_week.get(week_start, 0))
         
         weeks_analysis.append({
             "weekStart": week_start.isoformat(),
@@ -2131,16 +2378,16 @@ def adapt_session_exercises(exercises: list, user_id: int, session_date: date, d
         if ex_id in recent_exercise_ids:
             # UTILISER votre endpoint d'alternatives existant
             try:
-                # Récupérer alternatives via la base de données (pas d'API call interne)
-                source_exercise = db.query(Exercise).filter(Exercise.id == ex_id).first()
+                # Récupérer alternatives via le catalogue (pas d'API call interne)
+                catalog = get_catalog(db)
+                source_exercise = catalog.get(ex_id)
                 if source_exercise and source_exercise.muscle_groups:
                     main_muscle = source_exercise.muscle_groups[0]
                     
                     # Chercher alternatives même muscle, non récentes
-                    alternatives = db.query(Exercise).filter(
-                        Exercise.id != ex_id,
-                        cast(Exercise.muscle_groups, JSONB).contains([main_muscle])
-                    ).limit(5).all()
+                    alternatives = [
+                        alt for alt in catalog.by_muscle_group(main_muscle) if alt.id != ex_id
+                    ][:5]
                     
                     # Prendre la première alternative non récente
                     for alt in alternatives:
@@ -2150,7 +2397,7 @@ def adapt_session_exercises(exercises: list, user_id: int, session_date: date, d
                             adapted_ex.update({
                                 "exercise_id": alt.id,
                                 "exercise_name": alt.name,
-                                "muscle_groups": alt.muscle_groups,
+                                "muscle_groups": list(alt.muscle_groups),
                                 "adaptation_reason": "Éviter répétition récente"
                             })
                             adapted_exercises.append(adapted_ex)
@@ -2252,28 +2499,21 @@ def get_volume_summary(user_id: int, period: str, db: Session = Depends(get_db))
     days = {"week": 7, "month": 30, "quarter": 90, "year": 365}.get(period, 7)
     start_date = datetime.now() - timedelta(days=days)
     
-    # Volume réel des workouts
-    workouts = db.query(Workout).filter(
-        Workout.user_id == user_id,
-        Workout.created_at >= start_date,
-        Workout.status == 'completed'
-    ).all()
-    
-    daily_volumes = defaultdict(int)
-    for workout in workouts:
-        date = workout.created_at.date()
-        daily_volumes[date] += len(workout.sets)
+    # Séries par jour depuis le cumul (parts de séries des groupes sommées)
+    daily_volumes = {
+        day: int(round(totals["sets"]))
+        for day, totals in muscle_volume.daily_totals(db, user_id, start_date.date()).items()
+    }
     
     # Format réponse
-    cumulative = 0
-    daily_data = []
-    for date in sorted(daily_volumes.keys()):
-        cumulative += daily_volumes[date]
-        daily_data.append({
-            "date": date.isoformat(),
-            "volume": daily_volumes[date],
-            "cumulative": cumulative
-        })
+    dates = sorted(daily_volumes.keys())
+    volumes = [daily_volumes[day] for day in dates]
+    cumulative_volumes = timeseries.cumulative(volumes).astype(int).tolist()
+    cumulative = cumulative_volumes[-1] if cumulative_volumes else 0
+    daily_data = [
+        {"date": day.isoformat(), "volume": volume, "cumulative": running}
+        for day, volume, running in zip(dates, volumes, cumulative_volumes)
+    ]
     
     return {
         "dailyVolumes": daily_data,
@@ -2286,46 +2526,14 @@ def get_muscle_sunburst(user_id: int, days: int = 30, db: Session = Depends(get_
     """Graphique 9: Sunburst double couronne muscle_groups/muscles"""
     cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
     
-    # Récupérer tous les sets avec exercices
-    sets = db.query(
-        WorkoutSet,
-        Exercise.muscle_groups,
-        Exercise.muscles
-    ).join(
-        Exercise, WorkoutSet.exercise_id == Exercise.id
-    ).join(
-        Workout, WorkoutSet.workout_id == Workout.id
-    ).filter(
-        Workout.user_id == user_id,
-        Workout.started_at >= cutoff_date
-    ).all()
-    
-    # Organiser les données hiérarchiquement
-    muscle_data = defaultdict(lambda: {"volume": 0, "muscles": defaultdict(float)})
-    
-    for workout_set, muscle_groups, muscles in sets:
-            volume = (workout_set.weight or 0) * workout_set.reps
-            
-            # Distribuer le volume entre les groupes musculaires
-            if muscle_groups:
-                volume_per_group = volume / len(muscle_groups)
-                
-                for group in muscle_groups:
-                    muscle_data[group]["volume"] += volume_per_group
-                    
-                    # Si des muscles spécifiques sont définis dans l'exercice
-                    if muscles and len(muscles) > 0:
-                        # Distribuer le volume aux muscles spécifiques de l'exercice
-                        volume_per_muscle = volume_per_group / len(muscles)
-                        for muscle in muscles:
-                            muscle_data[group]["muscles"][muscle] += volume_per_muscle
-                    else:
-                        # Si pas de muscles spécifiques, utiliser ceux par défaut du groupe
-                        default_muscles = get_muscles_for_group(group)
-                        if default_muscles:
-                            volume_per_muscle = volume_per_group / len(default_muscles)
-                            for muscle in default_muscles:
-                                muscle_data[group]["muscles"][muscle] += volume_per_muscle
+    # Volumes par groupe et par muscle depuis le cumul (répartition faite à l'enregistrement)
+    start_day = cutoff_date.date()
+    group_volumes = muscle_volume.volume_by_group(db, user_id, start_day)
+    muscle_volumes = muscle_volume.muscle_totals(db, user_id, start_day)
+    muscle_data = {
+        group: {"volume": volume, "muscles": muscle_volumes.get(group, {})}
+        for group, volume in group_volumes.items()
+    }
     
     # Formatter pour le sunburst
     children = []
@@ -2438,23 +2646,10 @@ def get_muscle_volume_chart(
         end_date = datetime.now(timezone.utc)
         start_date = end_date - timedelta(days=days)
         
-        # Récupérer séries avec volume - requête corrigée
-        sets_data = db.query(
-            func.date(Workout.started_at).label('workout_date'),
-            WorkoutSet.weight,
-            WorkoutSet.reps,
-            Exercise.muscle_groups
-        ).select_from(WorkoutSet).join(
-            Exercise, WorkoutSet.exercise_id == Exercise.id
-        ).join(
-            Workout, WorkoutSet.workout_id == Workout.id
-        ).filter(
-            Workout.user_id == user_id,
-            Workout.status == "completed",
-            Workout.started_at  >= start_date
-        ).all()
+        # Totaux quotidiens par groupe depuis le cumul (cf. backend.muscle_volume)
+        rows = muscle_volume.group_totals(db, user_id, start_date.date())
         
-        if not sets_data:
+        if not rows:
             return {
                 "labels": [],
                 "datasets": [],
@@ -2464,72 +2659,21 @@ def get_muscle_volume_chart(
         # Muscles standard
         muscles = ["dos", "pectoraux", "jambes", "epaules", "bras", "abdominaux"]
         
-        # Grouper par date et muscle
-        daily_volumes = {}
-        for muscle in muscles:
-            daily_volumes[muscle] = {}
-        
-        for row in sets_data:
-            date_str = row.workout_date.isoformat()
-            volume = (row.weight or 0) * (row.reps or 0)
-            
-            # Gestion sécurisée de muscle_groups (peut être JSON ou liste)
-            try:
-                if isinstance(row.muscle_groups, str):
-                    import json
-                    muscles_worked = json.loads(row.muscle_groups)
-                elif isinstance(row.muscle_groups, list):
-                    muscles_worked = row.muscle_groups
-                else:
-                    muscles_worked = []
-            except:
-                muscles_worked = []
-            
-            # Distribuer volume
-            if muscles_worked:
-                volume_per_muscle = volume / len(muscles_worked)
-                for muscle in muscles_worked:
-                    muscle_key = muscle.lower()
-                    if muscle_key in daily_volumes:
-                        if date_str not in daily_volumes[muscle_key]:
-                            daily_volumes[muscle_key][date_str] = 0
-                        daily_volumes[muscle_key][date_str] += volume_per_muscle
-        
-        # Créer série temporelle COMPLÈTE sur toute la période
-        from datetime import date as date_class
-        current_date = start_date.date()
-        end_date_only = end_date.date()
-        all_dates = []
-
-        while current_date <= end_date_only:
-            all_dates.append(current_date.isoformat())
-            current_date += timedelta(days=1)
-
-        print(f"📊 Série temporelle générée: {len(all_dates)} jours de {all_dates[0]} à {all_dates[-1]}")
-        
-        if not all_dates:
-            return {
-                "labels": [],
-                "datasets": [],
-                "period_days": days
-            }
+        # Série temporelle COMPLÈTE sur toute la période : matrice muscles × jours
+        all_days = timeseries.day_range(start_date.date(), end_date.date())
+        all_dates = timeseries.day_labels(all_days)
+        daily_volumes = timeseries.bucket_daily_by_key(
+            [row.muscle_group.lower() for row in rows], muscles,
+            [row.day for row in rows], [row.volume or 0 for row in rows],
+            start_date.date(), end_date.date()
+        )
         
-        # Datasets pour chart
-        datasets = []
-        for muscle in muscles:
-            # Sommes glissantes
-            rolling_sums = []
-            for i, date_str in enumerate(all_dates):
-                # Fenêtre glissante : prendre les N derniers jours jusqu'à cette date
-                window_start = max(0, i - days + 1)
-                window_dates = all_dates[window_start:i + 1]
-                window_sum = sum(daily_volumes[muscle].get(d, 0) for d in window_dates)
-                rolling_sums.append(round(window_sum))
-            
-            datasets.append({
-                "label": muscle.capitalize(),
-                "data": rolling_sums
-            })
+        # Sommes glissantes sur les N derniers jours (sommes préfixes)
+        rolling_sums = np.round(timeseries.rolling_sum(daily_volumes, days)).astype(int)
+        datasets = [
+            {"label": muscle.capitalize(), "data": rolling_sums[index].tolist()}
+            for index, muscle in enumerate(muscles)
+        ]
         
         # Labels lisibles - afficher 1 date sur N pour éviter surcharge
         if len(all_dates) <= 7:
@@ -2614,604 +2758,143 @@ def get_muscle_balance(user_id: int, db: Session = Depends(get_db)):
         }
 
 
+def _frame_chart(db: Session, user_id: int, chart: str, days: Optional[int] = None,
+                 sessions: Optional[int] = None):
+    """Graphique calculé sur la fenêtre de séries de l'utilisateur (cf. backend.stats_frame)"""
+    return stats_frame.build_charts(
+        db, user_id, [chart], days=days, sessions=sessions,
+        estimate_weight=FitnessRecommendationEngine(db)._estimate_initial_weight
+    )[chart]
+
+
 @app.get("/api/users/{user_id}/stats/ml-confidence")
 def get_ml_confidence_evolution(user_id: int, days: int = 60, db: Session = Depends(get_db)):
     """Graphique 14: Evolution de la confiance ML"""
-    cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
-    
-    sets = db.query(WorkoutSet).join(Workout).filter(
-        Workout.user_id == user_id,
-        WorkoutSet.completed_at >= cutoff_date,
-        WorkoutSet.ml_confidence.isnot(None)
-    ).order_by(WorkoutSet.completed_at).all()
-    
-    if not sets:
-        return {"data": [], "averageConfidence": 0, "trend": "stable"}
-    
-    confidence_data = []
-    for s in sets:
-        confidence_data.append({
-            "date": s.completed_at.isoformat(),
-            "confidence": s.ml_confidence,
-            "followedWeight": s.user_followed_ml_weight,
-            "followedReps": s.user_followed_ml_reps,
-            "success": s.reps >= (s.target_reps or s.reps)
-        })
-    
-    # Calculer la tendance
-    recent_avg = sum(d["confidence"] for d in confidence_data[-10:]) / min(10, len(confidence_data))
-    older_avg = sum(d["confidence"] for d in confidence_data[:10]) / min(10, len(confidence_data))
-    
-    if recent_avg > older_avg * 1.1:
-        trend = "improving"
-    elif recent_avg < older_avg * 0.9:
-        trend = "declining"
-    else:
-        trend = "stable"
-    
-    return {
-        "data": confidence_data,
-        "averageConfidence": sum(d["confidence"] for d in confidence_data) / len(confidence_data),
-        "followRate": sum(1 for d in confidence_data if d["followedWeight"] and d["followedReps"]) / len(confidence_data),
-        "trend": trend
-    }
+    return _frame_chart(db, user_id, "ml-confidence", days=days)
 
 
 @app.get("/api/users/{user_id}/stats/ml-adjustments-flow")
 def get_ml_adjustments_flow(user_id: int, days: int = 30, db: Session = Depends(get_db)):
     """Graphique 15: Sankey des ajustements ML"""
-    cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
-    
-    sets = db.query(WorkoutSet).join(Workout).filter(
-        Workout.user_id == user_id,
-        WorkoutSet.completed_at >= cutoff_date,
-        WorkoutSet.ml_weight_suggestion.isnot(None)
-    ).all()
-    
-    if not sets:
-        return {"nodes": [], "links": []}
-    
-    # Analyser les flux
-    flows = {
-        "suggested_accepted": 0,
-        "suggested_modified_up": 0,
-        "suggested_modified_down": 0,
-        "accepted_success": 0,
-        "accepted_failure": 0,
-        "modified_success": 0,
-        "modified_failure": 0
-    }
-    
-    for s in sets:
-        if s.user_followed_ml_weight:
-            flows["suggested_accepted"] += 1
-            if s.reps >= (s.target_reps or s.reps):
-                flows["accepted_success"] += 1
-            else:
-                flows["accepted_failure"] += 1
-        else:
-            if s.weight > s.ml_weight_suggestion:
-                flows["suggested_modified_up"] += 1
-            else:
-                flows["suggested_modified_down"] += 1
-            
-            if s.reps >= (s.target_reps or s.reps):
-                flows["modified_success"] += 1
-            else:
-                flows["modified_failure"] += 1
-    
-    # Formatter pour Sankey
-    nodes = [
-        {"name": "Suggestions ML"},
-        {"name": "Acceptées"},
-        {"name": "Modifiées +"},
-        {"name": "Modifiées -"},
-        {"name": "Succès"},
-        {"name": "Échec"}
-    ]
-    
-    links = []
-    if flows["suggested_accepted"] > 0:
-        links.append({"source": 0, "target": 1, "value": flows["suggested_accepted"]})
-    if flows["suggested_modified_up"] > 0:
-        links.append({"source": 0, "target": 2, "value": flows["suggested_modified_up"]})
-    if flows["suggested_modified_down"] > 0:
-        links.append({"source": 0, "target": 3, "value": flows["suggested_modified_down"]})
-    if flows["accepted_success"] > 0:
-        links.append({"source": 1, "target": 4, "value": flows["accepted_success"]})
-    if flows["accepted_failure"] > 0:
-        links.append({"source": 1, "target": 5, "value": flows["accepted_failure"]})
-    if flows["modified_success"] > 0:
-        links.append({"source": 2, "target": 4, "value": flows["modified_success"] // 2})
-        links.append({"source": 3, "target": 4, "value": flows["modified_success"] // 2})
-    if flows["modified_failure"] > 0:
-        links.append({"source": 2, "target": 5, "value": flows["modified_failure"] // 2})
-        links.append({"source": 3, "target": 5, "value": flows["modified_failure"] // 2})
-    
-    return {"nodes": nodes, "links": links}
+    return _frame_chart(db, user_id, "ml-adjustments-flow", days=days)
 
 
 @app.get("/api/users/{user_id}/stats/time-distribution")
 def get_time_distribution(user_id: int, sessions: int = 10, db: Session = Depends(get_db)):
     """Graphique 18: Distribution du temps par séance"""
-    workouts = db.query(Workout).filter(
-        Workout.user_id == user_id,
-        Workout.status == "completed",
-        Workout.total_duration_minutes.isnot(None)
-    ).order_by(Workout.completed_at.desc()).limit(sessions).all()
-    
-    if not workouts:
-        return {"sessions": []}
-    
-    session_data = []
-    for workout in workouts:
-        sets = db.query(WorkoutSet).filter(
-            WorkoutSet.workout_id == workout.id
-        ).all()
-        
-        # Calculer les temps
-        total_exercise_time = sum(s.duration_seconds or 0 for s in sets)
-        total_rest_time = sum(s.actual_rest_duration_seconds or s.base_rest_time_seconds or 0 for s in sets)
-        total_duration_seconds = workout.total_duration_minutes * 60
-        transition_time = max(0, total_duration_seconds - total_exercise_time - total_rest_time)
-        
-        session_data.append({
-            "date": workout.started_at.isoformat(),
-            "totalMinutes": workout.total_duration_minutes,
-            "exerciseTime": round(total_exercise_time / 60, 1),
-            "restTime": round(total_rest_time / 60, 1),
-            "transitionTime": round(transition_time / 60, 1),
-            "setsCount": len(sets)
-        })
-    
-    return {"sessions": session_data}
+    return _frame_chart(db, user_id, "time-distribution", sessions=sessions)
+
 
 @app.get("/api/users/{user_id}/stats/workout-intensity-recovery")
 def get_workout_intensity_recovery(user_id: int, sessions: int = 50, db: Session = Depends(get_db)):
-    """Version corrigée - TOUT EN SECONDES"""
-    
-    # Requête SQL - tout en secondes
-    query = """
-    WITH session_stats AS (
-        SELECT 
-            w.id,
-            w.completed_at,
-            -- Durée totale en secondes
-            COALESCE(w.total_duration_minutes * 60, 0) as total_duration_seconds,
-            -- Repos total en secondes
-            COALESCE(w.total_rest_time_seconds, 0) as stored_rest_seconds,
-            -- Calculer les temps réels à partir des sets
-            SUM(COALESCE(ws.duration_seconds, 0)) as exercise_seconds,
-            SUM(COALESCE(ws.actual_rest_duration_seconds, ws.base_rest_time_seconds, 0)) as calculated_rest_seconds,
-            -- Volume total
-            SUM(
-                CASE 
-                    WHEN e.exercise_type = 'isometric' THEN 
-                        COALESCE(ws.reps, 0) * 20 * COALESCE(e.intensity_factor, 1.0)
-                    WHEN e.weight_type = 'bodyweight' THEN 
-                        :user_weight * 0.65 * COALESCE(ws.reps, 0) * COALESCE(e.intensity_factor, 1.0)
-                    ELSE 
-                        COALESCE(ws.weight, 0) * COALESCE(ws.reps, 0) * COALESCE(e.intensity_factor, 1.0)
-                END
-            ) as total_volume
-        FROM workouts w
-        JOIN workout_sets ws ON w.id = ws.workout_id
-        JOIN exercises e ON ws.exercise_id = e.id
-        WHERE w.user_id = :user_id 
-            AND w.status = 'completed'
-            AND w.total_duration_minutes IS NOT NULL
-        GROUP BY w.id, w.completed_at, w.total_duration_minutes, w.total_rest_time_seconds
-        ORDER BY w.completed_at DESC
-        LIMIT :limit_sessions
-    )
-    SELECT 
-        *,
-        -- Durée effective en secondes (priorité aux données calculées si plus fiables)
-        CASE 
-            WHEN total_duration_seconds > 0 THEN total_duration_seconds
-            ELSE GREATEST(60, exercise_seconds + calculated_rest_seconds)
-        END as effective_duration_seconds,
-        -- Repos effectif en secondes
-        CASE 
-            WHEN stored_rest_seconds > 0 THEN stored_rest_seconds
-            ELSE calculated_rest_seconds
-        END as effective_rest_seconds,
-        EXTRACT(DAYS FROM (NOW() - completed_at)) as days_ago
-    FROM session_stats
-    WHERE total_volume > 0
-    """
-    
-    # Récupérer le poids utilisateur
+    """Charge et ratio repos / volume des dernières séances - TOUT EN SECONDES"""
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
     
-    # Exécuter la requête
-    result = db.execute(text(query), {
-        "user_id": user_id, 
-        "user_weight": user.weight,
-        "limit_sessions": sessions
-    }).fetchall()
-    
-    if not result:
-        return {"sessions": []}
-    
-    # Calculs TOUT EN SECONDES
-    sessions_data = []
-    charges = []
-    ratios = []
-    
-    for row in result:
-        duration_sec = row.effective_duration_seconds
-        rest_sec = row.effective_rest_seconds
-        volume = row.total_volume
-        
-        # Charge = points de volume par SECONDE
-        charge = round(volume / max(1, duration_sec), 4)
-        
-        # Ratio = secondes de repos par point de volume
-        ratio = round(rest_sec / max(1, volume), 6)
-        
-        charges.append(charge)
-        ratios.append(ratio)
-        
-        sessions_data.append({
-            "date": row.completed_at.isoformat(),
-            "charge": charge,  # points/seconde
-            "ratio": ratio,    # secondes_repos/point
-            "total_volume": round(volume, 1),
-            "total_duration_minutes": round(duration_sec / 60, 1),  # Juste pour affichage
-            "total_rest_minutes": round(rest_sec / 60, 1),          # Juste pour affichage
-            "days_ago": int(row.days_ago),
-            # Debug en secondes
-            "debug_seconds": {
-                "duration_sec": duration_sec,
-                "rest_sec": rest_sec,
-                "exercise_sec": row.exercise_seconds,
-                "original_duration_sec": row.total_duration_seconds
-            }
-        })
-    
-    # Médianes
-    median_charge = sorted(charges)[len(charges) // 2] if charges else 0
-    median_ratio = sorted(ratios)[len(ratios) // 2] if ratios else 0
-    
-    return {
-        "sessions": sessions_data,
-        "medians": {
-            "charge": round(median_charge, 4),
-            "ratio": round(median_ratio, 6)
-        }
-    }
+    return _frame_chart(db, user_id, "workout-intensity-recovery", sessions=sessions)
+
 
 # ===== ENDPOINTS ML ANALYTICS =====
 
 @app.get("/api/users/{user_id}/stats/ml-insights")
 def get_ml_insights_overview(user_id: int, days: int = 90, db: Session = Depends(get_db)):
     """Dashboard principal ML Analytics"""
-    cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
-
-    def normalize_datetime_for_comparison(dt):
-        """Normalise les datetime pour comparaison en ajoutant UTC si nécessaire"""
-        if dt and dt.tzinfo is None:
-            return dt.replace(tzinfo=timezone.utc)
-        return dt
-    
-    cutoff_date_naive = cutoff_date.replace(tzinfo=None) if cutoff_date.tzinfo else cutoff_date
-
-    # Récupérer toutes les séries avec données potentielles
-    all_sets = db.query(WorkoutSet).join(Workout).filter(
-        Workout.user_id == user_id,
-        WorkoutSet.completed_at >= cutoff_date_naive
-    ).order_by(WorkoutSet.completed_at).all()
-    
-    if not all_sets:
-        return {"error": "Aucune donnée disponible"}
-    
-    # Analyser les données ML disponibles
-    sets_with_ml = [s for s in all_sets if s.ml_confidence is not None]
-    sets_with_fatigue = [s for s in all_sets if s.fatigue_level is not None]
-    sets_with_effort = [s for s in all_sets if s.effort_level is not None]
-    sets_with_ml_suggestions = [s for s in all_sets if s.ml_weight_suggestion is not None or s.ml_reps_suggestion is not None]
-    
-    total_sessions = len(set(s.workout_id for s in all_sets))
-    ml_active_sessions = len(set(s.workout_id for s in sets_with_ml))
-    
-    # Calcul de métriques d'engagement
-    avg_fatigue = sum(s.fatigue_level for s in sets_with_fatigue) / len(sets_with_fatigue) if sets_with_fatigue else 0
-    avg_effort = sum(s.effort_level for s in sets_with_effort) / len(sets_with_effort) if sets_with_effort else 0
-    
-    # Analyse du suivi des recommandations
-    follow_rate_weight = 0
-    follow_rate_reps = 0
-    
-    if sets_with_ml_suggestions:
-        followed_weight = sum(1 for s in sets_with_ml_suggestions if s.user_followed_ml_weight)
-        followed_reps = sum(1 for s in sets_with_ml_suggestions if s.user_followed_ml_reps)
-        follow_rate_weight = followed_weight / len(sets_with_ml_suggestions)
-        follow_rate_reps = followed_reps / len(sets_with_ml_suggestions)
-    
-    # Tendance de confiance
-    confidence_trend = "stable"
-    if len(sets_with_ml) >= 10:
-        recent_confidence = sum(s.ml_confidence for s in sets_with_ml[-5:]) / 5
-        older_confidence = sum(s.ml_confidence for s in sets_with_ml[:5]) / 5
-        
-        if recent_confidence > older_confidence * 1.1:
-            confidence_trend = "improving"
-        elif recent_confidence < older_confidence * 0.9:
-            confidence_trend = "declining"
-    
-    cutoff_7_days_naive = (datetime.now(timezone.utc) - timedelta(days=7)).replace(tzinfo=None)
-
-    return {
-        "overview": {
-            "total_sets": len(all_sets),
-            "total_sessions": total_sessions,
-            "ml_active_sessions": ml_active_sessions,
-            "ml_adoption_rate": ml_active_sessions / total_sessions if total_sessions > 0 else 0,
-            "data_quality_score": len(sets_with_fatigue) / len(all_sets) if all_sets else 0,
-            "avg_fatigue": round(avg_fatigue, 1),
-            "avg_effort": round(avg_effort, 1)
-        },
-        "ml_performance": {
-            "sets_with_recommendations": len(sets_with_ml_suggestions),
-            "follow_rate_weight": round(follow_rate_weight, 2),
-            "follow_rate_reps": round(follow_rate_reps, 2),
-            "avg_confidence": round(sum(s.ml_confidence for s in sets_with_ml) / len(sets_with_ml), 2) if sets_with_ml else 0,
-            "confidence_trend": confidence_trend
-        },
-        "recent_activity": {
-            "last_7_days": len([s for s in all_sets if s.completed_at >= cutoff_7_days_naive]),
-            "ml_active_last_7": len([s for s in sets_with_ml if s.completed_at >= cutoff_7_days_naive])
-        }
-    }
+    return _frame_chart(db, user_id, "ml-insights", days=days)
 
 
 @app.get("/api/users/{user_id}/stats/ml-progression")
 def get_ml_progression_analysis(user_id: int, days: int = 60, db: Session = Depends(get_db)):
     """Analyse de progression avec/sans ML"""
-    cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
-    
-    # Récupérer les exercices avec suffisamment de données
-    sets_query = db.query(WorkoutSet).join(Workout).filter(
-        Workout.user_id == user_id,
-        WorkoutSet.completed_at >= cutoff_date,
-        WorkoutSet.weight.isnot(None),
-        WorkoutSet.reps.isnot(None)
-    ).order_by(WorkoutSet.completed_at)
-    
-    all_sets = sets_query.all()
-    
-    if len(all_sets) < 10:
-        return {"error": "Données insuffisantes pour l'analyse"}
-    
-    # Grouper par exercice
-    exercises_data = {}
-    for s in all_sets:
-        if s.exercise_id not in exercises_data:
-            exercises_data[s.exercise_id] = {
-                "with_ml": [],
-                "without_ml": [],
-                "exercise_name": None
-            }
-        
-        # Calculer le volume (poids * reps)
-        volume = (s.weight or 0) * s.reps
-        set_data = {
-            "date": s.completed_at,
-            "volume": volume,
-            "weight": s.weight,
-            "reps": s.reps,
-            "confidence": s.ml_confidence or 0
-        }
-        
-        if s.ml_confidence is not None and s.ml_confidence > 0.3:
-            exercises_data[s.exercise_id]["with_ml"].append(set_data)
-        else:
-            exercises_data[s.exercise_id]["without_ml"].append(set_data)
-    
-    # Analyser la progression pour chaque exercice
-    progression_analysis = []
-    
-    for exercise_id, data in exercises_data.items():
-        if len(data["with_ml"]) >= 3 and len(data["without_ml"]) >= 3:
-            # Calculer les tendances
-            ml_volumes = [d["volume"] for d in data["with_ml"]]
-            no_ml_volumes = [d["volume"] for d in data["without_ml"]]
-            
-            ml_avg = sum(ml_volumes) / len(ml_volumes)
-            no_ml_avg = sum(no_ml_volumes) / len(no_ml_volumes)
-            
-            # Récupérer le nom de l'exercice
-            exercise = db.query(Exercise).filter(Exercise.id == exercise_id).first()
-            
-            progression_analysis.append({
-                "exercise_id": exercise_id,
-                "exercise_name": exercise.name if exercise else f"Exercice {exercise_id}",
-                "ml_sessions": len(data["with_ml"]),
-                "traditional_sessions": len(data["without_ml"]),
-                "ml_avg_volume": round(ml_avg, 1),
-                "traditional_avg_volume": round(no_ml_avg, 1),
-                "improvement_ratio": round(ml_avg / no_ml_avg, 2) if no_ml_avg > 0 else 1,
-                "confidence_evolution": data["with_ml"][-5:] if len(data["with_ml"]) >= 5 else data["with_ml"]
-            })
-    
-    # Trier par amélioration
-    progression_analysis.sort(key=lambda x: x["improvement_ratio"], reverse=True)
-    
-    return {
-        "exercises": progression_analysis[:10],  # Top 10
-        "summary": {
-            "total_analyzed": len(progression_analysis),
-            "avg_improvement": round(sum(e["improvement_ratio"] for e in progression_analysis) / len(progression_analysis), 2) if progression_analysis else 1,
-            "best_exercise": progression_analysis[0] if progression_analysis else None
-        }
-    }
+    return _frame_chart(db, user_id, "ml-progression", days=days)
 
 
 @app.get("/api/users/{user_id}/stats/ml-recommendations-accuracy")
 def get_ml_recommendations_accuracy(user_id: int, days: int = 30, db: Session = Depends(get_db)):
     """Analyse de précision des recommandations ML"""
-    cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
-    
-    sets = db.query(WorkoutSet).join(Workout).filter(
-        Workout.user_id == user_id,
-        WorkoutSet.completed_at >= cutoff_date,
-        WorkoutSet.ml_weight_suggestion.isnot(None),
-        WorkoutSet.weight.isnot(None)
-    ).order_by(WorkoutSet.completed_at).all()
-    
-    if not sets:
-        return {"error": "Aucune recommandation ML trouvée"}
-    
-    accuracy_data = []
-    weight_diffs = []
-    reps_diffs = []
-    
-    for s in sets:
-        weight_diff = 0
-        reps_diff = 0
-        
-        if s.ml_weight_suggestion and s.weight:
-            weight_diff = abs(s.weight - s.ml_weight_suggestion)
-            weight_diffs.append(weight_diff)
-        
-        if s.ml_reps_suggestion and s.reps:
-            reps_diff = abs(s.reps - s.ml_reps_suggestion)
-            reps_diffs.append(reps_diff)
-        
-        accuracy_data.append({
-            "date": s.completed_at.isoformat(),
-            "weight_suggested": s.ml_weight_suggestion,
-            "weight_actual": s.weight,
-            "weight_diff": round(weight_diff, 1),
-            "reps_suggested": s.ml_reps_suggestion,
-            "reps_actual": s.reps,
-            "reps_diff": reps_diff,
-            "confidence": s.ml_confidence or 0,
-            "followed_weight": s.user_followed_ml_weight,
-            "followed_reps": s.user_followed_ml_reps
-        })
-    
-    # Calculer les métriques de précision
-    avg_weight_diff = sum(weight_diffs) / len(weight_diffs) if weight_diffs else 0
-    avg_reps_diff = sum(reps_diffs) / len(reps_diffs) if reps_diffs else 0
-    
-    # Précision (pourcentage de recommandations "proches")
-    weight_precision = len([d for d in weight_diffs if d <= 2.5]) / len(weight_diffs) if weight_diffs else 0
-    reps_precision = len([d for d in reps_diffs if d <= 1]) / len(reps_diffs) if reps_diffs else 0
-    
-    return {
-        "accuracy_timeline": accuracy_data,
-        "metrics": {
-            "total_recommendations": len(accuracy_data),
-            "avg_weight_deviation": round(avg_weight_diff, 1),
-            "avg_reps_deviation": round(avg_reps_diff, 1),
-            "weight_precision_rate": round(weight_precision, 2),
-            "reps_precision_rate": round(reps_precision, 2),
-            "overall_follow_rate": round(len([d for d in accuracy_data if d["followed_weight"]]) / len(accuracy_data), 2) if accuracy_data else 0
-        }
-    }
+    return _frame_chart(db, user_id, "ml-recommendations-accuracy", days=days)
 
 
 @app.get("/api/users/{user_id}/stats/ml-exercise-patterns")
 def get_ml_exercise_patterns(user_id: int, days: int = 60, db: Session = Depends(get_db)):
     """Patterns d'utilisation ML par exercice"""
-    cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
+    return _frame_chart(db, user_id, "ml-exercise-patterns", days=days)
+
+
+# ===== / ENDPOINTS ML ANALYTICS (fin) =====
+
+# ===== TABLEAU DE BORD STATS =====
+
+# Graphiques servis par leur endpoint (cumuls et agrégats déjà peu coûteux)
+STATS_ENDPOINT_CHARTS = {
+    "stats": lambda db, user_id, days, period: get_user_stats(user_id, db=db),
+    "progress": lambda db, user_id, days, period: get_progress_data(user_id, days=days or 30, db=db),
+    "personal-records": lambda db, user_id, days, period: get_personal_records(user_id, db=db),
+    "attendance-calendar": lambda db, user_id, days, period: get_attendance_calendar(user_id, db=db),
+    "volume-burndown": lambda db, user_id, days, period: get_volume_summary(user_id, period, db=db),
+    "muscle-sunburst": lambda db, user_id, days, period: get_muscle_sunburst(user_id, days=days or 30, db=db),
+    "recovery-gantt": lambda db, user_id, days, period: get_recovery_gantt(user_id, db=db),
+    "muscle-volume": lambda db, user_id, days, period: get_muscle_volume_chart(user_id, days=days or 30, db=db),
+    "muscle-balance": lambda db, user_id, days, period: get_muscle_balance(user_id, db=db),
+}
+
+
+@app.get("/api/users/{user_id}/stats/bundle")
+def get_stats_bundle(
+    user_id: int,
+    charts: Optional[str] = Query(None, description="Graphiques séparés par des virgules (tous par défaut)"),
+    days: Optional[int] = Query(None, description="Période en jours (sinon celle de chaque graphique)"),
+    period: str = Query("week", description="Période du burndown (week, month, quarter, year)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Plusieurs graphiques de l'onglet stats en un appel. Les graphiques par série
+    (cf. backend.stats_frame) sont calculés sur une seule fenêtre chargée une fois ;
+    un graphique en échec est listé dans "errors" sans bloquer les autres.
+    """
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
     
-    # Requête optimisée avec jointures
-    sets = db.query(WorkoutSet, Exercise.name).join(Workout).join(Exercise).filter(
-        Workout.user_id == user_id,
-        WorkoutSet.completed_at >= cutoff_date
-    ).all()
+    available = list(stats_frame.FRAME_CHARTS) + list(STATS_ENDPOINT_CHARTS)
+    requested = [name.strip() for name in charts.split(",") if name.strip()] if charts else available
+    unknown = [name for name in requested if name not in available]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Graphiques inconnus: {', '.join(unknown)}")
     
-    if not sets:
-        return {"error": "Aucune donnée disponible"}
-    
-    # Grouper par exercice
-    exercise_patterns = {}
-    
-    for workout_set, exercise_name in sets:
-        if exercise_name not in exercise_patterns:
-            exercise_patterns[exercise_name] = {
-                "total_sets": 0,
-                "ml_sets": 0,
-                "avg_confidence": 0,
-                "confidence_values": [],
-                "follow_rate": 0,
-                "followed_count": 0,
-                "last_used": None,
-                "volume_progression": []
-            }
-        
-        pattern = exercise_patterns[exercise_name]
-        pattern["total_sets"] += 1
-        pattern["last_used"] = max(pattern["last_used"] or workout_set.completed_at, workout_set.completed_at)
-        
-        if workout_set.ml_confidence is not None:
-            pattern["ml_sets"] += 1
-            pattern["confidence_values"].append(workout_set.ml_confidence)
-        
-        if workout_set.user_followed_ml_weight or workout_set.user_followed_ml_reps:
-            pattern["followed_count"] += 1
-        
-        # Calculer le volume pour la progression
-        if workout_set.weight and workout_set.reps:
-            volume = workout_set.weight * workout_set.reps
-            pattern["volume_progression"].append({
-                "date": workout_set.completed_at.isoformat(),
-                "volume": volume,
-                "has_ml": workout_set.ml_confidence is not None
-            })
+    def chart_error(name: str, e: Exception) -> str:
+        db.rollback()
+        if isinstance(e, HTTPException):
+            return e.detail
+        logger.error(f"Erreur graphique {name} user {user_id}: {e}")
+        return f"Erreur calcul: {str(e)}"
+    
+    results, errors = {}, {}
+    windows = stats_frame.chart_windows([name for name in requested if name in stats_frame.FRAME_CHARTS], days)
+    if windows:
+        frame = stats_frame.load_frame(
+            db, user_id, windows,
+            estimate_weight=FitnessRecommendationEngine(db)._estimate_initial_weight
+        )
+        for name, window in windows.items():
+            try:
+                results[name] = stats_frame.FRAME_CHARTS[name][0](frame, window)
+            except Exception as e:
+                errors[name] = chart_error(name, e)
     
-    # Finaliser les calculs
-    for exercise_name, pattern in exercise_patterns.items():
-        if pattern["confidence_values"]:
-            pattern["avg_confidence"] = sum(pattern["confidence_values"]) / len(pattern["confidence_values"])
-        
-        if pattern["ml_sets"] > 0:
-            pattern["follow_rate"] = pattern["followed_count"] / pattern["ml_sets"]
-        
-        pattern["ml_adoption_rate"] = pattern["ml_sets"] / pattern["total_sets"]
-        
-        # Nettoyer pour la sérialisation
-        del pattern["confidence_values"]
-        pattern["last_used"] = pattern["last_used"].isoformat() if pattern["last_used"] else None
-    
-    # Trier par utilisation ML
-    sorted_patterns = sorted(
-        [(name, data) for name, data in exercise_patterns.items()],
-        key=lambda x: x[1]["ml_adoption_rate"],
-        reverse=True
-    )
+    for name in requested:
+        if name in STATS_ENDPOINT_CHARTS:
+            try:
+                results[name] = STATS_ENDPOINT_CHARTS[name](db, user_id, days, period)
+            except Exception as e:
+                errors[name] = chart_error(name, e)
     
     return {
-        "exercise_patterns": dict(sorted_patterns[:15]),  # Top 15
-        "summary": {
-            "total_exercises": len(exercise_patterns),
-            "avg_ml_adoption": round(sum(p["ml_adoption_rate"] for p in exercise_patterns.values()) / len(exercise_patterns), 2),
-            "most_ml_friendly": sorted_patterns[0][0] if sorted_patterns else None,
-            "total_ml_sets": sum(p["ml_sets"] for p in exercise_patterns.values())
-        }
+        "charts": {name: results[name] for name in requested if name in results},
+        "errors": errors
     }
 
 
-# ===== / ENDPOINTS ML ANALYTICS (fin) =====
-
-# Helper function à ajouter
-def get_muscles_for_group(muscle_group: str) -> List[str]:
-    """Retourne les muscles spécifiques d'un groupe musculaire"""
-    mapping = {
-        "dos": ["trapezes", "grand-dorsal", "lombaires"],
-        "pectoraux": ["pectoraux-superieurs", "pectoraux-inferieurs"],
-        "jambes": ["quadriceps", "ischio-jambiers", "fessiers", "mollets"],
-        "epaules": ["deltoides-anterieurs", "deltoides-lateraux", "deltoides-posterieurs"],
-        "bras": ["biceps", "triceps"],
-        "abdominaux": ["abdominaux", "obliques"]
-    }
-    return mapping.get(muscle_group, []) 
-
 # ===== CALCULS POIDS DISPONIBLES =====
 
 @app.get("/api/users/{user_id}/available-weights")
@@ -3225,11 +2908,26 @@ def get_available_weights(user_id: int, exercise_id: int = Query(None), db: Sess
             exercise = db.query(Exercise).filter(Exercise.id == exercise_id).first()
         
         weights = EquipmentService.get_available_weights(db, user_id, exercise)
-        return {"available_weights": weights}
+        return {"available_weights": weights.to_list()}
     except Exception as e:
         logger.error(f"Erreur calcul poids user {user_id}: {e}")
         raise HTTPException(status_code=500, detail="Erreur calcul des poids")
 
+@app.get("/api/jobs/stats")
+def get_job_queue_stats(db: Session = Depends(get_db)):
+    """Tâches différées par statut et compteurs des threads de ce worker"""
+    return JobWorker.get_stats(db)
+
+@app.get("/api/recommendations/context-cache/stats")
+def get_recommendation_context_stats():
+    """Compteurs du cache des contextes de recommandation (par worker)"""
+    return RecommendationContextCache.get_stats()
+
+@app.get("/api/equipment/weights-cache/stats")
+def get_weights_cache_stats():
+    """Compteurs hit/miss du cache des poids réalisables (par worker)"""
+    return EquipmentService.get_weights_cache_stats()
+
 @app.get("/api/users/{user_id}/plate-layout/{weight}")
 def get_plate_layout(user_id: int, weight: float, exercise_id: int = Query(None), db: Session = Depends(get_db)):
     """Version corrigée avec validation équipement et compatibilité nouveaux équipements"""
@@ -3278,8 +2976,8 @@ def get_plate_layout(user_id: int, weight: float, exercise_id: int = Query(None)
         if weight not in available_weights:
             # Retourner une erreur claire avec suggestions
             if available_weights:
-                closest = min(available_weights, key=lambda x: abs(x - weight))
-                nearby_weights = sorted([w for w in available_weights if abs(w - weight) < 10])
+                closest = available_weights.nearest(weight)
+                nearby_weights = available_weights.between(weight - 10, weight + 10)
             else:
                 closest = weight
                 nearby_weights = []
@@ -3332,13 +3030,10 @@ def generate_ai_exercises(request: GenerateExercisesRequest, db: Session = Depen
         ppl_used = ppl_override.lower() if ppl_override and ppl_override.lower() != "auto" else ppl_recommendation.get("category", "push")
         
         # Filtrer exercices par PPL et équipement
-        all_exercises = db.query(Exercise).all()
-        exercises = [ex for ex in all_exercises if ex.ppl and ppl_used in ex.ppl]
-        user_equipment = set(EquipmentService.get_available_equipment_types(user.equipment_config))
-        available_exercises = [
-            ex for ex in exercises 
-            if not ex.equipment_required or ex.equipment_required == ["bodyweight"] or any(eq in user_equipment for eq in ex.equipment_required)
-        ]
+        catalog = get_catalog(db)
+        ppl_mask = catalog.ppl_mask(ppl_used)
+        exercises = catalog.from_mask(ppl_mask)
+        available_exercises = catalog.from_mask(ppl_mask & catalog.feasibility_mask(user.equipment_config))
         
         # Filtrer par muscles si spécifié
         if manual_muscle_focus:
@@ -3425,8 +3120,8 @@ def generate_ai_exercises(request: GenerateExercisesRequest, db: Session = Depen
                 selected_exercises_with_metadata.append({
                     "exercise_id": exercise.id,
                     "name": exercise.name,
-                    "muscle_groups": exercise.muscle_groups or [],
-                    "equipment_required": exercise.equipment_required or [],
+                    "muscle_groups": list(exercise.muscle_groups or []),
+                    "equipment_required": list(exercise.equipment_required or []),
                     "difficulty": exercise.difficulty,
                     "order_in_session": idx + 1,
                     "default_sets": exercise.default_sets,
@@ -3438,7 +3133,7 @@ def generate_ai_exercises(request: GenerateExercisesRequest, db: Session = Depen
                     "weight_type": exercise.weight_type,
                     "base_weights_kg": exercise.base_weights_kg,
                     "bodyweight_percentage": exercise.bodyweight_percentage,
-                    "ppl": exercise.ppl
+                    "ppl": list(exercise.ppl or [])
                 })
         except Exception as e:
             logger.error(f"❌ Erreur formatage exercices: {str(e)}", exc_info=True)
@@ -4053,8 +3748,10 @@ def refresh_user_stats(user_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
     
     try:
-        # Mettre à jour toutes les stats
+        # Mettre à jour toutes les stats (et reconstruire le cumul de volume musculaire et les records)
         update_exercise_stats_for_user(db, user_id)
+        muscle_volume.rebuild(db, user_id)
+        personal_records.rebuild(db, user_id)
         
         # Retourner le nombre d'entrées mises à jour
         count = db.query(ExerciseCompletionStats).filter(
@@ -5,6 +5,8 @@ from sqlalchemy.orm import Session
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta, timezone
 from backend.models import User, Exercise, Workout, WorkoutSet, AdaptiveTargets, UserCommitment
+from backend.exercise_catalog import get_catalog
+from backend import muscle_volume
 import itertools
 
 logging.basicConfig(level=logging.INFO)
@@ -227,8 +229,7 @@ class FitnessMLEngine:
             available_weights = EquipmentService.get_available_weights(db_session, user.id, exercise)
             
             if available_weights:
-                closest_weight = min(available_weights, key=lambda x: abs(x - final_weight))
-                return closest_weight
+                return available_weights.nearest(final_weight)
             
             # Fallback : arrondir à 2.5kg près
             return round(final_weight / 2.5) * 2.5
@@ -298,35 +299,12 @@ class FitnessMLEngine:
             
             # Arrondir au poids disponible le plus proche
             if "dumbbells" in exercise.equipment_required and user.equipment_config:
-                target_per_dumbbell = next_weight / 2
-                available = []
-                
-                # Ajouter haltères fixes
-                dumbbell_config = user.equipment_config.get("dumbbells", {})
-                if dumbbell_config.get("available", False) and dumbbell_config.get("weights"):
-                    available.extend(dumbbell_config["weights"])
-                
-                # Ajouter barres courtes + disques
-                barres_courtes = user.equipment_config.get("barres", {}).get("courte", {})
-                disques_config = user.equipment_config.get("disques", {})
-                if (barres_courtes.get("available", False) and 
-                    barres_courtes.get("count", 0) >= 2 and 
-                    disques_config.get("available", False)):
-                    
-                    barre_weight = barres_courtes.get("weight", 2.5)
-                    available.append(barre_weight)
-                    
-                    # Ajouter quelques combinaisons courantes
-                    for weight_str, count in disques_config.get("weights", {}).items():
-                        if count >= 2:  # Paire nécessaire
-                            plate_weight = float(weight_str)
-                            available.append(barre_weight + plate_weight)
-                            available.append(barre_weight + plate_weight * 2)
+                from backend.equipment_service import EquipmentService
                 
+                # Poids de paire réellement réalisables (haltères fixes + barres courtes chargées)
+                available = EquipmentService.get_available_weights(self.db, user.id, exercise).for_equipment('dumbbells')
                 if available:
-                    available = sorted(set(available))
-                    closest = min(available, key=lambda x: abs(x - target_per_dumbbell))
-                    next_weight = closest * 2
+                    next_weight = available.nearest(next_weight)
                 else:
                     # Arrondir à 2.5kg près
                     next_weight = round(next_weight / 2.5) * 2.5
@@ -1117,12 +1095,14 @@ class SessionBuilder:
         logger.info(f"Building session for muscles: {muscles}")
         logger.info(f"User equipment: {user.equipment_config}")
         
-        # Récupérer tous les exercices disponibles (GARDER votre code)
-        all_exercises = self.db.query(Exercise).all()
-        logger.info(f"Total exercises in DB: {len(all_exercises)}")
+        # Catalogue en mémoire (pas de requête DB par muscle)
+        catalog = get_catalog(self.db)
+        logger.info(f"Total exercises in catalog: {len(catalog)}")
         
-        # Filtrer par muscle (GARDER votre code)
-        muscle_exercises = [e for e in all_exercises if e.body_part in muscles]
+        # Filtrer par muscle via l'index du catalogue
+        muscle_exercises = catalog.by_muscle_groups(muscles)
+        # Exercices réalisables avec l'équipement de l'utilisateur (masque mis en cache)
+        feasible_mask = catalog.feasibility_mask(user.equipment_config)
         logger.info(f"Exercises for selected muscles: {len(muscle_exercises)}")
 
         session = []
@@ -1136,22 +1116,11 @@ class SessionBuilder:
                 logger.info(f"Max exercises ({max_total_exercises}) atteint, arrêt de l'ajout")
                 break
                 
-            # Récupérer exercices disponibles (GARDER votre code existant)
-            exercises = self.db.query(Exercise).filter(
-                Exercise.body_part == muscle
-            ).all()
+            # Récupérer exercices disponibles depuis l'index par groupe musculaire
+            exercises = catalog.by_muscle_group(muscle)
             
-            # Filtrer par équipement disponible (GARDER votre code)
-            # Filtrer par équipement disponible
-            available_exercises = []
-            for ex in exercises:
-                is_compatible = self._check_equipment_availability(ex, user)
-                if ex.equipment_required and "dumbbells" in ex.equipment_required:
-                    logger.info(f"🏋️ {ex.name}: dumbbells requis, compatible={is_compatible}")
-                
-                # AJOUTER CES LIGNES
-                if is_compatible:
-                    available_exercises.append(ex)
+            # Filtrer par équipement disponible (ET binaire avec le masque de faisabilité)
+            available_exercises = catalog.from_mask(catalog.mask(exercises) & feasible_mask)
             
             if not available_exercises:
                 continue
@@ -1217,8 +1186,8 @@ class SessionBuilder:
         if len(session) < min_exercises:
             logger.warning(f"Seulement {len(session)} exercices trouvés, recherche supplémentaire...")
             # GARDER votre logique de recherche supplémentaire
-            all_exercises = self.db.query(Exercise).filter(Exercise.body_part.in_(muscles)).all()
-            available_all = [ex for ex in all_exercises if self._check_equipment_availability(ex, user)]
+            all_exercises = muscle_exercises
+            available_all = catalog.from_mask(catalog.mask(all_exercises) & feasible_mask)
             
             # Limiter l'ajout selon le budget temps
             for ex in available_all[:max_total_exercises]:
@@ -1242,18 +1211,9 @@ class SessionBuilder:
         # GARDER votre fallback ultime :
         if not session and muscles:
             # Fallback : prendre n'importe quel exercice COMPATIBLE
-            all_muscle_exercises = self.db.query(Exercise).filter(
-                Exercise.body_part.in_(muscles)
-            ).all()
-            
             # Filtrer par équipement disponible
-            for fallback_exercise in all_muscle_exercises:
-                # Vérifier directement l'équipement sans passer par la méthode
-                available_equipment = self.get_user_available_equipment(user)
-                exercise_equipment = fallback_exercise.equipment_required or []
-                if not exercise_equipment or any(eq in available_equipment for eq in exercise_equipment):
-                    # Utiliser cet exercice compatible
-                    break
+            compatible_exercises = catalog.from_mask(catalog.mask(muscle_exercises) & feasible_mask)
+            fallback_exercise = compatible_exercises[0] if compatible_exercises else None
             
             if fallback_exercise:
                 try:
@@ -1279,10 +1239,8 @@ class SessionBuilder:
         if not exercise.equipment_required:
             return True
         
-        available_equipment = self.ml_engine.get_user_available_equipment(user)
-        exercise_equipment = exercise.equipment_required or []
-        
-        return any(eq in available_equipment for eq in exercise_equipment)
+        catalog = get_catalog(self.db)
+        return catalog.is_in_mask(exercise, catalog.feasibility_mask(user.equipment_config))
     
 
 
@@ -1477,28 +1435,13 @@ class ProgressionAnalyzer:
         }
     
     def _calculate_volume_by_muscle(self, user: User, days: int) -> Dict[str, int]:
-        """Calcule le volume total par muscle sur X jours"""
-        from sqlalchemy import and_
-        
+        """Calcule le volume total par muscle sur X jours (cumul quotidien par groupe musculaire)"""
         cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
         
-        # Requête pour obtenir le volume
-        results = self.db.query(
-            Exercise.body_part,
-            func.sum(WorkoutSet.reps * WorkoutSet.weight).label('volume')
-        ).join(
-            WorkoutSet, WorkoutSet.exercise_id == Exercise.id
-        ).join(
-            Workout, Workout.id == WorkoutSet.workout_id
-        ).filter(
-            and_(
-                Workout.user_id == user.id,
-                Workout.created_at > cutoff_date,
-                Workout.status == "completed"
-            )
-        ).group_by(Exercise.body_part).all()
-        
-        return {muscle: int(volume or 0) for muscle, volume in results}
+        return {
+            muscle: int(volume)
+            for muscle, volume in muscle_volume.volume_by_group(self.db, user.id, cutoff_date.date()).items()
+        }
     
     def _calculate_consistency_score(self, user: User, days: int) -> float:
         """Score de régularité sur X jours"""
@@ -1626,9 +1569,10 @@ class RealTimeAdapter:
         self.progression_analyzer = ProgressionAnalyzer(db)
     
     def handle_session_completed(self, workout: Workout):
-        """Appelé après chaque séance pour adapter les targets"""
-        from backend.models import AdaptiveTargets
-        
+        """
+        Appelé après chaque séance pour adapter les targets (tâche targets_recalibration).
+        Sans commit : l'appelant valide l'ensemble en une transaction, annulée en cas d'échec.
+        """
         # Mettre à jour les volumes réalisés
         self._update_current_volumes(workout)
         
@@ -1681,14 +1625,13 @@ class RealTimeAdapter:
         
         # Calculer le volume par muscle pour cette séance
         volume_by_muscle = {}
+        catalog = get_catalog(self.db)
         for set_item in workout.sets:
-            exercise = self.db.query(Exercise).filter(
-                Exercise.id == set_item.exercise_id
-            ).first()
+            exercise = catalog.get(set_item.exercise_id)
             
             if exercise:
                 muscle = exercise.body_part
-                volume = set_item.reps * set_item.weight
+                volume = (set_item.reps or 0) * (set_item.weight or 0)
                 
                 if muscle in volume_by_muscle:
                     volume_by_muscle[muscle] += volume
@@ -1696,6 +1639,7 @@ class RealTimeAdapter:
                     volume_by_muscle[muscle] = volume
         
         # Mettre à jour les targets
+        recovery_debts = self._calculate_recovery_debts(workout.user_id, catalog)
         for muscle, volume in volume_by_muscle.items():
             target = self.db.query(AdaptiveTargets).filter(
                 AdaptiveTargets.user_id == workout.user_id,
@@ -1707,28 +1651,39 @@ class RealTimeAdapter:
                 target.current_volume = self._calculate_7day_volume(workout.user_id, muscle)
                 target.last_trained = workout.completed_at or datetime.now(timezone.utc)
                 
-                # Mettre à jour la dette de récupération
-                avg_fatigue = sum(s.fatigue_level for s in workout.sets) / len(workout.sets)
-                target.recovery_debt = max(0, target.recovery_debt + (avg_fatigue - 2.5) * 0.5)
-        
-        self.db.commit()
+                # Dette de récupération recalculée depuis les séances (pas d'incrément : tâche rejouable)
+                target.recovery_debt = recovery_debts.get(muscle, 0.0)
     
-    def _calculate_7day_volume(self, user_id: int, muscle: str) -> float:
-        """Calcule le volume sur 7 jours glissants"""
+    def _calculate_recovery_debts(self, user_id: int, catalog) -> Dict[str, float]:
+        """
+        Dette de récupération par groupe musculaire sur 7 jours glissants : chaque séance
+        terminée qui l'a travaillé, dans l'ordre, ajoute (fatigue moyenne - 2.5) × 0.5 (plancher 0).
+        """
         cutoff = datetime.now(timezone.utc) - timedelta(days=7)
-        
-        result = self.db.query(func.sum(WorkoutSet.reps * WorkoutSet.weight)).join(
-            Workout
-        ).join(
-            Exercise
+        rows = self.db.query(Workout.id, WorkoutSet.exercise_id, WorkoutSet.fatigue_level).join(
+            WorkoutSet, WorkoutSet.workout_id == Workout.id
         ).filter(
             Workout.user_id == user_id,
-            Exercise.body_part == muscle,
-            Workout.created_at > cutoff,
-            Workout.status == "completed"
-        ).scalar()
-        
-        return float(result or 0)
+            Workout.status == "completed",
+            Workout.started_at > cutoff
+        ).order_by(Workout.started_at, Workout.id).all()
+        
+        debts: Dict[str, float] = {}
+        for _, workout_sets in itertools.groupby(rows, key=lambda row: row[0]):
+            workout_sets = list(workout_sets)
+            fatigues = [row[2] for row in workout_sets if row[2] is not None]
+            if not fatigues:
+                continue
+            step = (sum(fatigues) / len(fatigues) - 2.5) * 0.5
+            exercises = [catalog.get(row[1]) for row in workout_sets]
+            for muscle in {exercise.body_part for exercise in exercises if exercise}:
+                debts[muscle] = max(0.0, debts.get(muscle, 0.0) + step)
+        return debts
+    
+    def _calculate_7day_volume(self, user_id: int, muscle: str) -> float:
+        """Calcule le volume sur 7 jours glissants (cumul quotidien par groupe musculaire)"""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=7)
+        return muscle_volume.volume_by_group(self.db, user_id, cutoff.date()).get(muscle, 0.0)
     
     def _detect_overtraining(self, user: User) -> bool:
         """Détecte les signes de surentraînement"""
@@ -1737,7 +1692,7 @@ class RealTimeAdapter:
             Workout
         ).filter(
             Workout.user_id == user.id,
-            Workout.created_at > datetime.now(timezone.utc) - timedelta(days=7)
+            Workout.started_at > datetime.now(timezone.utc) - timedelta(days=7)
         ).scalar()
         
         return avg_fatigue and avg_fatigue > 4.0
@@ -1753,8 +1708,6 @@ class RealTimeAdapter:
         for target in targets:
             target.target_volume *= 0.6  # Réduire de 40%
             target.recovery_debt = 0  # Reset la dette
-        
-        self.db.commit()
     
     def _recalibrate_targets(self, user: User):
         """Recalibre les objectifs adaptatifs"""
@@ -1773,5 +1726,3 @@ class RealTimeAdapter:
             elif target.current_volume < target.target_volume * 0.5:
                 target.target_volume *= 0.85
                 target.adaptation_rate = max(0.5, target.adaptation_rate * 0.9)
-        
-        self.db.commit()
@@ -1,6 +1,7 @@
 # ===== backend/ml_recommendations.py - MOTEUR ML RECOMMANDATIONS =====
-from backend.models import User, Exercise, WorkoutSet, SetHistory, Workout, UserAdaptationCoefficients, PerformanceStates
+from backend.models import User, Exercise, WorkoutSet, SetHistory, Workout, UserAdaptationCoefficients, PerformanceStates, FitnessFatigueSums
 import math
+from types import SimpleNamespace
 import json
 from collections import defaultdict
 from sqlalchemy.orm import Session
@@ -11,6 +12,15 @@ import statistics
 import logging
 import traceback
 
+from backend.available_weights import AvailableWeights
+from backend.equipment_service import EquipmentService
+from backend.plate_layouts import layout_to_plates, minimize_plate_changes
+from backend.exercise_catalog import get_catalog
+from backend.volume import compute_volumes
+from backend import progression_state, fitness_fatigue, personal_records
+from backend.job_queue import enqueue
+from backend.recommendation_context import WorkoutRecommendationContext, HISTORICAL_CONTEXT_LIMIT, history_to_dict, history_matches
+
 from backend.models import User, Exercise, WorkoutSet, SetHistory, Workout
 
 
@@ -36,28 +46,71 @@ class FitnessRecommendationEngine:
     Basé sur fatigue, effort, disponibilité équipement et historique
     """
     
-    def __init__(self, db: Session):
+    # Tolérance de poids acceptée selon la stratégie d'équipement (avant flexibilité utilisateur)
+    EQUIPMENT_TOLERANCE_CONFIG = {
+        'heavy_bar_continuity': {
+            'base_tolerance': 5.0,
+            'effort_threshold': 3.0,
+            'continuity_bonus': 0.4
+        },
+        'medium_bar_flexibility': {
+            'base_tolerance': 3.0,
+            'effort_threshold': 2.0,
+            'continuity_bonus': 0.3
+        },
+        'dual_bar_symmetry': {
+            'base_tolerance': 2.5,
+            'effort_threshold': 1.5,
+            'continuity_bonus': 0.2
+        }
+    }
+    DEFAULT_TOLERANCE_CONFIG = {'base_tolerance': 2.5, 'effort_threshold': 2.0, 'continuity_bonus': 0.2}
+    
+    DEFAULT_COEFFICIENTS = {
+        'recovery_rate': 1.0,
+        'fatigue_sensitivity': 1.0,
+        'volume_adaptability': 1.0,
+        'effort_responsiveness': 1.0,
+        'strength_endurance_ratio': 0.5,
+        'optimal_volume_multiplier': 1.0
+    }
+    REQUIRED_COEFFICIENTS = ('fatigue_sensitivity', 'effort_responsiveness', 'recovery_rate', 'volume_adaptability')
+    
+    def __init__(self, db: Session, context: Optional[WorkoutRecommendationContext] = None):
         self.db = db
+        # Contexte de séance en cache (évite de relire séries/historique à chaque série)
+        self.context = context
 
-    def _calculate_performance_score(self, set_record, exercise_id: int = None) -> float:
-        """Version corrigée qui utilise calculate_exercise_volume"""
+    def _calculate_performance_score(
+        self,
+        set_record,
+        exercise_id: int = None,
+        exercise: Optional[Exercise] = None,
+        user: Optional[User] = None
+    ) -> float:
+        """
+        Version corrigée qui utilise calculate_exercise_volume.
+        exercise / user évitent les requêtes quand l'appelant les a déjà chargés.
+        """
         
         if exercise_id is None and hasattr(set_record, 'exercise_id'):
             exercise_id = set_record.exercise_id
         
-        exercise = self.db.query(Exercise).filter(Exercise.id == exercise_id).first()
+        if exercise is None:
+            exercise = get_catalog(self.db).get(exercise_id)
         if not exercise:
             return 1  # Fallback
         
         # Récupérer l'utilisateur
-        if hasattr(set_record, 'workout_id'):
-            workout = self.db.query(Workout).filter(Workout.id == set_record.workout_id).first()
-            if workout:
-                user = self.db.query(User).filter(User.id == workout.user_id).first()
+        if user is None:
+            if hasattr(set_record, 'workout_id'):
+                workout = self.db.query(Workout).filter(Workout.id == set_record.workout_id).first()
+                if workout:
+                    user = self.db.query(User).filter(User.id == workout.user_id).first()
+                else:
+                    return 1
             else:
                 return 1
-        else:
-            return 1
         
         if not user:
             return 1
@@ -81,13 +134,14 @@ class FitnessRecommendationEngine:
         last_rest_duration: Optional[int] = None,
         exercise_order: int = 1,
         set_order_global: int = 1,
-        available_weights: List[float] = None,
+        available_weights: Optional[AvailableWeights] = None,
         workout_id: Optional[int] = None,
         last_set_voice_data: Optional[Dict] = None
     ) -> Dict[str, any]:
         """Génère des recommandations ML enrichies avec données vocales validées"""
         exercise_order = exercise_order or 1
         set_order_global = set_order_global or 1
+        available_weights = AvailableWeights.coerce(available_weights)
         
         try:
             # 1. Récupérer l'historique et l'état de performance
@@ -104,7 +158,7 @@ class FitnessRecommendationEngine:
                 performance_state['baseline_weight'] = None
             
             # 3. Coefficients
-            coefficients = self._get_or_create_coefficients(user, exercise)
+            coefficients = self._get_coefficients(user, exercise)
             
             logger.info(f"DEBUG AVANT STRATÉGIE - Exercise {exercise.id}")
             logger.info(f"  performance_state: {performance_state}")
@@ -141,9 +195,7 @@ class FitnessRecommendationEngine:
             if recommendations['weight'] and available_weights:
                 if recommendations['weight'] not in available_weights:
                     logger.error(f"ERREUR: Poids {recommendations['weight']} non réalisable!")
-                    recommendations['weight'] = min(
-                        available_weights, key=lambda x: abs(x - recommendations['weight'])
-                    )
+                    recommendations['weight'] = available_weights.nearest(recommendations['weight'])
 
             # ═══════════ NOUVEAU SYSTÈME ML OPTIMISÉ ═══════════
             try:
@@ -194,13 +246,24 @@ class FitnessRecommendationEngine:
                             if session_state.get('last_weight_same_equipment'):
                                 last_weight = float(session_state['last_weight_same_equipment'])
                                 current_weight = float(recommendations.get('weight', 20))
+                                table = EquipmentService.get_plate_layout_table(user.equipment_config, equipment_context['type'])
                                 
-                                if abs(current_weight - last_weight) <= 2.5:
+                                if table and table.layout(last_weight):
+                                    # Poids de la fenêtre ±2.5kg le moins coûteux en disques depuis la série précédente
+                                    cheapest = table.cheapest_change(last_weight, current_weight, 2.5)
+                                    if cheapest is not None and cheapest != current_weight:
+                                        recommendations['weight'] = cheapest
+                                        existing_reasoning = recommendations.get('reasoning', 'Conditions normales')
+                                        recommendations['reasoning'] = existing_reasoning + f" • Continuité: {cheapest}kg (moins de disques à changer)"
+                                elif abs(current_weight - last_weight) <= 2.5:
                                     recommendations['weight'] = last_weight
                                     existing_reasoning = recommendations.get('reasoning', 'Conditions normales')
                                     recommendations['reasoning'] = existing_reasoning + f" • Continuité: {last_weight}kg maintenu"
                             
-                            plate_change_data = self._calculate_plate_changes([], recommendations['weight'], equipment_context, {})
+                            plate_change_data = self._calculate_plate_changes(
+                                [], recommendations['weight'], equipment_context, user.equipment_config or {},
+                                current_weight=session_state.get('last_weight_same_equipment')
+                            )
                             
                         except Exception as e:
                             logger.warning(f"Erreur optimisations barbell: {e}")
@@ -265,6 +328,9 @@ class FitnessRecommendationEngine:
         exercise_order: int
     ) -> List[Dict]:
         """Récupère l'historique pertinent pour cet exercice dans des contextes similaires"""
+        key = (exercise.id, set_number, exercise_order)
+        if self.context is not None and key in self.context.historical:
+            return self.context.historical[key]
         
         # Construction de la requête de base
         query = self.db.query(SetHistory).filter(
@@ -285,19 +351,12 @@ class FitnessRecommendationEngine:
             )
         
         # Récupérer les 30 dernières séries
-        similar_sets = query.order_by(desc(SetHistory.date_performed)).limit(30).all()
-        
-        return [
-            {
-                "weight": s.weight,
-                "reps": s.actual_reps,
-                "fatigue": s.fatigue_level,
-                "effort": s.effort_level,
-                "success": s.success,
-                "rest_before": s.rest_before_seconds,
-                "date": s.date_performed
-            } for s in similar_sets
-        ]
+        similar_sets = query.order_by(desc(SetHistory.date_performed)).limit(HISTORICAL_CONTEXT_LIMIT).all()
+        
+        history = [history_to_dict(s) for s in similar_sets]
+        if self.context is not None:
+            self.context.historical[key] = history
+        return history
     
     def _calculate_performance_state(
         self, 
@@ -309,29 +368,31 @@ class FitnessRecommendationEngine:
         set_order_global: int,
         last_set_voice_data: Optional[Dict] = None  # AJOUTER CE PARAMÈTRE
     ) -> Dict[str, any]:
-        """Calcule l'état de performance avec le modèle Fitness-Fatigue simplifié"""
+        """
+        Calcule l'état de performance avec le modèle Fitness-Fatigue (impulsion-réponse
+        sur tout l'historique, cf. backend.fitness_fatigue).
+        Lecture seule : l'état stocké est projeté sans être modifié
+        (il est mis à jour par record_set_performance).
+        """
         
-        # Récupérer ou créer l'état de performance
-        perf_state = self.db.query(PerformanceStates).filter(
-            PerformanceStates.user_id == user.id,
-            PerformanceStates.exercise_id == exercise.id
-        ).first()
+        perf_state = self._get_performance_snapshot(user.id, exercise.id)
+        base_potential = (perf_state.base_potential or 0.0) if perf_state else 0.0
+        acute_fatigue = (perf_state.acute_fatigue or 0.0) if perf_state else 0.0
         
-        if not perf_state:
-            perf_state = PerformanceStates(
-                user_id=user.id,
-                exercise_id=exercise.id,
-                base_potential=0.0,
-                acute_fatigue=0.0
-            )
-            self.db.add(perf_state)
-            self.db.commit()
+        # Sommes du modèle stockées (mises à jour à chaque série), projetées à maintenant
+        # (sans état stocké, aucune série n'a été enregistrée par l'application)
+        model = {"potential": None, "acute_fatigue": 0.0, "count": 0}
+        if perf_state is not None:
+            model = fitness_fatigue.get_state(
+                self.db, user.id, exercise.id,
+                isometric=exercise.exercise_type == "isometric"
+            ).at(datetime.now(timezone.utc).timestamp())
         
         # Si pas d'historique, utiliser les valeurs par défaut
         if not historical_data:
             baseline_weight = self._estimate_initial_weight(user, exercise)
             baseline_reps = exercise.default_reps_min
-            perf_state.base_potential = baseline_weight
+            base_potential = baseline_weight
         else:
             # Calculer le potentiel de base (moyenne mobile exponentielle)
             recent_performances = []
@@ -350,15 +411,15 @@ class FitnessRecommendationEngine:
                     recent_performances.append(perf_score)
             
             if recent_performances:
-                # Mise à jour avec moyenne mobile (α = 0.1)
-                new_performance = statistics.mean(recent_performances)
-                if perf_state.base_potential > 0:
-                    perf_state.base_potential = 0.9 * perf_state.base_potential + 0.1 * new_performance
+                if model["potential"] is not None:
+                    # Moyenne des séries réussies pondérée par le noyau de fitness
+                    base_potential = model["potential"]
                 else:
-                    perf_state.base_potential = new_performance
+                    new_performance = statistics.mean(recent_performances)
+                    base_potential = new_performance if base_potential <= 0 else 0.9 * base_potential + 0.1 * new_performance
                 
                 # Extraire poids et reps de base depuis le potentiel
-                baseline_weight = perf_state.base_potential / 1.3  # Approximation inverse d'Epley
+                baseline_weight = base_potential / 1.3  # Approximation inverse d'Epley
                 # Calculer baseline_reps avec progression pour isométriques
                 recent_reps = [h["reps"] for h in historical_data[:5] if h["success"]]
                 if recent_reps:
@@ -399,24 +460,13 @@ class FitnessRecommendationEngine:
                 else:
                     baseline_reps = exercise.default_reps_min
         
-        # Calculer la fatigue aiguë
-        now = datetime.now(timezone.utc)
-        if perf_state.last_session_timestamp:
-            hours_since = safe_timedelta_hours(datetime.now(timezone.utc), perf_state.last_session_timestamp)
-            # Décroissance exponentielle de la fatigue
-            perf_state.acute_fatigue *= math.exp(-hours_since / 24)  # Constante de temps = 24h
-        
-        # Ajouter la fatigue de la séance actuelle
-        fatigue_factor = (current_fatigue - 1) / 4  # Normaliser 1-5 vers 0-1
-        perf_state.acute_fatigue = min(1.0, perf_state.acute_fatigue + fatigue_factor * 0.2)
-        
-        # Sauvegarder l'état
-        perf_state.last_session_timestamp = now
-        self.db.commit()
-        # Détecter et stocker les patterns de progression
-        patterns = self._detect_progression_patterns(user.id, exercise.id)
-        perf_state.progression_pattern = patterns
-        self.db.commit()
+        # Fatigue aiguë du modèle (sinon état stocké projeté), avec la fatigue déclarée
+        if model["count"]:
+            acute_fatigue = self._project_acute_fatigue(model["acute_fatigue"], None, current_fatigue)
+        else:
+            acute_fatigue = self._project_acute_fatigue(
+                acute_fatigue, perf_state.last_session_timestamp if perf_state else None, current_fatigue
+            )
                 
         # Calculer l'ajustement de fatigue
         fatigue_adjustment = self._calculate_fatigue_adjustment(
@@ -435,8 +485,8 @@ class FitnessRecommendationEngine:
         return {
             "baseline_weight": baseline_weight,
             "baseline_reps": baseline_reps,
-            "base_potential": perf_state.base_potential,
-            "acute_fatigue": perf_state.acute_fatigue,
+            "base_potential": base_potential,
+            "acute_fatigue": acute_fatigue,
             "fatigue_adjustment": fatigue_adjustment
         }
 
@@ -450,7 +500,7 @@ class FitnessRecommendationEngine:
         coefficients: UserAdaptationCoefficients,
         user: User,
         workout_id: Optional[int] = None,
-        available_weights: Optional[List[float]] = None
+        available_weights: Optional[AvailableWeights] = None
     ) -> Dict[str, any]:
         """
         Stratégie avec ajustements variables : poids, reps ET repos adaptatifs
@@ -594,13 +644,16 @@ class FitnessRecommendationEngine:
         try:
             from sqlalchemy import desc, and_
             
-            # Requête optimisée : récupérer toutes les données nécessaires en une fois
-            previous_sets = self.db.query(WorkoutSet).filter(
-                and_(
-                    WorkoutSet.workout_id == workout_id,
-                    WorkoutSet.completed_at.isnot(None)
-                )
-            ).order_by(desc(WorkoutSet.completed_at)).limit(10).all()
+            if self.context is not None and self.context.workout_id == workout_id:
+                previous_sets = self.context.recent_sets(10)
+            else:
+                # Requête optimisée : récupérer toutes les données nécessaires en une fois
+                previous_sets = self.db.query(WorkoutSet).filter(
+                    and_(
+                        WorkoutSet.workout_id == workout_id,
+                        WorkoutSet.completed_at.isnot(None)
+                    )
+                ).order_by(desc(WorkoutSet.completed_at)).limit(10).all()
             
             # Séparer les sets par exercice et session
             for workout_set in previous_sets:
@@ -751,7 +804,7 @@ class FitnessRecommendationEngine:
     def _calculate_weight_recommendation(
         self, baseline_weight: float, fatigue_adj: float, effort_factor: float,
         rest_factor: float, performance_factor: float, set_factor: float,
-        session_factor: float, exercise: Exercise, available_weights: Optional[List[float]]
+        session_factor: float, exercise: Exercise, available_weights: Optional[AvailableWeights]
     ) -> Optional[float]:
         """Calcule la recommandation de poids avec tous les facteurs"""
         # PROTECTION ABSOLUE - Log détaillé si baseline_weight est None
@@ -787,22 +840,13 @@ class FitnessRecommendationEngine:
             max_increase = baseline_weight * 1.2  # Max +20% par série
             min_weight = baseline_weight * 0.7    # Min -30% par série
             
-            # Filtrer les poids dans la plage acceptable
-            valid_weights = [w for w in available_weights 
-                            if min_weight <= w <= max_increase]
+            # Choisir le plus proche du poids théorique dans la plage acceptable
+            recommended_weight = available_weights.nearest(theoretical_weight, min_weight, max_increase)
             
-            if not valid_weights:
+            if recommended_weight is None:
                 # Si aucun poids dans la plage idéale, élargir la recherche
                 logger.warning(f"Aucun poids disponible entre {min_weight:.1f} et {max_increase:.1f}")
-                
-                # Prendre les 3 plus proches du théorique
-                sorted_weights = sorted(available_weights, 
-                                    key=lambda x: abs(x - theoretical_weight))
-                valid_weights = sorted_weights[:3]
-            
-            # Choisir le plus proche du poids théorique
-            recommended_weight = min(valid_weights, 
-                                key=lambda x: abs(x - theoretical_weight))
+                recommended_weight = available_weights.nearest(theoretical_weight)
             
             logger.info(f"Poids théorique: {theoretical_weight:.1f}kg → Poids disponible: {recommended_weight}kg")
         else:
@@ -988,7 +1032,7 @@ class FitnessRecommendationEngine:
         coefficients: UserAdaptationCoefficients,
         historical_data: List[Dict],
         user: User,
-        available_weights: Optional[List[float]] = None  # AJOUTER
+        available_weights: Optional[AvailableWeights] = None
     ) -> Dict[str, any]:
         """Stratégie avec poids fixe : ajuste uniquement reps et repos"""
         
@@ -1034,8 +1078,7 @@ class FitnessRecommendationEngine:
                                 min(exercise.default_reps_max + 2, recommended_reps))
         # Valider avec les poids disponibles
         if available_weights and recommended_weight is not None:
-            closest = min(available_weights, key=lambda x: abs(x - recommended_weight))
-            recommended_weight = closest
+            recommended_weight = available_weights.nearest(recommended_weight)
         return {
             'weight': recommended_weight,
             'reps': recommended_reps,
@@ -1128,65 +1171,94 @@ class FitnessRecommendationEngine:
             'confidence': min(1.0, rest_confidence)
         }
 
-    def _get_or_create_coefficients(self, user: User, exercise: Exercise) -> UserAdaptationCoefficients:
-        """Récupère ou crée les coefficients personnalisés"""
+    def _get_coefficients(self, user: User, exercise: Exercise) -> SimpleNamespace:
+        """
+        Coefficients personnalisés en lecture seule (valeurs par défaut si absents ou nuls).
+        Copie détachée de la session : rien n'est créé ni modifié par une recommandation.
+        """
+        
+        values = self.context.coefficients.get(exercise.id) if self.context is not None else None
+        if values is None:
+            coefficients = self.db.query(UserAdaptationCoefficients).filter(
+                UserAdaptationCoefficients.user_id == user.id,
+                UserAdaptationCoefficients.exercise_id == exercise.id
+            ).first()
+            values = self._coefficient_values(coefficients)
+            if self.context is not None:
+                self.context.coefficients[exercise.id] = values
+        
+        # user pour accéder à prefer_weight_changes_between_sets
+        return SimpleNamespace(user=user, user_id=user.id, exercise_id=exercise.id, **values)
+
+    def _coefficient_values(self, coefficients: Optional[UserAdaptationCoefficients]) -> Dict[str, float]:
+        values = dict(self.DEFAULT_COEFFICIENTS)
+        if coefficients:
+            for name in values:
+                value = getattr(coefficients, name)
+                if name in self.REQUIRED_COEFFICIENTS and not value:
+                    logger.warning(f"{name} était None pour user {coefficients.user_id}, exercise {coefficients.exercise_id}")
+                elif value is not None:
+                    values[name] = value
+        return values
+
+    def _get_performance_snapshot(self, user_id: int, exercise_id: int) -> Optional[SimpleNamespace]:
+        """État de performance stocké en lecture seule (None si absent), mis en cache dans le contexte"""
+        if self.context is not None and exercise_id in self.context.performance_states:
+            return self.context.performance_states[exercise_id]
+        
+        perf_state = self.db.query(PerformanceStates).filter(
+            PerformanceStates.user_id == user_id,
+            PerformanceStates.exercise_id == exercise_id
+        ).first()
+        snapshot = self._performance_snapshot(perf_state)
+        if self.context is not None:
+            self.context.performance_states[exercise_id] = snapshot
+        return snapshot
+
+    @staticmethod
+    def _performance_snapshot(perf_state: Optional[PerformanceStates]) -> Optional[SimpleNamespace]:
+        if perf_state is None:
+            return None
+        return SimpleNamespace(
+            base_potential=perf_state.base_potential,
+            acute_fatigue=perf_state.acute_fatigue,
+            last_session_timestamp=perf_state.last_session_timestamp,
+            updated_at=perf_state.updated_at
+        )
+
+    def _get_or_create_coefficients(self, user_id: int, exercise_id: int) -> UserAdaptationCoefficients:
+        """Coefficients persistés (chemin d'écriture), créés avec les valeurs par défaut si absents"""
         
         coefficients = self.db.query(UserAdaptationCoefficients).filter(
-            UserAdaptationCoefficients.user_id == user.id,
-            UserAdaptationCoefficients.exercise_id == exercise.id
+            UserAdaptationCoefficients.user_id == user_id,
+            UserAdaptationCoefficients.exercise_id == exercise_id
         ).first()
         
         if not coefficients:
             coefficients = UserAdaptationCoefficients(
-                user_id=user.id,
-                exercise_id=exercise.id,
-                recovery_rate=1.0,
-                fatigue_sensitivity=1.0,
-                volume_adaptability=1.0,             
-                effort_responsiveness=1.0,           
-                strength_endurance_ratio=0.5,      
-                optimal_volume_multiplier=1.0
+                user_id=user_id,
+                exercise_id=exercise_id,
+                **self.DEFAULT_COEFFICIENTS
             )
             self.db.add(coefficients)
-            self.db.commit()
-        
-        # Ajouter la relation user pour accéder à prefer_weight_changes_between_sets
-        coefficients.user = user
-        # PROTECTION CRITIQUE - S'assurer que tous les attributs sont définis
-        if not coefficients.fatigue_sensitivity or coefficients.fatigue_sensitivity is None:
-            coefficients.fatigue_sensitivity = 1.0
-            logger.warning(f"fatigue_sensitivity était None pour user {user.id}, exercise {exercise.id}")
-            
-        if not coefficients.effort_responsiveness or coefficients.effort_responsiveness is None:
-            coefficients.effort_responsiveness = 1.0
-            logger.warning(f"effort_responsiveness était None pour user {user.id}, exercise {exercise.id}")
-            
-        if not coefficients.recovery_rate or coefficients.recovery_rate is None:
-            coefficients.recovery_rate = 1.0
-            logger.warning(f"recovery_rate était None pour user {user.id}, exercise {exercise.id}")
-            
-        if not coefficients.volume_adaptability or coefficients.volume_adaptability is None:
-            coefficients.volume_adaptability = 1.0
-            logger.warning(f"volume_adaptability était None pour user {user.id}, exercise {exercise.id}")
-
-        self.db.commit()
+        else:
+            # PROTECTION CRITIQUE - S'assurer que les coefficients utilisés sont définis
+            for name in self.REQUIRED_COEFFICIENTS:
+                if not getattr(coefficients, name):
+                    setattr(coefficients, name, self.DEFAULT_COEFFICIENTS[name])
         return coefficients
 
     def _update_user_coefficients(
         self,
         user_id: int,
         exercise_id: int,
-        performance_data: Dict
+        performance_data: Dict,
+        coefficients: Optional[UserAdaptationCoefficients] = None
     ) -> None:
-        """Met à jour les coefficients basés sur la performance observée"""
+        """Met à jour les coefficients basés sur la performance observée (sans commit)"""
         
-        coefficients = self.db.query(UserAdaptationCoefficients).filter(
-            UserAdaptationCoefficients.user_id == user_id,
-            UserAdaptationCoefficients.exercise_id == exercise_id
-        ).first()
-        
-        if not coefficients:
-            return
+        if coefficients is None:
+            coefficients = self._get_or_create_coefficients(user_id, exercise_id)
         
         # Analyser la récupération
         if performance_data.get('rest_before_seconds') and performance_data.get('previous_performance'):
@@ -1201,7 +1273,7 @@ class FitnessRecommendationEngine:
                 coefficients.recovery_rate = max(0.5, coefficients.recovery_rate * 0.98)
         
         # Analyser la sensibilité à la fatigue
-        if performance_data.get('set_number') > 3:
+        if performance_data.get('set_number') > 3 and performance_data.get('baseline_performance'):
             fatigue_impact = 1.0 - performance_data['actual_performance'] / performance_data['baseline_performance']
             expected_impact = (performance_data['set_number'] - 1) * 0.05
             
@@ -1212,77 +1284,59 @@ class FitnessRecommendationEngine:
                 # Plus sensible à la fatigue
                 coefficients.fatigue_sensitivity = min(1.5, coefficients.fatigue_sensitivity * 1.02)
         
-        self.db.commit()
+        coefficients.last_updated = datetime.now(timezone.utc)
 
     def _detect_progression_patterns(
         self,
         user_id: int,
-        exercise_id: int
+        exercise_id: int,
+        perf_state: Optional[PerformanceStates] = None
     ) -> Dict[str, any]:
-        """Détecte les patterns de progression de l'utilisateur"""
-        
-        # Récupérer l'historique sur 3 mois
-        three_months_ago = datetime.now(timezone.utc) - timedelta(days=90)
-        history = self.db.query(SetHistory).filter(
-            SetHistory.user_id == user_id,
-            SetHistory.exercise_id == exercise_id,
-            SetHistory.date_performed >= three_months_ago
-        ).order_by(SetHistory.date_performed).all()
-        
-        if len(history) < 10:
-            return {
-                "typical_increment": 2.5,
-                "sessions_before_progression": 3,
-                "pattern_type": "default"
-            }
-        
-        # Analyser les augmentations de poids
-        weight_increases = []
-        sessions_between_increases = []
-        last_increase_session = 0
-        current_weight = history[0].weight
-        
-        for i, record in enumerate(history):
-            if record.weight > current_weight:
-                increase = record.weight - current_weight
-                weight_increases.append(increase)
-                
-                if last_increase_session > 0:
-                    sessions_between_increases.append(i - last_increase_session)
-                
-                last_increase_session = i
-                current_weight = record.weight
-        
-        # Calculer les patterns
-        if weight_increases:
-            typical_increment = statistics.median(weight_increases)
-            # Arrondir aux incréments standards (2.5, 5, 10)
-            if typical_increment <= 3.75:
-                typical_increment = 2.5
-            elif typical_increment <= 7.5:
-                typical_increment = 5.0
-            else:
-                typical_increment = 10.0
-        else:
-            typical_increment = 2.5
-        
-        sessions_before_progression = int(statistics.mean(sessions_between_increases)) if sessions_between_increases else 3
-        
-        # Détecter le type de pattern
-        if len(set(weight_increases)) == 1:
-            pattern_type = "linear"
-        elif all(inc >= prev for inc, prev in zip(weight_increases[1:], weight_increases)):
-            pattern_type = "accelerating"
-        else:
-            pattern_type = "variable"
-        
-        return {
-            "typical_increment": typical_increment,
-            "sessions_before_progression": sessions_before_progression,
-            "pattern_type": pattern_type,
-            "total_increases": len(weight_increases),
-            "average_increase": statistics.mean(weight_increases) if weight_increases else 0
-        }
+        """
+        Patterns de progression de l'utilisateur, lus depuis l'état incrémental
+        (mis à jour par record_set_performance). Si l'état est absent : pattern par défaut
+        et reconstruction planifiée s'il existe un état de performance (tâche à commiter
+        par l'appelant).
+        """
+        if perf_state is None:
+            perf_state = self.db.query(PerformanceStates).filter(
+                PerformanceStates.user_id == user_id,
+                PerformanceStates.exercise_id == exercise_id
+            ).first()
+        
+        pattern = perf_state.progression_pattern if perf_state else None
+        if perf_state is not None and (not pattern or 'state' not in pattern):
+            self._schedule_progression_backfill(user_id, exercise_id)
+        return progression_state.public_pattern(pattern)
+
+    def _schedule_progression_backfill(self, user_id: int, exercise_id: int):
+        """Reconstruction différée de l'état de progression (tâche progression_backfill, sans commit)"""
+        enqueue(self.db, "progression_backfill", {"user_id": user_id, "exercise_id": exercise_id},
+                dedupe_key=f"progression_backfill:{user_id}:{exercise_id}")
+
+    def rebuild_progression_pattern(
+        self,
+        user_id: int,
+        exercise_id: int,
+        perf_state: Optional[PerformanceStates] = None
+    ) -> Dict[str, any]:
+        """
+        Reconstruction de l'état de progression depuis SetHistory, limitée aux
+        PROGRESSION_WINDOW_DAYS derniers jours (état antérieur à l'état incrémental).
+        Stocké, sans commit, si perf_state est fourni.
+        """
+        window_start = datetime.now(timezone.utc) - timedelta(days=progression_state.PROGRESSION_WINDOW_DAYS)
+        weights = [
+            weight for (weight,) in self.db.query(SetHistory.weight).filter(
+                SetHistory.user_id == user_id,
+                SetHistory.exercise_id == exercise_id,
+                SetHistory.date_performed >= window_start
+            ).order_by(SetHistory.date_performed, SetHistory.id)
+        ]
+        pattern = progression_state.rebuild(weights)
+        if perf_state is not None:
+            perf_state.progression_pattern = pattern
+        return pattern
 
     def _estimate_initial_weight(self, user: User, exercise: Exercise) -> Optional[float]:
         """Estime un poids initial basé sur les profils de l'exercice"""
@@ -1390,69 +1444,17 @@ class FitnessRecommendationEngine:
         user: User,
         effort_level: Optional[int] = None
     ) -> float:
-        """Calcule des points d'effort normalisés - VERSION CORRIGÉE"""
+        """Calcule des points d'effort normalisés (une série, cf. backend.volume.compute_volumes)"""
         
-        # === 1. VALIDATION DES ENTRÉES ===
         if not exercise or not user:
             logger.warning("Exercise ou User manquant dans calculate_exercise_volume")
             return 0.0
         
-        if reps <= 0:
-            logger.warning(f"Reps invalides: {reps}")
-            return 0.0
-        
-        # === 2. CALCUL DU VOLUME DE BASE ===
-        try:
-            if exercise.exercise_type == "isometric":
-                # Calibrage : 1 seconde isométrique = 20 points d'effort
-                base_volume = reps * 20
-                
-            elif exercise.weight_type == "bodyweight":
-                percentage_data = exercise.bodyweight_percentage or {"intermediate": 65}
-                percentage = percentage_data.get(user.experience_level, 65)
-                equivalent_weight = user.weight * (percentage / 100)
-                base_volume = equivalent_weight * reps
-                
-            elif exercise.weight_type == "hybrid":
-                if weight and weight > 0:
-                    base_volume = weight * reps
-                else:
-                    percentage_data = exercise.bodyweight_percentage or {"intermediate": 65}
-                    percentage = percentage_data.get(user.experience_level, 65)
-                    equivalent_weight = user.weight * (percentage / 100)
-                    base_volume = equivalent_weight * reps
-                    
-            else:  # external
-                # CORRECTION CRITIQUE : gérer le cas où weight est None
-                if weight is None or weight <= 0:
-                    logger.warning(f"Poids invalide ({weight}) pour exercice externe {exercise.name}")
-                    # Utiliser un poids estimé au lieu de retourner None
-                    weight = self._estimate_weight(user, exercise)
-                    if weight is None:
-                        weight = 20.0  # Fallback absolu
-                base_volume = weight * reps
-        
-            # === 3. INTENSITY_FACTOR PARTOUT ===
-            intensity_factor = exercise.intensity_factor or 1.0
-            intensity_adjusted = base_volume * intensity_factor
-            
-            # === 4. EFFORT UTILISATEUR (optionnel) ===
-            if effort_level:
-                effort_multipliers = {1: 0.7, 2: 0.85, 3: 1.0, 4: 1.15, 5: 1.3}
-                final_volume = intensity_adjusted * effort_multipliers.get(effort_level, 1.0)
-            else:
-                final_volume = intensity_adjusted
-            
-            # === 5. VALIDATION DU RÉSULTAT ===
-            if final_volume is None or final_volume < 0:
-                logger.error(f"Volume calculé invalide: {final_volume}")
-                return 0.0
-            
-            return round(final_volume, 1)
-            
-        except Exception as e:
-            logger.error(f"Erreur dans calculate_exercise_volume: {e}")
-            return 0.0
+        volumes = compute_volumes(
+            [weight], [reps], [effort_level], [exercise], user,
+            estimate_weight=self._estimate_initial_weight
+        )
+        return round(float(volumes[0]), 1)
     
     def _estimate_weight(self, user: User, exercise: Exercise) -> float:
         """Méthode manquante pour estimer un poids"""
@@ -1755,14 +1757,14 @@ class FitnessRecommendationEngine:
     def _find_closest_available_weight(
         self, 
         target_weight: float, 
-        available_weights: List[float]
+        available_weights: Optional[AvailableWeights]
     ) -> float:
         """Trouve le poids disponible le plus proche du poids cible"""
         
         if not available_weights:
             return target_weight
         
-        return min(available_weights, key=lambda x: abs(x - target_weight))
+        return AvailableWeights.coerce(available_weights).nearest(target_weight)
     
     def _calculate_confidence(
         self, 
@@ -1954,11 +1956,74 @@ class FitnessRecommendationEngine:
         self,
         user_id: int,
         exercise_id: int,
-        set_data: Dict
+        set_data: Dict,
+        user: Optional[User] = None,
+        commit: bool = True
     ):
-        """Enregistre la performance d'une série pour l'apprentissage futur"""
+        """
+        Enregistre la performance d'une série pour l'apprentissage futur, en une seule unité
+        de travail : ligne SetHistory, état de performance et coefficients d'adaptation.
+        Retourne la ligne SetHistory créée (None en cas d'erreur).
+        
+        Avec commit=False, rien n'est validé (l'appelant commite avec sa propre série)
+        et une erreur est propagée sans rollback, pour que l'appelant décide du repli.
+        """
         
         try:
+            history_record = self.record_sets_performance(user_id, [(exercise_id, set_data)], user=user)[0]
+            if commit:
+                self.db.commit()
+            return history_record
+            
+        except Exception as e:
+            if not commit:
+                raise
+            logger.error(f"Erreur enregistrement performance: {e}")
+            self.db.rollback()
+            return None
+
+    def record_sets_performance(
+        self,
+        user_id: int,
+        entries: List[Tuple[int, Dict]],
+        user: Optional[User] = None
+    ) -> List[SetHistory]:
+        """
+        Enregistre une suite ordonnée de séries [(exercise_id, set_data)] (séance saisie hors
+        ligne, ou une seule série). L'état de performance, les coefficients et la série
+        précédente sont chargés une fois par exercice puis mis à jour en mémoire dans l'ordre
+        des séries ; les lignes SetHistory sont insérées au flush de l'appelant.
+        Aucun commit, les erreurs sont propagées.
+        """
+        
+        if user is None:
+            user = self.db.query(User).filter(User.id == user_id).first()
+        catalog = get_catalog(self.db)
+        
+        # Chargement une fois par exercice (avant l'ajout des nouvelles lignes)
+        per_exercise: Dict[int, Dict] = {}
+        for exercise_id, _ in entries:
+            if exercise_id in per_exercise:
+                continue
+            exercise = catalog.get(exercise_id)
+            per_exercise[exercise_id] = {
+                'exercise': exercise,
+                'perf_state': self._load_performance_state(user_id, exercise_id),
+                'coefficients': self._get_or_create_coefficients(user_id, exercise_id),
+                'record': personal_records.load(self.db, user_id, exercise_id),
+                'model_sums': fitness_fatigue.load_for_update(
+                    self.db, user_id, exercise_id,
+                    isometric=exercise is not None and exercise.exercise_type == "isometric"
+                ),
+                'previous': self.db.query(SetHistory).filter(
+                    SetHistory.user_id == user_id,
+                    SetHistory.exercise_id == exercise_id
+                ).order_by(SetHistory.date_performed.desc(), SetHistory.id.desc()).first()
+            }
+        
+        history_records = []
+        for exercise_id, set_data in entries:
+            loaded = per_exercise[exercise_id]
             history_record = SetHistory(
                 user_id=user_id,
                 exercise_id=exercise_id,
@@ -1974,40 +2039,114 @@ class FitnessRecommendationEngine:
                 success=set_data["actual_reps"] >= set_data.get("target_reps", 1),
                 actual_reps=set_data["actual_reps"]
             )
+            history_records.append(history_record)
+            
+            self._apply_set_to_performance_state(loaded['perf_state'], history_record, loaded['exercise'], loaded['model_sums'])
+            history_record.new_records = personal_records.apply_set(
+                loaded['record'], loaded['exercise'], set_data["weight"], set_data["actual_reps"],
+                set_data["fatigue_level"], set_data["effort_level"]
+            )
             
-            self.db.add(history_record)
-            self.db.commit()
             # Mettre à jour les coefficients d'adaptation
             performance_metrics = {
                 'rest_before_seconds': set_data.get('rest_before_seconds'),
                 'actual_performance': set_data['weight'] * (1 + set_data['actual_reps'] / 30),
-                'baseline_performance': self._calculate_performance_score(history_record),
+                'baseline_performance': self._calculate_performance_score(
+                    history_record, exercise_id, exercise=loaded['exercise'], user=user
+                ),
                 'set_number': set_data['set_number'],
-                'previous_performance': None  # À calculer depuis l'historique récent
+                'previous_performance': None
             }
+            if loaded['previous']:
+                performance_metrics['previous_performance'] = self._calculate_performance_score(
+                    loaded['previous'], exercise_id, exercise=loaded['exercise'], user=user
+                )
+            self._update_user_coefficients(user_id, exercise_id, performance_metrics, loaded['coefficients'])
+            loaded['previous'] = history_record
+        
+        self.db.add_all(history_records)
+        logger.info(f"Performance enregistrée: user {user_id}, {len(history_records)} série(s)")
+        return history_records
+
+    @staticmethod
+    def _project_acute_fatigue(acute_fatigue: float, last_timestamp: Optional[datetime], fatigue_level: int) -> float:
+        """Fatigue aiguë décrue depuis last_timestamp puis augmentée de la fatigue déclarée (1-5)"""
+        if last_timestamp:
+            hours_since = safe_timedelta_hours(datetime.now(timezone.utc), last_timestamp)
+            # Décroissance exponentielle de la fatigue
+            acute_fatigue *= math.exp(-hours_since / 24)  # Constante de temps = 24h
+        
+        fatigue_factor = ((fatigue_level or 1) - 1) / 4  # Normaliser 1-5 vers 0-1
+        return min(1.0, acute_fatigue + fatigue_factor * 0.2)
 
-            # Récupérer la performance précédente si elle existe
-            previous_set = self.db.query(SetHistory).filter(
-                SetHistory.user_id == user_id,
-                SetHistory.exercise_id == exercise_id,
-                SetHistory.date_performed < history_record.date_performed
-            ).order_by(SetHistory.date_performed.desc()).first()
-
-            if previous_set:
-                performance_metrics['previous_performance'] = self._calculate_performance_score(previous_set)
+    def _load_performance_state(self, user_id: int, exercise_id: int) -> PerformanceStates:
+        """
+        État de performance à mettre à jour (créé si absent). Si un état existant n'a pas
+        encore d'état de progression incrémental, sa reconstruction est planifiée (tâche
+        progression_backfill, commitée avec la série) : la série y sera comptée.
+        """
+        perf_state = self.db.query(PerformanceStates).filter(
+            PerformanceStates.user_id == user_id,
+            PerformanceStates.exercise_id == exercise_id
+        ).first()
+        
+        if not perf_state:
+            perf_state = PerformanceStates(
+                user_id=user_id,
+                exercise_id=exercise_id,
+                base_potential=0.0,
+                acute_fatigue=0.0,
+                # Premier enregistrement de l'exercice : état incrémental vide, rien à reconstruire
+                progression_pattern=progression_state.summarize(None)
+            )
+            self.db.add(perf_state)
+        
+        pattern = perf_state.progression_pattern
+        if not pattern or 'state' not in pattern:
+            self._schedule_progression_backfill(user_id, exercise_id)
+        return perf_state
 
-            self._update_user_coefficients(user_id, exercise_id, performance_metrics)
-            
-            logger.info(f"Performance enregistrée: user {user_id}, exercise {exercise_id}")
+    def _apply_set_to_performance_state(self, perf_state: PerformanceStates, history_record: SetHistory, exercise,
+                                        model_sums: Optional[FitnessFatigueSums] = None) -> None:
+        """
+        Met à jour l'état de performance avec une série réalisée : potentiel de base
+        (moyenne mobile), fatigue aiguë, pattern de progression et sommes du modèle
+        fitness/fatigue (O(1)).
+        """
+        # Potentiel de base (moyenne mobile α = 0.1 sur les séries réussies)
+        if history_record.success:
+            if exercise is not None and exercise.exercise_type == "isometric":
+                perf_score = history_record.actual_reps  # reps = durée en secondes
+            elif history_record.weight and history_record.weight > 0:
+                perf_score = history_record.weight * (1 + history_record.actual_reps / 30)
+            else:
+                perf_score = history_record.actual_reps
             
-        except Exception as e:
-            logger.error(f"Erreur enregistrement performance: {e}")
-            self.db.rollback()
-
-
-
-
-
+            if perf_state.base_potential and perf_state.base_potential > 0:
+                perf_state.base_potential = 0.9 * perf_state.base_potential + 0.1 * perf_score
+            else:
+                perf_state.base_potential = perf_score
+        
+        # Fatigue aiguë
+        now = datetime.now(timezone.utc)
+        perf_state.acute_fatigue = self._project_acute_fatigue(
+            perf_state.acute_fatigue or 0.0, perf_state.last_session_timestamp, history_record.fatigue_level
+        )
+        perf_state.last_session_timestamp = now
+        perf_state.updated_at = now
+        
+        # Pattern de progression (état absent : la reconstruction planifiée inclura la série)
+        pattern = perf_state.progression_pattern
+        if pattern and 'state' in pattern:
+            perf_state.progression_pattern = progression_state.record(pattern, history_record.weight)
+        
+        # Modèle fitness/fatigue : décroissance jusqu'à la série puis ajout de son impulsion
+        if model_sums is not None:
+            isometric = exercise is not None and exercise.exercise_type == "isometric"
+            fitness_fatigue.add_set(
+                model_sums, fitness_fatigue.set_score(history_record.weight, history_record.actual_reps, isometric),
+                bool(history_record.success), now
+            )
 
     # ═══════════ MÉTHODES POUR 4 COEFFICIENTS ═══════════
 
@@ -2177,25 +2316,7 @@ class FitnessRecommendationEngine:
             # Calcul tolérance intelligente selon équipement
             strategy = equipment_context.get('optimization_strategy', 'none')
             
-            tolerance_config = {
-                'heavy_bar_continuity': {
-                    'base_tolerance': 5.0,
-                    'effort_threshold': 3.0,
-                    'continuity_bonus': 0.4
-                },
-                'medium_bar_flexibility': {
-                    'base_tolerance': 3.0,
-                    'effort_threshold': 2.0,
-                    'continuity_bonus': 0.3
-                },
-                'dual_bar_symmetry': {
-                    'base_tolerance': 2.5,
-                    'effort_threshold': 1.5,
-                    'continuity_bonus': 0.2
-                }
-            }
-            
-            config = tolerance_config.get(strategy, {'base_tolerance': 2.5, 'effort_threshold': 2.0, 'continuity_bonus': 0.2})
+            config = self.EQUIPMENT_TOLERANCE_CONFIG.get(strategy, self.DEFAULT_TOLERANCE_CONFIG)
             base_tolerance = config['base_tolerance']
             
             # Ajustement tolérance selon flexibilité utilisateur
@@ -2227,7 +2348,7 @@ class FitnessRecommendationEngine:
             logger.warning(f"Erreur optimisation inter-sets: {e}")
             return {'weight': target_weight, 'optimization': 'error', 'reason': str(e)}
 
-    def _optimize_intra_session_advanced(self, current_exercise_id: int, target_weight: float, equipment_context: Dict, available_weights: List[float], coefficients, workout_id: int) -> Dict:
+    def _optimize_intra_session_advanced(self, current_exercise_id: int, target_weight: float, equipment_context: Dict, available_weights: Optional[AvailableWeights], coefficients, workout_id: int) -> Dict:
         """
         Optimisation intra-séance avec scoring matriciel complet
         """
@@ -2246,10 +2367,9 @@ class FitnessRecommendationEngine:
             weight_tolerance = target_weight * tolerance_pct
             
             # Candidats dans la tolérance
-            candidates = [
-                float(w) for w in available_weights 
-                if abs(w - target_weight) <= weight_tolerance
-            ]
+            candidates = AvailableWeights.coerce(available_weights).between(
+                target_weight - weight_tolerance, target_weight + weight_tolerance
+            )
             
             if len(candidates) < 2:
                 return {'weight': target_weight, 'reason': f'Un seul candidat dans tolérance ±{weight_tolerance:.1f}kg'}
@@ -2326,23 +2446,206 @@ class FitnessRecommendationEngine:
             logger.warning(f"Erreur optimisation intra-session: {e}")
             return {'weight': target_weight, 'optimization': 'error', 'reason': str(e)}
 
+    def plan_session_plate_changes(self, user: User, planned_sets: List[Dict], workout_id: Optional[int] = None) -> Dict:
+        """
+        Planifie les poids de toute une séance pour minimiser les changements de disques.
+        
+        planned_sets : [{'exercise_id', 'target_weight', 'tolerance' (optionnel)}] dans l'ordre prévu.
+        Sans tolérance explicite, on reprend celle de l'optimisation inter-séries
+        (stratégie d'équipement × flexibilité de l'utilisateur sur l'exercice).
+        """
+        catalog = get_catalog(self.db)
+        exercise_ids = {planned['exercise_id'] for planned in planned_sets}
+        flexibility = {
+            exercise_id: adaptability
+            for exercise_id, adaptability in self.db.query(
+                UserAdaptationCoefficients.exercise_id, UserAdaptationCoefficients.volume_adaptability
+            ).filter(
+                UserAdaptationCoefficients.user_id == user.id,
+                UserAdaptationCoefficients.exercise_id.in_(exercise_ids)
+            ).all()
+        }
+        
+        steps = []
+        for planned in planned_sets:
+            exercise = catalog.get(planned['exercise_id'])
+            equipment_context = self._classify_equipment_context(exercise) if exercise else {'type': 'other', 'optimization_strategy': 'none'}
+            table = EquipmentService.get_plate_layout_table(user.equipment_config, equipment_context['type'])
+            
+            tolerance = planned.get('tolerance')
+            if tolerance is None:
+                config = self.EQUIPMENT_TOLERANCE_CONFIG.get(equipment_context['optimization_strategy'], self.DEFAULT_TOLERANCE_CONFIG)
+                tolerance = config['base_tolerance'] * float(flexibility.get(planned['exercise_id']) or 1.0)
+            
+            steps.append({
+                'chain': equipment_context['type'],
+                'table': table,
+                'target': float(planned['target_weight']),
+                'tolerance': float(tolerance)
+            })
+        
+        # Poids déjà chargés sur chaque équipement dans la séance en cours
+        start_weights = {}
+        if workout_id:
+            for chain in {step['chain'] for step in steps if step['table'] is not None}:
+                last_weight = self._get_session_equipment_state(workout_id, chain).get('last_weight_same_equipment')
+                if last_weight:
+                    start_weights[chain] = float(last_weight)
+        
+        planned_weights = minimize_plate_changes(steps, start_weights)
+        
+        plan = []
+        for planned, step, result in zip(planned_sets, steps, planned_weights):
+            entry = {
+                'exercise_id': planned['exercise_id'],
+                'target_weight': step['target'],
+                'tolerance': round(step['tolerance'], 2),
+                'weight': result['weight'],
+                'plate_changes': result['changes'],
+                'weight_change': result['deviation'],
+                'equipment_type': step['chain']
+            }
+            if step['table'] is not None:
+                entry['plates_per_side'] = layout_to_plates(step['table'].layout(result['weight']))
+            plan.append(entry)
+        
+        return {
+            'sets': plan,
+            'total_plate_changes': sum(entry['plate_changes'] for entry in plan)
+        }
+
+    def get_session_recommendations(
+        self,
+        user: User,
+        planned_exercises: List[Dict],
+        current_fatigue: int = 3,
+        current_effort: int = 3
+    ) -> List[Dict]:
+        """
+        Recommandations de départ (série 1 : poids, reps, repos) pour toute une séance planifiée.
+        
+        planned_exercises : [{'exercise_id', 'sets' (optionnel)}] dans l'ordre prévu.
+        L'historique de tous les exercices, leurs états de performance et leurs coefficients
+        sont chargés en une requête chacun puis partagés via le contexte, avec les poids
+        disponibles ; chaque exercice passe ensuite par get_set_recommendations.
+        """
+        if self.context is None:
+            self.context = WorkoutRecommendationContext(None, user.id, [])
+        context = self.context
+        catalog = get_catalog(self.db)
+        
+        planned = []
+        for index, item in enumerate(planned_exercises):
+            exercise = catalog.get(item['exercise_id'])
+            if exercise is not None:
+                planned.append((index + 1, exercise, item.get('sets') or exercise.default_sets or 3))
+        exercise_ids = list({exercise.id for _, exercise, _ in planned})
+        if not exercise_ids:
+            return []
+        
+        # Historique des premières séries de tous les exercices (une requête)
+        missing_keys = [
+            (exercise.id, 1, order) for order, exercise, _ in planned
+            if (exercise.id, 1, order) not in context.historical
+        ]
+        if missing_keys:
+            rows = self.db.query(SetHistory).filter(
+                SetHistory.user_id == user.id,
+                SetHistory.exercise_id.in_({key[0] for key in missing_keys}),
+                SetHistory.set_number_in_exercise == 1
+            ).order_by(desc(SetHistory.date_performed), desc(SetHistory.id)).all()
+            for key in missing_keys:
+                context.historical[key] = [
+                    history_to_dict(row) for row in rows if history_matches(key, row)
+                ][:HISTORICAL_CONTEXT_LIMIT]
+        
+        # États de performance et coefficients (une requête chacun)
+        missing_states = [exercise_id for exercise_id in exercise_ids if exercise_id not in context.performance_states]
+        if missing_states:
+            states = {
+                state.exercise_id: state for state in self.db.query(PerformanceStates).filter(
+                    PerformanceStates.user_id == user.id,
+                    PerformanceStates.exercise_id.in_(missing_states)
+                )
+            }
+            for exercise_id in missing_states:
+                context.performance_states[exercise_id] = self._performance_snapshot(states.get(exercise_id))
+        
+        missing_coefficients = [exercise_id for exercise_id in exercise_ids if exercise_id not in context.coefficients]
+        if missing_coefficients:
+            rows = {
+                row.exercise_id: row for row in self.db.query(UserAdaptationCoefficients).filter(
+                    UserAdaptationCoefficients.user_id == user.id,
+                    UserAdaptationCoefficients.exercise_id.in_(missing_coefficients)
+                )
+            }
+            for exercise_id in missing_coefficients:
+                context.coefficients[exercise_id] = self._coefficient_values(rows.get(exercise_id))
+        
+        results = []
+        set_order_global = 1
+        for order, exercise, sets in planned:
+            available_weights = context.available_weights.get(exercise.id)
+            if available_weights is None:
+                available_weights = EquipmentService.get_available_weights(self.db, user.id, exercise)
+                context.available_weights[exercise.id] = available_weights
+            
+            recommendation = self.get_set_recommendations(
+                user=user,
+                exercise=exercise,
+                set_number=1,
+                current_fatigue=current_fatigue,
+                current_effort=current_effort,
+                exercise_order=order,
+                set_order_global=set_order_global,
+                available_weights=available_weights,
+                workout_id=context.workout_id
+            )
+            results.append({
+                'exercise_id': exercise.id,
+                'exercise_name': exercise.name,
+                'exercise_order': order,
+                'sets': sets,
+                'weight': recommendation.get('weight_recommendation'),
+                'reps': recommendation.get('reps_recommendation'),
+                'rest_seconds': recommendation.get('rest_seconds_recommendation'),
+                'confidence': recommendation.get('confidence'),
+                'reasoning': recommendation.get('reasoning'),
+                'plate_change_data': recommendation.get('plate_change_data')
+            })
+            set_order_global += sets
+        
+        return results
+
     # ═══════════ MÉTHODES HELPER DATA ═══════════
 
     def _get_session_equipment_state(self, workout_id: int, equipment_type: str) -> Dict:
         """Récupère état équipement - VERSION FONCTIONNELLE AVEC JSON"""
-        
-        # SOLUTION : Récupérer tous les sets avec exercices et filtrer en Python
-        sets_query = self.db.query(WorkoutSet, Exercise).join(
-            Exercise, WorkoutSet.exercise_id == Exercise.id
-        ).filter(
-            WorkoutSet.workout_id == workout_id
-        ).order_by(WorkoutSet.id.desc()).all()
+        # Types de _classify_equipment_context -> équipement tel que listé dans exercises.json
+        equipment_type = {
+            'barbell_athletic': 'barbell',
+            'dumbbells_adjustable': 'dumbbells'
+        }.get(equipment_type, equipment_type)
+        
+        if self.context is not None and self.context.workout_id == workout_id:
+            catalog = get_catalog(self.db)
+            sets_query = [
+                (workout_set, catalog.get(workout_set.exercise_id))
+                for workout_set in reversed(self.context.sets)
+            ]
+        else:
+            # SOLUTION : Récupérer tous les sets avec exercices et filtrer en Python
+            sets_query = self.db.query(WorkoutSet, Exercise).join(
+                Exercise, WorkoutSet.exercise_id == Exercise.id
+            ).filter(
+                WorkoutSet.workout_id == workout_id
+            ).order_by(WorkoutSet.id.desc()).all()
         
         # Filtrer en Python pour éviter problèmes SQL avec JSON
         for workout_set, exercise in sets_query:
             if (hasattr(exercise, 'equipment_required') and 
                 exercise.equipment_required and 
-                isinstance(exercise.equipment_required, list) and 
+                isinstance(exercise.equipment_required, (list, tuple)) and 
                 equipment_type in exercise.equipment_required):
                 
                 return {
@@ -2393,9 +2696,10 @@ class FitnessRecommendationEngine:
         
         return weights
 
-    def _reconstruct_plates_config(self, weight: float, equipment_type: str) -> List[Dict]:
+    def _reconstruct_plates_config(self, weight: float, equipment_type: str, user_equipment_config: Optional[Dict] = None) -> List[Dict]:
         """
-        Reconstitue la configuration de disques avec algorithme sophistiqué
+        Reconstitue la configuration de disques : chargement canonique précalculé
+        si l'équipement de l'utilisateur est connu, sinon algorithme glouton sur disques standards
         """
         if not weight or weight <= 0:
             return []
@@ -2403,6 +2707,19 @@ class FitnessRecommendationEngine:
         try:
             weight = float(weight)
             
+            table = EquipmentService.get_plate_layout_table(user_equipment_config, equipment_type) if user_equipment_config else None
+            if table:
+                layout = table.layout(table.nearest(weight))
+                plate_multiplier = table.slots // 2  # 2 dumbbells donc double les disques
+                return [
+                    {
+                        'weight': float(plate_weight),
+                        'count': int(side_count * plate_multiplier),
+                        'side_count': int(side_count)
+                    }
+                    for plate_weight, side_count in layout
+                ]
+            
             # Calcul charge par côté selon équipement
             if equipment_type == 'barbell_athletic':
                 bar_weight = 20.0
@@ -2494,10 +2811,13 @@ class FitnessRecommendationEngine:
         current_config: List[Dict], 
         target_weight: float,
         equipment_context: Dict,
-        user_equipment_config: Dict
+        user_equipment_config: Dict,
+        current_weight: Optional[float] = None
     ) -> Dict:
         """
         Calcule les changements de disques nécessaires pour modal UI - VERSION COMPLÈTE
+        Si l'équipement de l'utilisateur est connu, lit la transition précalculée
+        depuis current_weight (barre vide par défaut) au lieu de comparer les chargements.
         """
         if not target_weight or target_weight <= 0:
             return {
@@ -2508,32 +2828,51 @@ class FitnessRecommendationEngine:
             }
 
         try:
-            # Calculer configuration cible avec gestion d'erreurs
-            target_config = self._reconstruct_plates_config(
-                float(target_weight), 
-                equipment_context.get('type', 'other')
-            )
-            
-            # Algorithme de comparaison sophistiqué
-            current_dict = {}
-            for plate in current_config:
-                if isinstance(plate, dict) and 'weight' in plate and 'count' in plate:
-                    try:
-                        weight_key = float(plate['weight'])
-                        count_val = int(plate['count'])
-                        current_dict[weight_key] = current_dict.get(weight_key, 0) + count_val
-                    except (ValueError, TypeError):
-                        continue
-            
-            target_dict = {}
-            for plate in target_config:
-                if isinstance(plate, dict) and 'weight' in plate and 'count' in plate:
-                    try:
-                        weight_key = float(plate['weight'])
-                        count_val = int(plate['count'])
-                        target_dict[weight_key] = target_dict.get(weight_key, 0) + count_val
-                    except (ValueError, TypeError):
-                        continue
+            table = None
+            if user_equipment_config:
+                table = EquipmentService.get_plate_layout_table(user_equipment_config, equipment_context.get('type', 'other'))
+            
+            diffs = {}
+            if table:
+                # Transition précalculée entre chargements canoniques
+                plate_multiplier = table.slots // 2
+                from_weight = float(current_weight) if current_weight else table.bar_weight * table.bars
+                from_weight = from_weight if table.layout(from_weight) else table.nearest(from_weight)
+                transition = table.transition(from_weight, table.nearest(float(target_weight)))
+                for weight, count in transition['add']:
+                    diffs[weight] = count * plate_multiplier
+                for weight, count in transition['remove']:
+                    diffs[weight] = -count * plate_multiplier
+            else:
+                # Calculer configuration cible avec gestion d'erreurs
+                target_config = self._reconstruct_plates_config(
+                    float(target_weight), 
+                    equipment_context.get('type', 'other')
+                )
+                
+                # Algorithme de comparaison sophistiqué
+                current_dict = {}
+                for plate in current_config:
+                    if isinstance(plate, dict) and 'weight' in plate and 'count' in plate:
+                        try:
+                            weight_key = float(plate['weight'])
+                            count_val = int(plate['count'])
+                            current_dict[weight_key] = current_dict.get(weight_key, 0) + count_val
+                        except (ValueError, TypeError):
+                            continue
+                
+                target_dict = {}
+                for plate in target_config:
+                    if isinstance(plate, dict) and 'weight' in plate and 'count' in plate:
+                        try:
+                            weight_key = float(plate['weight'])
+                            count_val = int(plate['count'])
+                            target_dict[weight_key] = target_dict.get(weight_key, 0) + count_val
+                        except (ValueError, TypeError):
+                            continue
+                
+                for weight in set(current_dict.keys()) | set(target_dict.keys()):
+                    diffs[weight] = target_dict.get(weight, 0) - current_dict.get(weight, 0)
             
             changes_needed = {
                 'add_plates': [],
@@ -2544,13 +2883,9 @@ class FitnessRecommendationEngine:
             }
             
             # Calcul des changements avec optimisation de l'ordre
-            all_weights = sorted(set(current_dict.keys()) | set(target_dict.keys()), reverse=True)
-            
             total_operations = 0
-            for weight in all_weights:
-                current_count = current_dict.get(weight, 0)
-                target_count = target_dict.get(weight, 0)
-                diff = target_count - current_count
+            for weight in sorted(diffs, reverse=True):
+                diff = diffs[weight]
                 
                 if diff > 0:
                     # Calculer nombre de côtés selon équipement
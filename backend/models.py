@@ -184,6 +184,9 @@ class SetHistory(Base):
     user = relationship("User")
     exercise = relationship("Exercise")
     workout = relationship("Workout")  # OK avec le FK ajouté
+    
+    # Records battus par la série, renseigné à l'enregistrement (non persisté, cf. backend.personal_records)
+    new_records = ()
 
 class ExerciseCompletionStats(Base):
     """Table de cache pour les statistiques d'exercices - Alternative à la vue matérialisée"""
@@ -214,7 +217,7 @@ class ExerciseCompletionStats(Base):
     
     # Index composé pour les requêtes fréquentes
     __table_args__ = (
-        Index('idx_user_exercise_stats', 'user_id', 'exercise_id'),
+        Index('idx_user_exercise_stats', 'user_id', 'exercise_id', unique=True),
         Index('idx_user_last_performed', 'user_id', 'last_performed'),
     )
     
@@ -324,6 +327,25 @@ class PerformanceStates(Base):
         Index('idx_user_exercise_performance', 'user_id', 'exercise_id', unique=True),
     )
 
+class FitnessFatigueSums(Base):
+    """Sommes du modèle fitness/fatigue par utilisateur-exercice, à l'instant as_of (cf. backend.fitness_fatigue)"""
+    __tablename__ = "fitness_fatigue_states"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    exercise_id = Column(Integer, ForeignKey("exercises.id"), nullable=False)
+
+    as_of = Column(DateTime, nullable=False)
+    fitness = Column(Float, default=0.0)
+    fatigue = Column(Float, default=0.0)
+    potential_sum = Column(Float, default=0.0)  # scores des séries réussies, noyau fitness
+    potential_weight = Column(Float, default=0.0)
+    set_count = Column(Integer, default=0)
+
+    __table_args__ = (
+        Index('idx_fitness_fatigue_states_key', 'user_id', 'exercise_id', unique=True),
+    )
+
 class SwapLog(Base):
     __tablename__ = "swap_logs"
     
@@ -345,4 +367,88 @@ class SwapLog(Base):
     # Index
     __table_args__ = (
         Index('idx_swap_user_original', 'user_id', 'original_exercise_id'),
-    )
\ No newline at end of file
+    )
+class CatalogSyncState(Base):
+    """Empreinte du dernier fichier de catalogue synchronisé (une ligne par source)"""
+    __tablename__ = "catalog_sync_state"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String(100), nullable=False, unique=True)  # "exercises.json"
+    file_hash = Column(String(64), nullable=False)  # sha256 du fichier
+    exercise_count = Column(Integer, default=0)
+    synced_at = Column(DateTime, default=datetime.now(timezone.utc))
+
+class BackgroundJob(Base):
+    """File de traitements différés (post-séance), partagée par les workers"""
+    __tablename__ = "background_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(String(50), nullable=False)  # stats_refresh, targets_recalibration, ...
+    payload = Column(JSON, nullable=False, default=lambda: {})
+    dedupe_key = Column(String(200), nullable=True)  # une seule tâche en attente par clé
+    status = Column(String(20), nullable=False, default="pending")  # pending, running, done, failed
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=5)
+    run_after = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    locked_by = Column(String(100), nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    finished_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        Index('idx_job_status_run_after', 'status', 'run_after'),
+        Index('idx_job_dedupe_status', 'dedupe_key', 'status'),
+    )
+
+class DailyMuscleVolume(Base):
+    """Cumul quotidien par utilisateur et groupe / muscle (maintenu à chaque série enregistrée ou supprimée)"""
+    __tablename__ = "daily_muscle_volume"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    day = Column(Date, nullable=False)  # date de début de la séance
+    muscle_group = Column(String(50), nullable=False)
+    muscle = Column(String(50), nullable=False, default="")  # "" = total du groupe
+    sets = Column(Float, default=0)  # parts de séries (une série répartie entre ses groupes)
+    reps = Column(Float, default=0)
+    volume = Column(Float, default=0)  # poids × reps
+    effort_points = Column(Float, default=0)  # cf. backend.volume.compute_volumes
+    
+    __table_args__ = (
+        Index('idx_daily_muscle_volume_key', 'user_id', 'day', 'muscle_group', 'muscle', unique=True),
+    )
+
+class PersonalRecord(Base):
+    """Records personnels par utilisateur et exercice (mis à jour à chaque série enregistrée)"""
+    __tablename__ = "personal_records"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    exercise_id = Column(Integer, ForeignKey("exercises.id"), nullable=False)
+    
+    # Charge la plus lourde (à égalité, la série avec le plus de reps)
+    max_weight = Column(Float, nullable=True)
+    max_weight_reps = Column(Integer, nullable=True)
+    max_weight_fatigue = Column(Integer, nullable=True)
+    max_weight_effort = Column(Integer, nullable=True)
+    max_weight_at = Column(DateTime, nullable=True)
+    
+    # Meilleur 1RM estimé (Epley)
+    best_1rm = Column(Float, nullable=True)
+    best_1rm_weight = Column(Float, nullable=True)
+    best_1rm_reps = Column(Integer, nullable=True)
+    best_1rm_at = Column(DateTime, nullable=True)
+    
+    # Meilleures reps par tranche de charge : {"40.0": {"reps": 10, "at": "2024-01-01T..."}}
+    reps_by_weight = Column(JSON, nullable=True, default=lambda: {})
+    
+    # Maintien isométrique le plus long (secondes)
+    max_hold_seconds = Column(Integer, nullable=True)
+    max_hold_at = Column(DateTime, nullable=True)
+    
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    
+    __table_args__ = (
+        Index('idx_personal_records_key', 'user_id', 'exercise_id', unique=True),
+    )
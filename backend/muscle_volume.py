@@ -0,0 +1,323 @@
+# backend/muscle_volume.py
+"""
+Cumul quotidien du volume par utilisateur, groupe musculaire et muscle (table
+daily_muscle_volume).
+
+Chaque série est répartie une fois, à l'enregistrement : part égale entre les groupes
+de l'exercice, puis, dans chaque groupe, entre les muscles de l'exercice (ou ceux du
+groupe par défaut). Une ligne muscle = "" porte le total du groupe. Les statistiques
+lisent quelques centaines de lignes agrégées au lieu de toutes les séries de la période.
+
+Seules les séances terminées (status "completed") comptent : apply_workout() quand une
+séance passe à "completed", apply_sets() pour les séries ajoutées ensuite à une séance
+terminée, remove_workouts() avant la suppression ou l'abandon de séances (sans effet sur
+celles qui ne sont pas terminées), delete_user_rows() avec l'historique d'un utilisateur.
+Les séries d'une séance en cours ou abandonnée n'y figurent jamais.
+Les points d'effort des exercices au poids du corps et hybrides dépendent du poids et
+du niveau de l'utilisateur : leur modification reconstruit ses lignes (tâche
+muscle_volume_rebuild, cf. update_user).
+Reconstruction complète : rebuild() ou `python -m backend.muscle_volume [user_id]`.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from .exercise_catalog import get_catalog
+from .models import DailyMuscleVolume, User, Workout, WorkoutSet
+from .volume import compute_volumes
+
+logger = logging.getLogger(__name__)
+
+# Muscles par défaut d'un groupe (exercices sans muscles détaillés)
+MUSCLES_BY_GROUP = {
+    "dos": ["trapezes", "grand-dorsal", "lombaires"],
+    "pectoraux": ["pectoraux-superieurs", "pectoraux-inferieurs"],
+    "jambes": ["quadriceps", "ischio-jambiers", "fessiers", "mollets"],
+    "epaules": ["deltoides-anterieurs", "deltoides-lateraux", "deltoides-posterieurs"],
+    "bras": ["biceps", "triceps"],
+    "abdominaux": ["abdominaux", "obliques"]
+}
+
+GROUP_TOTAL = ""
+VOLUME_FIELDS = ('sets', 'reps', 'volume', 'effort_points')
+# Lignes vidées par des suppressions (arrondis flottants)
+EMPTY_EPSILON = 1e-6
+
+RollupKey = Tuple[int, date, str, str]  # user_id, jour, groupe, muscle
+
+
+def muscles_for_group(muscle_group: str) -> List[str]:
+    return MUSCLES_BY_GROUP.get(muscle_group, [])
+
+
+def _workout_day(started_at: Optional[datetime]) -> date:
+    return (started_at or datetime.now(timezone.utc)).date()
+
+
+def _contributions(user: User, rows: List[Tuple], sign: float = 1.0,
+                   estimate_weight: Optional[Callable] = None) -> Dict[RollupKey, List[float]]:
+    """
+    Parts de chaque série par (utilisateur, jour, groupe, muscle).
+    rows : (jour, exercice du catalogue, poids, reps, effort) d'un même utilisateur.
+    """
+    totals: Dict[RollupKey, List[float]] = defaultdict(lambda: [0.0, 0.0, 0.0, 0.0])
+    if not rows:
+        return totals
+
+    effort_points = compute_volumes(
+        [row[2] for row in rows], [row[3] for row in rows], [row[4] for row in rows],
+        [row[1] for row in rows], user, estimate_weight=estimate_weight
+    ).tolist()
+
+    for (day, exercise, weight, reps, _), points in zip(rows, effort_points):
+        groups = list(exercise.muscle_groups or ())
+        if not groups:
+            continue
+        reps = reps or 0
+        values = (1.0, float(reps), float((weight or 0) * reps), points)
+        group_share = sign / len(groups)
+        for group in groups:
+            group_values = [value * group_share for value in values]
+            total = totals[(user.id, day, group, GROUP_TOTAL)]
+            for index, value in enumerate(group_values):
+                total[index] += value
+            muscles = list(exercise.muscles or ()) or muscles_for_group(group)
+            for muscle in muscles:
+                muscle_total = totals[(user.id, day, group, muscle)]
+                for index, value in enumerate(group_values):
+                    muscle_total[index] += value / len(muscles)
+    return totals
+
+
+def _upsert_increments(db: Session, increments: Dict[RollupKey, List[float]]):
+    """Ajoute les valeurs aux lignes existantes (créées si absentes), en une requête"""
+    if not increments:
+        return
+    rows = [
+        {
+            'user_id': user_id, 'day': day, 'muscle_group': group, 'muscle': muscle,
+            **dict(zip(VOLUME_FIELDS, values))
+        }
+        for (user_id, day, group, muscle), values in increments.items()
+    ]
+    dialect = db.get_bind().dialect.name
+
+    if dialect in ("postgresql", "sqlite"):
+        insert_for = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        statement = insert_for(DailyMuscleVolume).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[
+                DailyMuscleVolume.user_id, DailyMuscleVolume.day,
+                DailyMuscleVolume.muscle_group, DailyMuscleVolume.muscle
+            ],
+            set_={
+                name: getattr(DailyMuscleVolume, name) + getattr(statement.excluded, name)
+                for name in VOLUME_FIELDS
+            }
+        )
+        db.execute(statement)
+        return
+
+    # Autres bases : lecture puis mise à jour ligne par ligne
+    for row in rows:
+        existing = db.query(DailyMuscleVolume).filter(
+            DailyMuscleVolume.user_id == row['user_id'],
+            DailyMuscleVolume.day == row['day'],
+            DailyMuscleVolume.muscle_group == row['muscle_group'],
+            DailyMuscleVolume.muscle == row['muscle']
+        ).first()
+        if existing is None:
+            db.add(DailyMuscleVolume(**row))
+        else:
+            for name in VOLUME_FIELDS:
+                setattr(existing, name, (getattr(existing, name) or 0) + row[name])
+    db.flush()
+
+
+# ===== MAINTENANCE INCRÉMENTALE =====
+
+def apply_sets(db: Session, user: User, workout: Workout, sets: Iterable[WorkoutSet],
+               sign: float = 1.0, estimate_weight: Optional[Callable] = None):
+    """Répercute des séries d'une séance sur le cumul (sign=-1 pour les retirer), sans commit"""
+    catalog = get_catalog(db)
+    day = _workout_day(workout.started_at)
+    rows = [
+        (day, catalog.get(workout_set.exercise_id), workout_set.weight, workout_set.reps, workout_set.effort_level)
+        for workout_set in sets
+        if catalog.get(workout_set.exercise_id) is not None
+    ]
+    _upsert_increments(db, _contributions(user, rows, sign, estimate_weight))
+
+
+def apply_workout(db: Session, workout: Workout, estimate_weight: Optional[Callable] = None):
+    """Ajoute au cumul toutes les séries d'une séance qui vient d'être terminée, sans commit"""
+    if estimate_weight is None:
+        from .ml_recommendations import FitnessRecommendationEngine
+        estimate_weight = FitnessRecommendationEngine(db)._estimate_initial_weight
+    sets = db.query(WorkoutSet).filter(WorkoutSet.workout_id == workout.id).all()
+    apply_sets(db, workout.user, workout, sets, estimate_weight=estimate_weight)
+
+
+def remove_workouts(db: Session, workout_ids: List[int], estimate_weight: Optional[Callable] = None):
+    """
+    Retire du cumul les séries de séances sur le point d'être supprimées ou abandonnées,
+    sans commit. À appeler avant le changement de statut : seules les séances encore
+    terminées y figurent.
+    """
+    if not workout_ids:
+        return
+    catalog = get_catalog(db)
+    by_user: Dict[int, List[Tuple]] = defaultdict(list)
+    for user_id, started_at, exercise_id, weight, reps, effort_level in db.query(
+        Workout.user_id, Workout.started_at, WorkoutSet.exercise_id,
+        WorkoutSet.weight, WorkoutSet.reps, WorkoutSet.effort_level
+    ).join(Workout, WorkoutSet.workout_id == Workout.id).filter(
+        Workout.id.in_(workout_ids), Workout.status == "completed"
+    ):
+        exercise = catalog.get(exercise_id)
+        if exercise is not None:
+            by_user[user_id].append((_workout_day(started_at), exercise, weight, reps, effort_level))
+    if not by_user:
+        return
+
+    users = {user.id: user for user in db.query(User).filter(User.id.in_(list(by_user)))}
+    increments: Dict[RollupKey, List[float]] = {}
+    for user_id, rows in by_user.items():
+        if user_id in users:
+            increments.update(_contributions(users[user_id], rows, -1.0, estimate_weight))
+    _upsert_increments(db, increments)
+    db.query(DailyMuscleVolume).filter(
+        DailyMuscleVolume.user_id.in_(list(by_user)),
+        DailyMuscleVolume.sets < EMPTY_EPSILON
+    ).delete(synchronize_session=False)
+
+
+def delete_user_rows(db: Session, user_id: int):
+    db.query(DailyMuscleVolume).filter(DailyMuscleVolume.user_id == user_id).delete(synchronize_session=False)
+
+
+def rebuild(db: Session, user_id: Optional[int] = None) -> int:
+    """Recalcule le cumul depuis les séances terminées (un utilisateur ou tous) et commit ; retourne le nombre de lignes"""
+    from .ml_recommendations import FitnessRecommendationEngine
+
+    estimate_weight = FitnessRecommendationEngine(db)._estimate_initial_weight
+    catalog = get_catalog(db)
+
+    cleared = db.query(DailyMuscleVolume)
+    users_query = db.query(User)
+    if user_id is not None:
+        cleared = cleared.filter(DailyMuscleVolume.user_id == user_id)
+        users_query = users_query.filter(User.id == user_id)
+    cleared.delete(synchronize_session=False)
+
+    written = 0
+    for user in users_query.all():
+        rows = [
+            (_workout_day(started_at), catalog.get(exercise_id), weight, reps, effort_level)
+            for started_at, exercise_id, weight, reps, effort_level in db.query(
+                Workout.started_at, WorkoutSet.exercise_id,
+                WorkoutSet.weight, WorkoutSet.reps, WorkoutSet.effort_level
+            ).join(Workout, WorkoutSet.workout_id == Workout.id).filter(
+                Workout.user_id == user.id, Workout.status == "completed"
+            )
+            if catalog.get(exercise_id) is not None
+        ]
+        totals = _contributions(user, rows, estimate_weight=estimate_weight)
+        if totals:
+            db.bulk_insert_mappings(DailyMuscleVolume, [
+                {
+                    'user_id': key[0], 'day': key[1], 'muscle_group': key[2], 'muscle': key[3],
+                    **dict(zip(VOLUME_FIELDS, values))
+                }
+                for key, values in totals.items()
+            ])
+            written += len(totals)
+    db.commit()
+    logger.info(f"Cumul volume musculaire reconstruit: {written} lignes")
+    return written
+
+
+def is_empty(db: Session) -> bool:
+    return db.query(DailyMuscleVolume.id).first() is None
+
+
+# ===== LECTURES =====
+
+def group_totals(db: Session, user_id: int, start_day: date, end_day: Optional[date] = None):
+    """Lignes (day, muscle_group, sets, reps, volume, effort_points) des totaux de groupe"""
+    query = db.query(
+        DailyMuscleVolume.day, DailyMuscleVolume.muscle_group,
+        DailyMuscleVolume.sets, DailyMuscleVolume.reps,
+        DailyMuscleVolume.volume, DailyMuscleVolume.effort_points
+    ).filter(
+        DailyMuscleVolume.user_id == user_id,
+        DailyMuscleVolume.muscle == GROUP_TOTAL,
+        DailyMuscleVolume.day >= start_day
+    )
+    if end_day is not None:
+        query = query.filter(DailyMuscleVolume.day <= end_day)
+    return query.all()
+
+
+def muscle_totals(db: Session, user_id: int, start_day: date) -> Dict[str, Dict[str, float]]:
+    """{groupe: {muscle: volume}} sur la période"""
+    result: Dict[str, Dict[str, float]] = defaultdict(dict)
+    for group, muscle, volume in db.query(
+        DailyMuscleVolume.muscle_group, DailyMuscleVolume.muscle, func.sum(DailyMuscleVolume.volume)
+    ).filter(
+        DailyMuscleVolume.user_id == user_id,
+        DailyMuscleVolume.muscle != GROUP_TOTAL,
+        DailyMuscleVolume.day >= start_day
+    ).group_by(DailyMuscleVolume.muscle_group, DailyMuscleVolume.muscle):
+        result[group][muscle] = float(volume or 0)
+    return result
+
+
+def volume_by_group(db: Session, user_id: int, start_day: date, field: str = 'volume') -> Dict[str, float]:
+    """{groupe: total} sur la période pour un champ du cumul"""
+    column = getattr(DailyMuscleVolume, field)
+    return {
+        group: float(total or 0)
+        for group, total in db.query(DailyMuscleVolume.muscle_group, func.sum(column)).filter(
+            DailyMuscleVolume.user_id == user_id,
+            DailyMuscleVolume.muscle == GROUP_TOTAL,
+            DailyMuscleVolume.day >= start_day
+        ).group_by(DailyMuscleVolume.muscle_group)
+    }
+
+
+def daily_totals(db: Session, user_id: int, start_day: date) -> Dict[date, Dict[str, float]]:
+    """{jour: {sets, reps, volume, effort_points}} tous groupes confondus"""
+    return {
+        day: {'sets': float(sets or 0), 'reps': float(reps or 0),
+              'volume': float(volume or 0), 'effort_points': float(points or 0)}
+        for day, sets, reps, volume, points in db.query(
+            DailyMuscleVolume.day,
+            func.sum(DailyMuscleVolume.sets), func.sum(DailyMuscleVolume.reps),
+            func.sum(DailyMuscleVolume.volume), func.sum(DailyMuscleVolume.effort_points)
+        ).filter(
+            DailyMuscleVolume.user_id == user_id,
+            DailyMuscleVolume.muscle == GROUP_TOTAL,
+            DailyMuscleVolume.day >= start_day
+        ).group_by(DailyMuscleVolume.day)
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    from .database import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        target = int(sys.argv[1]) if len(sys.argv) > 1 else None
+        print(f"{rebuild(db, target)} lignes écrites")
+    finally:
+        db.close()
@@ -0,0 +1,175 @@
+# backend/personal_records.py
+"""
+Records personnels par utilisateur et exercice (table personal_records).
+
+Une ligne par (utilisateur, exercice), mise à jour en O(1) à chaque série enregistrée
+(FitnessRecommendationEngine.record_sets_performance) :
+- charge la plus lourde (reps, fatigue, effort et date de la série)
+- meilleur 1RM estimé (Epley)
+- meilleures reps par tranche de charge (WEIGHT_BAND_KG)
+- maintien isométrique le plus long (reps = secondes)
+apply_set() retourne les records battus par la série (détection en direct) ; la première
+série d'un exercice fixe les valeurs sans compter comme record battu.
+
+L'historique (set_history) n'est supprimé qu'avec l'utilisateur : les records restent
+exacts sans recalcul. Reconstruction complète : rebuild(), tâche pr_update ou
+`python -m backend.personal_records [user_id]`.
+"""
+
+import logging
+import math
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from .exercise_catalog import get_catalog
+from .models import PersonalRecord, SetHistory
+
+logger = logging.getLogger(__name__)
+
+WEIGHT_BAND_KG = 2.5
+
+MAX_WEIGHT = "max_weight"
+ESTIMATED_1RM = "estimated_1rm"
+REPS_AT_WEIGHT = "reps_at_weight"
+MAX_HOLD = "max_hold"
+
+
+def weight_band(weight: float) -> str:
+    """Tranche de charge (borne inférieure, multiple de WEIGHT_BAND_KG)"""
+    return f"{math.floor((weight or 0) / WEIGHT_BAND_KG) * WEIGHT_BAND_KG:.1f}"
+
+
+def estimated_1rm(weight: float, reps: int) -> Optional[float]:
+    """1RM estimé (Epley), None sans charge"""
+    if not weight or weight <= 0 or not reps or reps <= 0:
+        return None
+    return weight * (1 + reps / 30)
+
+
+def new_record(user_id: int, exercise_id: int) -> PersonalRecord:
+    return PersonalRecord(user_id=user_id, exercise_id=exercise_id, reps_by_weight={})
+
+
+def load(db: Session, user_id: int, exercise_id: int) -> PersonalRecord:
+    """Ligne de records à mettre à jour (créée si absente)"""
+    record = db.query(PersonalRecord).filter(
+        PersonalRecord.user_id == user_id,
+        PersonalRecord.exercise_id == exercise_id
+    ).first()
+    if record is None:
+        record = new_record(user_id, exercise_id)
+        db.add(record)
+    return record
+
+
+def apply_set(record: PersonalRecord, exercise, weight: Optional[float], reps: int,
+              fatigue_level: Optional[int] = None, effort_level: Optional[int] = None,
+              achieved_at: Optional[datetime] = None) -> List[str]:
+    """Met à jour les records avec une série ; retourne les records battus"""
+    achieved_at = achieved_at or datetime.now(timezone.utc)
+    weight = weight or 0
+    reps = reps or 0
+    isometric = exercise is not None and exercise.exercise_type == "isometric"
+    beaten = []
+
+    if isometric and (record.max_hold_seconds is None or reps > record.max_hold_seconds):
+        if record.max_hold_seconds is not None:
+            beaten.append(MAX_HOLD)
+        record.max_hold_seconds = reps
+        record.max_hold_at = achieved_at
+
+    # Charge la plus lourde (à égalité de charge, la série avec le plus de reps)
+    if (record.max_weight is None or weight > record.max_weight
+            or (weight == record.max_weight and reps > (record.max_weight_reps or 0))):
+        if record.max_weight is not None and weight > record.max_weight:
+            beaten.append(MAX_WEIGHT)
+        record.max_weight = weight
+        record.max_weight_reps = reps
+        record.max_weight_fatigue = fatigue_level
+        record.max_weight_effort = effort_level
+        record.max_weight_at = achieved_at
+
+    # 1RM et reps par tranche : sans objet pour un maintien isométrique (reps = secondes)
+    one_rm = None if isometric else estimated_1rm(weight, reps)
+    if one_rm is not None and (record.best_1rm is None or one_rm > record.best_1rm):
+        if record.best_1rm is not None:
+            beaten.append(ESTIMATED_1RM)
+        record.best_1rm = one_rm
+        record.best_1rm_weight = weight
+        record.best_1rm_reps = reps
+        record.best_1rm_at = achieved_at
+
+    if not isometric and reps > 0:
+        # Nouveau dict : la colonne JSON n'est pas suivie en place
+        band = weight_band(weight)
+        bands = dict(record.reps_by_weight or {})
+        best = bands.get(band)
+        if best is None or reps > best["reps"]:
+            if best is not None:
+                beaten.append(REPS_AT_WEIGHT)
+            bands[band] = {"reps": reps, "at": achieved_at.isoformat()}
+            record.reps_by_weight = bands
+
+    record.updated_at = datetime.now(timezone.utc)
+    return beaten
+
+
+def delete_user_rows(db: Session, user_id: int):
+    db.query(PersonalRecord).filter(PersonalRecord.user_id == user_id).delete(synchronize_session=False)
+
+
+def rebuild(db: Session, user_id: Optional[int] = None) -> int:
+    """Recalcule les records depuis set_history (un utilisateur ou tous) et commit ; retourne le nombre de lignes"""
+    catalog = get_catalog(db)
+
+    cleared = db.query(PersonalRecord)
+    history = db.query(
+        SetHistory.user_id, SetHistory.exercise_id, SetHistory.weight, SetHistory.actual_reps,
+        SetHistory.fatigue_level, SetHistory.effort_level, SetHistory.date_performed
+    )
+    if user_id is not None:
+        cleared = cleared.filter(PersonalRecord.user_id == user_id)
+        history = history.filter(SetHistory.user_id == user_id)
+    cleared.delete(synchronize_session=False)
+
+    # Dans l'ordre d'enregistrement, comme la mise à jour incrémentale
+    records: Dict[Tuple[int, int], PersonalRecord] = {}
+    for row in history.order_by(SetHistory.id).yield_per(1000):
+        record = records.get((row.user_id, row.exercise_id))
+        if record is None:
+            record = records[(row.user_id, row.exercise_id)] = new_record(row.user_id, row.exercise_id)
+        apply_set(record, catalog.get(row.exercise_id), row.weight, row.actual_reps,
+                  row.fatigue_level, row.effort_level, row.date_performed)
+
+    db.add_all(records.values())
+    db.commit()
+    logger.info(f"Records personnels reconstruits: {len(records)} lignes")
+    return len(records)
+
+
+def is_empty(db: Session) -> bool:
+    return db.query(PersonalRecord.id).first() is None
+
+
+def records_for_user(db: Session, user_id: int) -> List[PersonalRecord]:
+    """Records d'un utilisateur (index user_id, exercise_id), charge la plus lourde d'abord"""
+    return db.query(PersonalRecord).filter(
+        PersonalRecord.user_id == user_id,
+        PersonalRecord.max_weight.isnot(None)
+    ).order_by(PersonalRecord.max_weight.desc()).all()
+
+
+if __name__ == "__main__":
+    import sys
+
+    from .database import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        target = int(sys.argv[1]) if len(sys.argv) > 1 else None
+        print(f"{rebuild(db, target)} lignes écrites")
+    finally:
+        db.close()
@@ -0,0 +1,232 @@
+# backend/plate_layouts.py
+"""
+Tables de chargement de disques précalculées par profil d'équipement.
+
+Pour une barre (ou une paire de barres courtes) et un inventaire de disques,
+chaque poids réalisable est associé UNE fois à un chargement canonique
+(le moins de disques possible, symétrique). Les transitions entre chargements
+(disques à ajouter / retirer) sont précalculées entre poids voisins à la
+construction de la table ; les autres paires se calculent à la demande (simple
+différence de deux chargements, sans mémorisation : la table, partagée entre
+requêtes, garde une taille fixe).
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from .available_weights import AvailableWeights
+from .load_combinations import SCALE, reachable_assignments
+
+# Nombre de profils (barre, inventaire) gardés en mémoire par worker
+LAYOUT_TABLE_CACHE_SIZE = 256
+
+# Chargement d'un emplacement (un côté de barre) : ((poids disque, nombre), ...) gros disques d'abord
+SlotLayout = Tuple[Tuple[float, int], ...]
+
+
+def _key(weight: float) -> int:
+    return int(round(float(weight) * SCALE))
+
+
+class PlateLayoutTable:
+    """
+    Chargements canoniques et transitions pour une barre (bars=1, disques par paires)
+    ou une paire de barres courtes identiques (bars=2, disques par groupes de 4).
+    Les quantités de disques sont données PAR EMPLACEMENT (un côté d'une barre).
+    """
+
+    def __init__(self, bar_weight: float, plates: dict, bars: int = 1, group_size: int = 2):
+        self.bar_weight = float(bar_weight)
+        self.bars = bars
+        self.group_size = group_size
+        self.slots = group_size  # nombre de côtés chargés (2 pour une barre, 4 pour une paire)
+
+        base = self.bar_weight * bars
+        self._layouts: Dict[int, SlotLayout] = {}
+        for plates_total, per_slot in reachable_assignments(plates, group_size=group_size).items():
+            total = round(base + plates_total, 3)
+            self._layouts[_key(total)] = tuple(sorted(per_slot.items(), reverse=True))
+        self.weights = AvailableWeights(key / SCALE for key in self._layouts)
+
+        # Transitions entre poids voisins (les plus demandées), les autres à la demande
+        self._transitions: Dict[Tuple[int, int], Dict] = {}
+        for lower, upper in zip(self.weights, self.weights[1:]):
+            for key in ((_key(lower), _key(upper)), (_key(upper), _key(lower))):
+                self._transitions[key] = self._diff(self._layouts[key[0]], self._layouts[key[1]])
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    @property
+    def totals(self) -> Tuple[float, ...]:
+        return tuple(self.weights)
+
+    # ===== RECHERCHES =====
+
+    def floor(self, total: float) -> Optional[float]:
+        return self.weights.floor(total)
+
+    def ceil(self, total: float) -> Optional[float]:
+        return self.weights.ceil(total)
+
+    def nearest(self, total: float) -> Optional[float]:
+        return self.weights.nearest(total)
+
+    def layout(self, total: float) -> Optional[SlotLayout]:
+        """Chargement canonique d'un côté pour un poids exact, None si non réalisable"""
+        return self._layouts.get(_key(total))
+
+    def loading(self, total: float) -> Optional[Dict]:
+        """Détail du chargement pour un poids exact, None si non réalisable"""
+        layout = self.layout(total)
+        if layout is None:
+            return None
+        plates_per_side = dict(layout)
+        per_bar = self.bar_weight + 2 * sum(weight * count for weight, count in layout)
+        return {
+            'total_weight': round(float(total), 3),
+            'per_bar': round(per_bar, 3),
+            'bar_weight': self.bar_weight,
+            'plates_per_side': plates_per_side
+        }
+
+    # ===== TRANSITIONS =====
+
+    def transition(self, from_total: float, to_total: float) -> Optional[Dict]:
+        """
+        Disques à retirer / ajouter sur CHAQUE emplacement pour passer d'un poids à l'autre.
+        'changes' compte les manipulations par emplacement (retraits + ajouts).
+        """
+        key = (_key(from_total), _key(to_total))
+        precomputed = self._transitions.get(key)
+        if precomputed is not None:
+            return precomputed
+
+        current, target = self._layouts.get(key[0]), self._layouts.get(key[1])
+        if current is None or target is None:
+            return None
+        return self._diff(current, target)
+
+    @staticmethod
+    def _diff(current: SlotLayout, target: SlotLayout) -> Dict:
+        current_counts, target_counts = dict(current), dict(target)
+        add, remove = [], []
+        for weight in sorted(set(current_counts) | set(target_counts), reverse=True):
+            diff = target_counts.get(weight, 0) - current_counts.get(weight, 0)
+            if diff > 0:
+                add.append((weight, diff))
+            elif diff < 0:
+                remove.append((weight, -diff))
+
+        return {
+            'add': tuple(add),
+            'remove': tuple(remove),
+            'changes': sum(count for _, count in add) + sum(count for _, count in remove)
+        }
+
+    def cheapest_change(self, from_total: float, target: float, tolerance: float) -> Optional[float]:
+        """
+        Poids de [target - tolerance, target + tolerance] le moins coûteux à charger depuis from_total
+        (moins de manipulations, puis le plus proche de la cible). None si aucun poids dans la fenêtre.
+        """
+        candidates = self.weights.between(target - tolerance, target + tolerance)
+        if not candidates:
+            return None
+        if self.layout(from_total) is None:
+            return self.weights.nearest(target, target - tolerance, target + tolerance)
+        return min(
+            candidates,
+            key=lambda weight: (self.transition(from_total, weight)['changes'], abs(weight - target))
+        )
+
+
+@lru_cache(maxsize=LAYOUT_TABLE_CACHE_SIZE)
+def _build_layout_table(bar_weight: float, plates_items: Tuple[Tuple[str, int], ...],
+                        bars: int, group_size: int) -> PlateLayoutTable:
+    return PlateLayoutTable(bar_weight, dict(plates_items), bars=bars, group_size=group_size)
+
+
+def get_layout_table(bar_weight: float, plates: dict, bars: int = 1, group_size: int = 2) -> PlateLayoutTable:
+    """Table partagée pour un profil (barre, inventaire de disques), construite une seule fois"""
+    plates_items = tuple(sorted((str(weight), int(count or 0)) for weight, count in (plates or {}).items()))
+    return _build_layout_table(float(bar_weight), plates_items, bars, group_size)
+
+
+def layout_to_plates(layout: SlotLayout) -> List[Dict]:
+    """Format historique [{'weight', 'count'}] d'un côté, gros disques d'abord"""
+    return [{'weight': weight, 'count': count} for weight, count in layout]
+
+
+def minimize_plate_changes(steps: List[Dict], start_weights: Optional[Dict[str, float]] = None) -> List[Dict]:
+    """
+    Choisit un poids concret pour chaque série planifiée d'une séance en minimisant
+    le nombre total de disques manipulés (programmation dynamique sur le graphe des chargements).
+
+    steps : [{'chain': clé d'équipement, 'table': PlateLayoutTable ou None,
+              'target': poids visé, 'tolerance': écart accepté en kg}] dans l'ordre de la séance.
+    Les séries d'une même chaîne (même barre / même paire d'haltères) s'enchaînent ;
+    les chaînes sont indépendantes. start_weights donne le poids déjà chargé par chaîne
+    (barre vide par défaut).
+
+    Retourne pour chaque étape {'weight', 'changes', 'deviation'} ; 'weight' vaut la cible
+    si l'étape n'a pas de table. À coût égal, le poids le plus proche de la cible l'emporte.
+    """
+    start_weights = start_weights or {}
+    results: List[Dict] = [
+        {'weight': step['target'], 'changes': 0, 'deviation': 0.0} for step in steps
+    ]
+
+    chains: Dict[str, List[int]] = {}
+    for index, step in enumerate(steps):
+        if step.get('table') is not None and len(step['table']) > 0:
+            chains.setdefault(step['chain'], []).append(index)
+
+    for chain, indices in chains.items():
+        table = steps[indices[0]]['table']
+        start = start_weights.get(chain)
+        if start is None or table.layout(start) is None:
+            start = table.nearest(start) if start is not None else table.bar_weight * table.bars
+
+        # Couches de candidats : poids réalisables dans la fenêtre de tolérance de chaque série
+        layers = []
+        for index in indices:
+            target, tolerance = float(steps[index]['target']), float(steps[index].get('tolerance') or 0)
+            candidates = table.weights.between(target - tolerance, target + tolerance)
+            layers.append(candidates or [table.nearest(target)])
+
+        # costs[c] = (disques manipulés, écart cumulé), parents pour la reconstruction
+        previous = {start: (0, 0.0)}
+        parents: List[Dict[float, float]] = []
+        for index, candidates in zip(indices, layers):
+            target = float(steps[index]['target'])
+            current, back = {}, {}
+            for candidate in candidates:
+                deviation = abs(candidate - target)
+                best = None
+                for origin, (changes, deviations) in previous.items():
+                    cost = (changes + table.transition(origin, candidate)['changes'] * table.slots,
+                            deviations + deviation)
+                    if best is None or cost < best:
+                        best, back[candidate] = cost, origin
+                current[candidate] = best
+            parents.append(back)
+            previous = current
+
+        # Reconstruction du chemin optimal
+        weight = min(previous, key=lambda candidate: previous[candidate])
+        chosen = []
+        for back in reversed(parents):
+            chosen.append(weight)
+            weight = back[weight]
+        chosen.reverse()
+
+        origin = start
+        for index, weight in zip(indices, chosen):
+            results[index] = {
+                'weight': weight,
+                'changes': table.transition(origin, weight)['changes'] * table.slots,
+                'deviation': round(weight - float(steps[index]['target']), 3)
+            }
+            origin = weight
+
+    return results
@@ -0,0 +1,151 @@
+# backend/progression_state.py
+"""
+État de progression incrémental par (utilisateur, exercice).
+
+Remplace le parcours de 90 jours de SetHistory à chaque recommandation :
+chaque série enregistrée met à jour l'état en O(1) (poids courant, nombre de
+séries, histogramme des augmentations, écarts entre augmentations), et le
+résumé (incrément typique, séries avant progression, type de pattern) se lit
+directement. Une reconstruction n'est utile que pour un état absent (historique
+antérieur à l'état incrémental) : elle relit les PROGRESSION_WINDOW_DAYS derniers
+jours, en tâche différée (progression_backfill), jamais pendant une requête.
+
+L'état est stocké dans PerformanceStates.progression_pattern (JSON) :
+{typical_increment, sessions_before_progression, pattern_type, total_increases,
+ average_increase, 'state': {...}}
+"""
+
+from typing import Dict, Iterable, Optional
+
+# En dessous de ce nombre de séries, on garde le pattern par défaut
+MIN_RECORDS_FOR_PATTERN = 10
+# Historique relu par une reconstruction
+PROGRESSION_WINDOW_DAYS = 90
+
+DEFAULT_PATTERN = {
+    "typical_increment": 2.5,
+    "sessions_before_progression": 3,
+    "pattern_type": "default"
+}
+
+
+def new_state() -> Dict:
+    return {
+        "records": 0,                # séries vues
+        "current_weight": None,      # dernier poids de référence (après augmentation)
+        "last_increase_index": 0,    # index de la série de la dernière augmentation
+        "increases": {},             # histogramme {augmentation: nombre}
+        "increases_sum": 0.0,
+        "last_increase": None,
+        "non_decreasing": True,      # augmentations jamais décroissantes
+        "gaps_sum": 0,               # séries entre deux augmentations
+        "gaps_count": 0
+    }
+
+
+def update_state(state: Optional[Dict], weight: Optional[float]) -> Dict:
+    """Intègre une nouvelle série (dans l'ordre chronologique) et retourne le nouvel état"""
+    state = dict(state) if state else new_state()
+    state["increases"] = dict(state["increases"])
+    weight = float(weight or 0)
+    index = state["records"]
+
+    if state["current_weight"] is None:
+        state["current_weight"] = weight
+    elif weight > state["current_weight"]:
+        increase = round(weight - state["current_weight"], 3)
+        key = str(increase)
+        state["increases"][key] = state["increases"].get(key, 0) + 1
+        state["increases_sum"] += increase
+        if state["last_increase"] is not None and increase < state["last_increase"]:
+            state["non_decreasing"] = False
+        state["last_increase"] = increase
+
+        if state["last_increase_index"] > 0:
+            state["gaps_sum"] += index - state["last_increase_index"]
+            state["gaps_count"] += 1
+        state["last_increase_index"] = index
+        state["current_weight"] = weight
+
+    state["records"] = index + 1
+    return state
+
+
+def _median_increase(increases: Dict[str, int]) -> float:
+    """Médiane exacte depuis l'histogramme"""
+    values = sorted((float(value), count) for value, count in increases.items())
+    total = sum(count for _, count in values)
+
+    def value_at(position: int) -> float:
+        cumulative = 0
+        for value, count in values:
+            cumulative += count
+            if cumulative > position:
+                return value
+
+    if total % 2:
+        return value_at(total // 2)
+    return (value_at(total // 2 - 1) + value_at(total // 2)) / 2
+
+
+def summarize(state: Optional[Dict]) -> Dict:
+    """Pattern de progression lisible, avec l'état incrémental joint"""
+    state = state or new_state()
+    if state["records"] < MIN_RECORDS_FOR_PATTERN:
+        return {**DEFAULT_PATTERN, "state": state}
+
+    total_increases = sum(state["increases"].values())
+    if total_increases:
+        typical_increment = _median_increase(state["increases"])
+        # Arrondir aux incréments standards (2.5, 5, 10)
+        if typical_increment <= 3.75:
+            typical_increment = 2.5
+        elif typical_increment <= 7.5:
+            typical_increment = 5.0
+        else:
+            typical_increment = 10.0
+    else:
+        typical_increment = 2.5
+
+    if state["gaps_count"]:
+        sessions_before_progression = int(state["gaps_sum"] / state["gaps_count"])
+    else:
+        sessions_before_progression = 3
+
+    # Détecter le type de pattern
+    if len(state["increases"]) == 1:
+        pattern_type = "linear"
+    elif state["non_decreasing"]:
+        pattern_type = "accelerating"
+    else:
+        pattern_type = "variable"
+
+    return {
+        "typical_increment": typical_increment,
+        "sessions_before_progression": sessions_before_progression,
+        "pattern_type": pattern_type,
+        "total_increases": total_increases,
+        "average_increase": state["increases_sum"] / total_increases if total_increases else 0,
+        "state": state
+    }
+
+
+def record(pattern: Optional[Dict], weight: Optional[float]) -> Dict:
+    """Pattern stocké + une série -> nouveau pattern à stocker"""
+    state = (pattern or {}).get("state")
+    return summarize(update_state(state, weight))
+
+
+def rebuild(weights: Iterable[Optional[float]]) -> Dict:
+    """Reconstruction depuis l'historique chronologique de la fenêtre (backfill)"""
+    state = new_state()
+    for weight in weights:
+        state = update_state(state, weight)
+    return summarize(state)
+
+
+def public_pattern(pattern: Optional[Dict]) -> Dict:
+    """Pattern sans l'état interne (réponses API)"""
+    if not pattern or "state" not in pattern:
+        return dict(pattern or DEFAULT_PATTERN)
+    return {key: value for key, value in pattern.items() if key != "state"}
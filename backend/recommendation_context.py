@@ -0,0 +1,279 @@
+# backend/recommendation_context.py
+"""
+Contexte de recommandation par séance, gardé en mémoire (par worker).
+
+Pendant une séance, les données lues à chaque POST /recommendations (séries de la
+séance, données vocales de la série précédente, historique SetHistory, états de
+performance, coefficients, poids réalisables) ne changent presque pas d'une série à l'autre.
+Elles sont chargées une fois puis mises à jour incrémentalement par l'ajout d'une
+série et la saisie du repos réel. Le contexte est supprimé à la fin ou à l'abandon
+de la séance, ou quand l'équipement ou le poids de l'utilisateur change, et expire
+RECOMMENDATION_CONTEXT_TTL_SECONDS après son chargement, même s'il est utilisé
+(borne la péremption quand une écriture passe par un autre worker).
+
+Le contexte porte aussi les recommandations précalculées (spéculatives) des séries
+probables suivantes : calculées en tâche de fond après l'enregistrement d'une série
+ou la saisie du repos, servies telles quelles si la demande correspond exactement,
+et invalidées par toute mise à jour du contexte (numéro de version).
+"""
+
+import copy
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from .models import Workout, WorkoutSet, SetHistory
+
+logger = logging.getLogger(__name__)
+
+RECOMMENDATION_CONTEXT_TTL_SECONDS = 15 * 60
+RECOMMENDATION_CONTEXT_MAX_WORKOUTS = 1024
+# Profondeur de l'historique similaire (cf. FitnessRecommendationEngine._get_historical_context)
+HISTORICAL_CONTEXT_LIMIT = 30
+
+# Clé d'historique : (exercise_id, numéro de série dans l'exercice, ordre de l'exercice dans la séance)
+HistoryKey = Tuple[int, int, Optional[int]]
+
+# Paramètres d'une demande de recommandation dont dépend le calcul du moteur
+SPECULATION_PARAMS = (
+    'exercise_id', 'set_number', 'current_fatigue', 'current_effort',
+    'last_rest_duration', 'exercise_order', 'set_order_global'
+)
+
+
+def speculation_key(params: Dict) -> Tuple:
+    return tuple(params.get(name) for name in SPECULATION_PARAMS)
+
+
+def history_to_dict(record: SetHistory) -> Dict:
+    """Format utilisé par le moteur de recommandation pour une ligne SetHistory"""
+    return {
+        "weight": record.weight,
+        "reps": record.actual_reps,
+        "fatigue": record.fatigue_level,
+        "effort": record.effort_level,
+        "success": record.success,
+        "rest_before": record.rest_before_seconds,
+        "date": record.date_performed
+    }
+
+
+def history_matches(key: HistoryKey, record: SetHistory) -> bool:
+    """Même filtre que la requête d'historique similaire"""
+    exercise_id, set_number, exercise_order = key
+    if record.exercise_id != exercise_id or record.set_number_in_exercise != set_number:
+        return False
+    if exercise_order is None:
+        return True
+    return max(1, exercise_order - 1) <= (record.exercise_order_in_session or 0) <= exercise_order + 1
+
+
+class SetSnapshot:
+    """Copie en lecture seule d'une ligne WorkoutSet (mêmes attributs, sans session SQLAlchemy)"""
+
+    __slots__ = tuple(column.name for column in WorkoutSet.__table__.columns)
+
+    def __init__(self, workout_set: WorkoutSet):
+        for name in self.__slots__:
+            setattr(self, name, getattr(workout_set, name))
+
+
+class HistorySnapshot:
+    """Copie en lecture seule d'une ligne SetHistory (à prendre avant le commit, qui expire les attributs)"""
+
+    __slots__ = tuple(column.name for column in SetHistory.__table__.columns)
+
+    def __init__(self, record: SetHistory):
+        for name in self.__slots__:
+            setattr(self, name, getattr(record, name))
+
+
+class WorkoutRecommendationContext:
+    """Données de recommandation d'une séance en cours"""
+
+    def __init__(self, workout_id: Optional[int], user_id: int, sets: List[SetSnapshot]):
+        self.workout_id = workout_id
+        self.user_id = user_id
+        self.sets: List[SetSnapshot] = sorted(sets, key=lambda s: s.id)
+        self.available_weights: Dict[int, object] = {}
+        self.historical: Dict[HistoryKey, List[Dict]] = {}
+        # États de performance et coefficients en lecture seule, par exercice
+        # (ne changent qu'à l'enregistrement d'une série de l'exercice)
+        self.performance_states: Dict[int, object] = {}
+        self.coefficients: Dict[int, Dict[str, float]] = {}
+        # Recommandations spéculatives : demandes probables et résultats du moteur
+        self.version = 0
+        self.speculation_requests: List[Dict] = []
+        self.speculative: Dict[Tuple, Dict] = {}
+        self.lock = threading.RLock()
+
+    @classmethod
+    def load(cls, db: Session, workout: Workout) -> 'WorkoutRecommendationContext':
+        sets = db.query(WorkoutSet).filter(WorkoutSet.workout_id == workout.id).all()
+        return cls(workout.id, workout.user_id, [SetSnapshot(s) for s in sets])
+
+    # ===== LECTURES =====
+
+    def recent_sets(self, limit: Optional[int] = None) -> List[SetSnapshot]:
+        """Séries terminées, la plus récente d'abord"""
+        completed = [s for s in reversed(self.sets) if s.completed_at is not None]
+        return completed[:limit] if limit else completed
+
+    def find_set(self, exercise_id: int, set_number: int) -> Optional[SetSnapshot]:
+        for workout_set in self.sets:
+            if workout_set.exercise_id == exercise_id and workout_set.set_number == set_number:
+                return workout_set
+        return None
+
+    # ===== RECOMMANDATIONS SPÉCULATIVES =====
+
+    def get_speculative(self, params: Dict) -> Optional[Dict]:
+        """Résultat précalculé pour exactement ces paramètres (copie modifiable), sinon None"""
+        with self.lock:
+            result = self.speculative.get(speculation_key(params))
+        return copy.deepcopy(result) if result is not None else None
+
+    def store_speculative(self, params: Dict, result: Dict, version: int) -> bool:
+        """Stocke un résultat précalculé s'il a été calculé sur la version courante du contexte"""
+        with self.lock:
+            if version != self.version:
+                return False
+            self.speculative[speculation_key(params)] = copy.deepcopy(result)
+            return True
+
+    def set_speculation_requests(self, requests: List[Dict]) -> int:
+        """Remplace les demandes probables ; retourne la version à utiliser pour les précalculer"""
+        with self.lock:
+            self.speculation_requests = [dict(request) for request in requests]
+            return self.version
+
+    def _invalidate(self):
+        self.version += 1
+        self.speculative.clear()
+
+    # ===== MISES À JOUR INCRÉMENTALES =====
+
+    def add_set(self, workout_set: SetSnapshot, history_record: Optional[HistorySnapshot] = None):
+        """Nouvelle série enregistrée (et sa ligne SetHistory éventuelle)"""
+        with self.lock:
+            self._invalidate()
+            self.speculation_requests = []
+            self.sets.append(workout_set)
+            self.performance_states.pop(workout_set.exercise_id, None)
+            self.coefficients.pop(workout_set.exercise_id, None)
+            if history_record is None:
+                return
+            entry = history_to_dict(history_record)
+            for key, history in self.historical.items():
+                if history_matches(key, history_record):
+                    self.historical[key] = [entry] + history[:HISTORICAL_CONTEXT_LIMIT - 1]
+
+    def update_rest(self, set_id: int, actual_rest_duration_seconds: Optional[int]):
+        with self.lock:
+            self._invalidate()
+            for workout_set in self.sets:
+                if workout_set.id == set_id:
+                    workout_set.actual_rest_duration_seconds = actual_rest_duration_seconds
+                    return
+
+
+class RecommendationContextCache:
+    """Cache LRU + TTL des contextes de séance (un par worker), expiration fixe après chargement"""
+
+    _contexts: 'OrderedDict[int, Tuple[WorkoutRecommendationContext, float]]' = OrderedDict()
+    _lock = threading.Lock()
+    _stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'speculative_hits': 0, 'speculative_misses': 0}
+
+    @classmethod
+    def get(cls, workout_id: int) -> Optional[WorkoutRecommendationContext]:
+        """Contexte en cache s'il n'a pas expiré (sans accès base ; l'accès ne prolonge pas l'expiration)"""
+        now = time.monotonic()
+        with cls._lock:
+            entry = cls._contexts.get(workout_id)
+            if entry is None or entry[1] < now:
+                if entry is not None:
+                    del cls._contexts[workout_id]
+                    cls._stats['evictions'] += 1
+                cls._stats['misses'] += 1
+                return None
+            cls._contexts.move_to_end(workout_id)
+            cls._stats['hits'] += 1
+            return entry[0]
+
+    @classmethod
+    def load(cls, db: Session, workout: Workout) -> WorkoutRecommendationContext:
+        """Charge le contexte d'une séance et le met en cache"""
+        context = WorkoutRecommendationContext.load(db, workout)
+        with cls._lock:
+            cls._contexts[workout.id] = (context, time.monotonic() + RECOMMENDATION_CONTEXT_TTL_SECONDS)
+            cls._contexts.move_to_end(workout.id)
+            while len(cls._contexts) > RECOMMENDATION_CONTEXT_MAX_WORKOUTS:
+                cls._contexts.popitem(last=False)
+                cls._stats['evictions'] += 1
+        return context
+
+    @classmethod
+    def peek(cls, workout_id: int) -> Optional[WorkoutRecommendationContext]:
+        """Contexte en cache sans le rafraîchir ni compter d'accès"""
+        with cls._lock:
+            entry = cls._contexts.get(workout_id)
+        return entry[0] if entry else None
+
+    @classmethod
+    def count_speculative(cls, hit: bool):
+        with cls._lock:
+            cls._stats['speculative_hits' if hit else 'speculative_misses'] += 1
+
+    @classmethod
+    def record_set(cls, workout_id: int, workout_set: SetSnapshot, history_record: Optional[HistorySnapshot] = None):
+        """
+        Répercute une nouvelle série sur le contexte s'il est en cache.
+        Copies prises avant le commit : aucune relecture des attributs expirés.
+        """
+        context = cls.peek(workout_id)
+        if context is not None:
+            context.add_set(workout_set, history_record)
+
+    @classmethod
+    def update_rest(cls, workout_id: int, set_id: int, actual_rest_duration_seconds: Optional[int]):
+        context = cls.peek(workout_id)
+        if context is not None:
+            context.update_rest(set_id, actual_rest_duration_seconds)
+
+    @classmethod
+    def evict(cls, workout_id: int) -> bool:
+        """Supprime le contexte (séance terminée, abandonnée ou supprimée)"""
+        with cls._lock:
+            removed = cls._contexts.pop(workout_id, None) is not None
+            if removed:
+                cls._stats['evictions'] += 1
+        return removed
+
+    @classmethod
+    def evict_user(cls, user_id: int) -> int:
+        """Supprime les contextes des séances d'un utilisateur (poids réalisables périmés)"""
+        with cls._lock:
+            workout_ids = [workout_id for workout_id, (context, _) in cls._contexts.items()
+                           if context.user_id == user_id]
+            for workout_id in workout_ids:
+                del cls._contexts[workout_id]
+            cls._stats['evictions'] += len(workout_ids)
+        return len(workout_ids)
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, float]:
+        with cls._lock:
+            stats = dict(cls._stats)
+            stats['size'] = len(cls._contexts)
+            stats['max_size'] = RECOMMENDATION_CONTEXT_MAX_WORKOUTS
+            stats['ttl_seconds'] = RECOMMENDATION_CONTEXT_TTL_SECONDS
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        speculative = stats['speculative_hits'] + stats['speculative_misses']
+        stats['speculative_hit_rate'] = round(stats['speculative_hits'] / speculative, 3) if speculative else 0.0
+        return stats
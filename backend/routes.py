@@ -15,6 +15,8 @@ from backend.schemas import (
     AdaptiveTargetsResponse, TrajectoryAnalysis
 )
 from backend.equipment_service import EquipmentService
+from backend.job_queue import enqueue, notify as notify_jobs
+from backend import muscle_volume
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -229,16 +231,17 @@ async def complete_adaptive_workout(
     if not workout:
         raise HTTPException(status_code=404, detail="Workout not found")
     
-    # Marquer comme complété
+    # Marquer comme complété ; l'adaptation des targets passe par la file de tâches
+    if workout.status != "completed":
+        muscle_volume.apply_workout(db, workout)
     workout.status = "completed"
     workout.completed_at = datetime.now(timezone.utc)
+    enqueue(db, "targets_recalibration", {"workout_id": workout_id},
+            dedupe_key=f"targets_recalibration:{workout_id}")
     db.commit()
+    notify_jobs()
     
-    # Adapter en temps réel
-    adapter = RealTimeAdapter(db)
-    adapter.handle_session_completed(workout)
-    
-    return {"message": "Workout completed and targets adapted"}
+    return {"message": "Workout completed, targets adaptation scheduled"}
 
 @router.post("/api/users/{user_id}/skip-session")
 async def skip_session(
@@ -564,6 +567,7 @@ async def delete_workout(workout_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Workout not found")
     
     # Supprimer toutes les séries associées (cascade devrait le faire automatiquement)
+    muscle_volume.remove_workouts(db, [workout_id])
     db.query(WorkoutSet).filter(WorkoutSet.workout_id == workout_id).delete()
     
     # Supprimer la séance
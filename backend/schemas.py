@@ -291,6 +291,19 @@ class SetCreate(BaseModel):
     set_order_in_session: Optional[int] = None
     ml_adjustment_enabled: Optional[bool] = None
     voice_data: Optional[VoiceDataML] = None  # MODIFIER POUR UTILISER LE NOUVEAU SCHÉMA
+    next_exercise_id: Optional[int] = None  # Exercice prévu ensuite (précalcul de sa recommandation)
+    session_fatigue: Optional[int] = None  # Fatigue de séance envoyée avec la prochaine demande (current_fatigue)
+
+class SetBatchCreate(BaseModel):
+    """Séries saisies hors ligne, dans l'ordre de réalisation"""
+    sets: List[SetCreate]
+
+class SetLogAndRecommendRequest(BaseModel):
+    """Série + repos réel de la série précédente + demande de recommandation suivante"""
+    set_data: SetCreate
+    previous_set_id: Optional[int] = None
+    previous_rest_duration_seconds: Optional[int] = None
+    next_recommendation: Optional[Dict[str, Any]] = None  # même format que POST /recommendations
 
 
 
@@ -312,4 +325,25 @@ class GenerateExercisesResponse(BaseModel):
     ppl_used: str
     quality_score: float
     ppl_recommendation: Dict[str, Any]
-    generation_metadata: Dict[str, Any]
\ No newline at end of file
+    generation_metadata: Dict[str, Any]
+
+# ===== SCHEMAS PLANIFICATION DISQUES =====
+
+class PlannedSet(BaseModel):
+    exercise_id: int
+    target_weight: float
+    tolerance: Optional[float] = None  # kg, sinon tolérance de l'équipement × flexibilité
+
+class PlatePlanRequest(BaseModel):
+    sets: List[PlannedSet]
+
+# ===== SCHEMAS RECOMMANDATIONS DE SÉANCE =====
+
+class PlannedExercise(BaseModel):
+    exercise_id: int
+    sets: Optional[int] = None  # sinon default_sets de l'exercice
+
+class SessionRecommendationsRequest(BaseModel):
+    exercises: List[PlannedExercise]
+    workout_id: Optional[int] = None  # séance en cours : contexte partagé avec les recommandations par série
+    current_fatigue: int = 3
@@ -0,0 +1,667 @@
+# backend/stats_frame.py
+"""
+Fenêtre de séries d'un utilisateur en colonnes NumPy, et graphiques de statistiques
+calculés dessus.
+
+SetFrame.load() lit en deux requêtes les séances terminées de l'utilisateur et les
+séries utiles : celles terminées depuis `since`, plus toutes les séries des séances
+récentes (graphiques par séance). Chaque graphique (FRAME_CHARTS) filtre ensuite la
+fenêtre en mémoire : le tableau de bord complet coûte un chargement au lieu d'une
+requête par graphique. Les endpoints individuels passent par les mêmes fonctions.
+
+Les colonnes gardent les valeurs Python (tableaux object, None compris) pour être
+renvoyées telles quelles ; numeric() et epoch() en donnent des vues flottantes pour
+les filtres et agrégats.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import exists, or_
+from sqlalchemy.orm import Session
+
+from .exercise_catalog import get_catalog
+from .fitness_fatigue import to_epoch
+from .models import User, Workout, WorkoutSet
+from .volume import compute_volumes
+from . import timeseries
+
+SET_COLUMNS = (
+    'id', 'workout_id', 'exercise_id', 'weight', 'reps', 'target_reps',
+    'duration_seconds', 'base_rest_time_seconds', 'actual_rest_duration_seconds',
+    'fatigue_level', 'effort_level', 'completed_at',
+    'ml_weight_suggestion', 'ml_reps_suggestion', 'ml_confidence',
+    'user_followed_ml_weight', 'user_followed_ml_reps'
+)
+
+
+def _column(values: List) -> np.ndarray:
+    """Tableau object 1-D (sans conversion des valeurs)"""
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+class SetFrame:
+    """Séries d'un utilisateur (une colonne par champ) et ses séances terminées récentes"""
+
+    def __init__(self, user: Optional[User], columns: Dict[str, np.ndarray], workouts: List,
+                 catalog=None, estimate_weight: Optional[Callable] = None):
+        self.user = user
+        self.columns = columns
+        self.workouts = workouts  # séances terminées avec durée, plus récentes d'abord
+        self.catalog = catalog
+        self.estimate_weight = estimate_weight
+        self._views: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def load(cls, db: Session, user_id: int, since: Optional[datetime] = None, sessions: int = 0,
+             estimate_weight: Optional[Callable] = None) -> 'SetFrame':
+        """
+        Séries terminées depuis since, plus celles des `sessions` dernières séances terminées
+        (avec et sans séries, cf. recent_workouts).
+        """
+        user = db.query(User).filter(User.id == user_id).first()
+
+        workouts = []
+        if sessions > 0:
+            workouts = db.query(
+                Workout.id, Workout.started_at, Workout.completed_at,
+                Workout.total_duration_minutes, Workout.total_rest_time_seconds,
+                exists().where(WorkoutSet.workout_id == Workout.id).label('has_sets')
+            ).filter(
+                Workout.user_id == user_id,
+                Workout.status == "completed",
+                Workout.total_duration_minutes.isnot(None)
+            ).order_by(Workout.completed_at.desc()).all()
+
+        frame = cls(user, {}, workouts, get_catalog(db), estimate_weight)
+        workout_ids = {row.id for row in frame.recent_workouts(sessions)}
+        workout_ids.update(row.id for row in frame.recent_workouts(sessions, with_sets=True))
+
+        window = []
+        if since is not None:
+            window.append(WorkoutSet.completed_at >= since)
+        if workout_ids:
+            window.append(WorkoutSet.workout_id.in_(sorted(workout_ids)))
+
+        rows = []
+        if window:
+            rows = db.query(*[getattr(WorkoutSet, name) for name in SET_COLUMNS]).join(
+                Workout, WorkoutSet.workout_id == Workout.id
+            ).filter(
+                Workout.user_id == user_id,
+                or_(*window)
+            ).order_by(WorkoutSet.completed_at, WorkoutSet.id).all()
+
+        frame.columns = {name: _column([row[index] for row in rows]) for index, name in enumerate(SET_COLUMNS)}
+        return frame
+
+    def __len__(self) -> int:
+        return len(self.columns['id'])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def numeric(self, name: str) -> np.ndarray:
+        """Colonne en flottants (NaN pour None)"""
+        view = self._views.get(name)
+        if view is None:
+            view = self._views[name] = np.array(
+                [np.nan if value is None else float(value) for value in self.columns[name]], dtype=float
+            )
+        return view
+
+    def present(self, name: str) -> np.ndarray:
+        """Masque des valeurs renseignées"""
+        return ~np.isnan(self.numeric(name))
+
+    def epoch(self, name: str = 'completed_at') -> np.ndarray:
+        """Dates de la colonne en secondes epoch (0 si absente)"""
+        key = f"epoch:{name}"
+        view = self._views.get(key)
+        if view is None:
+            view = self._views[key] = np.array([to_epoch(value) for value in self.columns[name]], dtype=float)
+        return view
+
+    def select(self, mask: np.ndarray) -> 'SetFrame':
+        """Sous-ensemble des séries (même utilisateur et mêmes séances)"""
+        frame = SetFrame(self.user, {name: column[mask] for name, column in self.columns.items()},
+                         self.workouts, self.catalog, self.estimate_weight)
+        frame._views = {name: view[mask] for name, view in self._views.items()}
+        return frame
+
+    def since(self, cutoff: datetime) -> 'SetFrame':
+        """Séries terminées depuis cutoff"""
+        return self.select(self.epoch() >= to_epoch(cutoff))
+
+    def for_workouts(self, workout_ids: Iterable[int]) -> 'SetFrame':
+        return self.select(np.isin(self.numeric('workout_id'), list(workout_ids)))
+
+    def recent_workouts(self, sessions: int, with_sets: bool = False) -> List:
+        """Les `sessions` dernières séances terminées (avec durée), éventuellement avec séries"""
+        rows = [row for row in self.workouts if row.has_sets] if with_sets else self.workouts
+        return rows[:sessions]
+
+    def rows(self, *names: str):
+        """Itère sur les valeurs Python des colonnes demandées, série par série"""
+        return zip(*[self.columns[name].tolist() for name in names])
+
+
+def _days_ago(days: int) -> datetime:
+    return datetime.now(timezone.utc) - timedelta(days=days)
+
+
+def _success(reps, target_reps) -> bool:
+    return reps >= (target_reps or reps)
+
+
+# ===== GRAPHIQUES =====
+
+def ml_confidence(frame: SetFrame, days: int = 60) -> Dict:
+    """Evolution de la confiance ML"""
+    sets = frame.since(_days_ago(days))
+    sets = sets.select(sets.present('ml_confidence'))
+    if not len(sets):
+        return {"data": [], "averageConfidence": 0, "trend": "stable"}
+
+    confidence_data = [
+        {
+            "date": completed_at.isoformat(),
+            "confidence": confidence,
+            "followedWeight": followed_weight,
+            "followedReps": followed_reps,
+            "success": _success(reps, target_reps)
+        }
+        for completed_at, confidence, followed_weight, followed_reps, reps, target_reps in sets.rows(
+            'completed_at', 'ml_confidence', 'user_followed_ml_weight', 'user_followed_ml_reps',
+            'reps', 'target_reps'
+        )
+    ]
+
+    # Tendance : 10 dernières valeurs contre 10 premières
+    confidences = sets.numeric('ml_confidence')
+    recent_avg = sum(confidences[-10:].tolist()) / min(10, len(confidences))
+    older_avg = sum(confidences[:10].tolist()) / min(10, len(confidences))
+    if recent_avg > older_avg * 1.1:
+        trend = "improving"
+    elif recent_avg < older_avg * 0.9:
+        trend = "declining"
+    else:
+        trend = "stable"
+
+    return {
+        "data": confidence_data,
+        "averageConfidence": sum(confidences.tolist()) / len(confidence_data),
+        "followRate": sum(1 for d in confidence_data if d["followedWeight"] and d["followedReps"]) / len(confidence_data),
+        "trend": trend
+    }
+
+
+def ml_adjustments_flow(frame: SetFrame, days: int = 30) -> Dict:
+    """Sankey des ajustements ML"""
+    sets = frame.since(_days_ago(days))
+    sets = sets.select(sets.present('ml_weight_suggestion'))
+    if not len(sets):
+        return {"nodes": [], "links": []}
+
+    reps, target_reps = sets.numeric('reps'), sets.numeric('target_reps')
+    success = reps >= np.where(np.isnan(target_reps) | (target_reps == 0), reps, target_reps)
+    accepted = np.array([bool(value) for value in sets['user_followed_ml_weight']], dtype=bool)
+    raised = np.nan_to_num(sets.numeric('weight'), nan=-np.inf) > sets.numeric('ml_weight_suggestion')
+
+    flows = {
+        "suggested_accepted": int(accepted.sum()),
+        "suggested_modified_up": int((~accepted & raised).sum()),
+        "suggested_modified_down": int((~accepted & ~raised).sum()),
+        "accepted_success": int((accepted & success).sum()),
+        "accepted_failure": int((accepted & ~success).sum()),
+        "modified_success": int((~accepted & success).sum()),
+        "modified_failure": int((~accepted & ~success).sum())
+    }
+
+    nodes = [
+        {"name": "Suggestions ML"},
+        {"name": "Acceptées"},
+        {"name": "Modifiées +"},
+        {"name": "Modifiées -"},
+        {"name": "Succès"},
+        {"name": "Échec"}
+    ]
+
+    links = []
+    if flows["suggested_accepted"] > 0:
+        links.append({"source": 0, "target": 1, "value": flows["suggested_accepted"]})
+    if flows["suggested_modified_up"] > 0:
+        links.append({"source": 0, "target": 2, "value": flows["suggested_modified_up"]})
+    if flows["suggested_modified_down"] > 0:
+        links.append({"source": 0, "target": 3, "value": flows["suggested_modified_down"]})
+    if flows["accepted_success"] > 0:
+        links.append({"source": 1, "target": 4, "value": flows["accepted_success"]})
+    if flows["accepted_failure"] > 0:
+        links.append({"source": 1, "target": 5, "value": flows["accepted_failure"]})
+    if flows["modified_success"] > 0:
+        links.append({"source": 2, "target": 4, "value": flows["modified_success"] // 2})
+        links.append({"source": 3, "target": 4, "value": flows["modified_success"] // 2})
+    if flows["modified_failure"] > 0:
+        links.append({"source": 2, "target": 5, "value": flows["modified_failure"] // 2})
+        links.append({"source": 3, "target": 5, "value": flows["modified_failure"] // 2})
+
+    return {"nodes": nodes, "links": links}
+
+
+def ml_insights(frame: SetFrame, days: int = 90) -> Dict:
+    """Dashboard principal ML Analytics"""
+    sets = frame.since(_days_ago(days))
+    if not len(sets):
+        return {"error": "Aucune donnée disponible"}
+
+    has_ml = sets.present('ml_confidence')
+    has_fatigue = sets.present('fatigue_level')
+    has_effort = sets.present('effort_level')
+    has_suggestion = sets.present('ml_weight_suggestion') | sets.present('ml_reps_suggestion')
+
+    workout_ids = sets.numeric('workout_id')
+    total_sessions = len(np.unique(workout_ids))
+    ml_active_sessions = len(np.unique(workout_ids[has_ml]))
+
+    fatigue = sets.numeric('fatigue_level')[has_fatigue]
+    effort = sets.numeric('effort_level')[has_effort]
+    avg_fatigue = fatigue.sum() / len(fatigue) if len(fatigue) else 0
+    avg_effort = effort.sum() / len(effort) if len(effort) else 0
+
+    # Analyse du suivi des recommandations
+    follow_rate_weight = 0
+    follow_rate_reps = 0
+    suggested = int(has_suggestion.sum())
+    if suggested:
+        followed_weight = sum(1 for value in sets['user_followed_ml_weight'][has_suggestion] if value)
+        followed_reps = sum(1 for value in sets['user_followed_ml_reps'][has_suggestion] if value)
+        follow_rate_weight = followed_weight / suggested
+        follow_rate_reps = followed_reps / suggested
+
+    # Tendance de confiance
+    confidences = sets.numeric('ml_confidence')[has_ml].tolist()
+    confidence_trend = "stable"
+    if len(confidences) >= 10:
+        recent_confidence = sum(confidences[-5:]) / 5
+        older_confidence = sum(confidences[:5]) / 5
+        if recent_confidence > older_confidence * 1.1:
+            confidence_trend = "improving"
+        elif recent_confidence < older_confidence * 0.9:
+            confidence_trend = "declining"
+
+    last_7_days = sets.epoch() >= to_epoch(_days_ago(7))
+
+    return {
+        "overview": {
+            "total_sets": len(sets),
+            "total_sessions": total_sessions,
+            "ml_active_sessions": ml_active_sessions,
+            "ml_adoption_rate": ml_active_sessions / total_sessions if total_sessions > 0 else 0,
+            "data_quality_score": int(has_fatigue.sum()) / len(sets),
+            "avg_fatigue": round(float(avg_fatigue), 1),
+            "avg_effort": round(float(avg_effort), 1)
+        },
+        "ml_performance": {
+            "sets_with_recommendations": suggested,
+            "follow_rate_weight": round(follow_rate_weight, 2),
+            "follow_rate_reps": round(follow_rate_reps, 2),
+            "avg_confidence": round(sum(confidences) / len(confidences), 2) if confidences else 0,
+            "confidence_trend": confidence_trend
+        },
+        "recent_activity": {
+            "last_7_days": int(last_7_days.sum()),
+            "ml_active_last_7": int((last_7_days & has_ml).sum())
+        }
+    }
+
+
+def ml_progression(frame: SetFrame, days: int = 60) -> Dict:
+    """Analyse de progression avec/sans ML"""
+    sets = frame.since(_days_ago(days))
+    sets = sets.select(sets.present('weight') & sets.present('reps'))
+    if len(sets) < 10:
+        return {"error": "Données insuffisantes pour l'analyse"}
+
+    catalog = frame.catalog
+    sets = sets.select(np.array([catalog.get(exercise_id) is not None for exercise_id in sets['exercise_id']], dtype=bool))
+    volumes = compute_volumes(
+        sets.numeric('weight'), sets.numeric('reps'), None,
+        [catalog.get(exercise_id) for exercise_id in sets['exercise_id']], frame.user,
+        estimate_weight=frame.estimate_weight
+    )
+
+    # Grouper par exercice
+    exercises_data = {}
+    for (exercise_id, completed_at, weight, reps, confidence), volume in zip(
+        sets.rows('exercise_id', 'completed_at', 'weight', 'reps', 'ml_confidence'), volumes.tolist()
+    ):
+        data = exercises_data.setdefault(exercise_id, {"with_ml": [], "without_ml": []})
+        set_data = {
+            "date": completed_at,
+            "volume": round(volume, 1),
+            "weight": weight,
+            "reps": reps,
+            "confidence": confidence or 0
+        }
+        if confidence is not None and confidence > 0.3:
+            data["with_ml"].append(set_data)
+        else:
+            data["without_ml"].append(set_data)
+
+    # Analyser la progression pour chaque exercice
+    progression_analysis = []
+    for exercise_id, data in exercises_data.items():
+        if len(data["with_ml"]) >= 3 and len(data["without_ml"]) >= 3:
+            ml_volumes = [d["volume"] for d in data["with_ml"]]
+            no_ml_volumes = [d["volume"] for d in data["without_ml"]]
+            ml_avg = sum(ml_volumes) / len(ml_volumes)
+            no_ml_avg = sum(no_ml_volumes) / len(no_ml_volumes)
+
+            exercise = catalog.get(exercise_id)
+            progression_analysis.append({
+                "exercise_id": exercise_id,
+                "exercise_name": exercise.name if exercise else f"Exercice {exercise_id}",
+                "ml_sessions": len(data["with_ml"]),
+                "traditional_sessions": len(data["without_ml"]),
+                "ml_avg_volume": round(ml_avg, 1),
+                "traditional_avg_volume": round(no_ml_avg, 1),
+                "improvement_ratio": round(ml_avg / no_ml_avg, 2) if no_ml_avg > 0 else 1,
+                "confidence_evolution": data["with_ml"][-5:] if len(data["with_ml"]) >= 5 else data["with_ml"]
+            })
+
+    # Trier par amélioration
+    progression_analysis.sort(key=lambda x: x["improvement_ratio"], reverse=True)
+
+    return {
+        "exercises": progression_analysis[:10],  # Top 10
+        "summary": {
+            "total_analyzed": len(progression_analysis),
+            "avg_improvement": round(sum(e["improvement_ratio"] for e in progression_analysis) / len(progression_analysis), 2) if progression_analysis else 1,
+            "best_exercise": progression_analysis[0] if progression_analysis else None
+        }
+    }
+
+
+def ml_recommendations_accuracy(frame: SetFrame, days: int = 30) -> Dict:
+    """Analyse de précision des recommandations ML"""
+    sets = frame.since(_days_ago(days))
+    sets = sets.select(sets.present('ml_weight_suggestion') & sets.present('weight'))
+    if not len(sets):
+        return {"error": "Aucune recommandation ML trouvée"}
+
+    accuracy_data = []
+    weight_diffs = []
+    reps_diffs = []
+    for (completed_at, weight, reps, weight_suggested, reps_suggested, confidence,
+         followed_weight, followed_reps) in sets.rows(
+            'completed_at', 'weight', 'reps', 'ml_weight_suggestion', 'ml_reps_suggestion',
+            'ml_confidence', 'user_followed_ml_weight', 'user_followed_ml_reps'):
+        weight_diff = 0
+        reps_diff = 0
+        if weight_suggested and weight:
+            weight_diff = abs(weight - weight_suggested)
+            weight_diffs.append(weight_diff)
+        if reps_suggested and reps:
+            reps_diff = abs(reps - reps_suggested)
+            reps_diffs.append(reps_diff)
+
+        accuracy_data.append({
+            "date": completed_at.isoformat(),
+            "weight_suggested": weight_suggested,
+            "weight_actual": weight,
+            "weight_diff": round(weight_diff, 1),
+            "reps_suggested": reps_suggested,
+            "reps_actual": reps,
+            "reps_diff": reps_diff,
+            "confidence": confidence or 0,
+            "followed_weight": followed_weight,
+            "followed_reps": followed_reps
+        })
+
+    # Calculer les métriques de précision
+    avg_weight_diff = sum(weight_diffs) / len(weight_diffs) if weight_diffs else 0
+    avg_reps_diff = sum(reps_diffs) / len(reps_diffs) if reps_diffs else 0
+
+    # Précision (pourcentage de recommandations "proches")
+    weight_precision = len([d for d in weight_diffs if d <= 2.5]) / len(weight_diffs) if weight_diffs else 0
+    reps_precision = len([d for d in reps_diffs if d <= 1]) / len(reps_diffs) if reps_diffs else 0
+
+    return {
+        "accuracy_timeline": accuracy_data,
+        "metrics": {
+            "total_recommendations": len(accuracy_data),
+            "avg_weight_deviation": round(avg_weight_diff, 1),
+            "avg_reps_deviation": round(avg_reps_diff, 1),
+            "weight_precision_rate": round(weight_precision, 2),
+            "reps_precision_rate": round(reps_precision, 2),
+            "overall_follow_rate": round(len([d for d in accuracy_data if d["followed_weight"]]) / len(accuracy_data), 2)
+        }
+    }
+
+
+def ml_exercise_patterns(frame: SetFrame, days: int = 60) -> Dict:
+    """Patterns d'utilisation ML par exercice"""
+    catalog = frame.catalog
+    sets = frame.since(_days_ago(days))
+    sets = sets.select(np.array([catalog.get(exercise_id) is not None for exercise_id in sets['exercise_id']], dtype=bool))
+    if not len(sets):
+        return {"error": "Aucune donnée disponible"}
+
+    exercise_patterns = {}
+    for (exercise_id, completed_at, weight, reps, confidence,
+         followed_weight, followed_reps) in sets.rows(
+            'exercise_id', 'completed_at', 'weight', 'reps', 'ml_confidence',
+            'user_followed_ml_weight', 'user_followed_ml_reps'):
+        pattern = exercise_patterns.setdefault(catalog.get(exercise_id).name, {
+            "total_sets": 0,
+            "ml_sets": 0,
+            "avg_confidence": 0,
+            "confidence_values": [],
+            "follow_rate": 0,
+            "followed_count": 0,
+            "last_used": None,
+            "volume_progression": []
+        })
+        pattern["total_sets"] += 1
+        pattern["last_used"] = max(pattern["last_used"] or completed_at, completed_at)
+
+        if confidence is not None:
+            pattern["ml_sets"] += 1
+            pattern["confidence_values"].append(confidence)
+
+        if followed_weight or followed_reps:
+            pattern["followed_count"] += 1
+
+        # Volume pour la progression
+        if weight and reps:
+            pattern["volume_progression"].append({
+                "date": completed_at.isoformat(),
+                "volume": weight * reps,
+                "has_ml": confidence is not None
+            })
+
+    # Finaliser les calculs
+    for pattern in exercise_patterns.values():
+        if pattern["confidence_values"]:
+            pattern["avg_confidence"] = sum(pattern["confidence_values"]) / len(pattern["confidence_values"])
+        if pattern["ml_sets"] > 0:
+            pattern["follow_rate"] = pattern["followed_count"] / pattern["ml_sets"]
+        pattern["ml_adoption_rate"] = pattern["ml_sets"] / pattern["total_sets"]
+
+        # Nettoyer pour la sérialisation
+        del pattern["confidence_values"]
+        pattern["last_used"] = pattern["last_used"].isoformat() if pattern["last_used"] else None
+
+    # Trier par utilisation ML
+    sorted_patterns = sorted(exercise_patterns.items(), key=lambda x: x[1]["ml_adoption_rate"], reverse=True)
+
+    return {
+        "exercise_patterns": dict(sorted_patterns[:15]),  # Top 15
+        "summary": {
+            "total_exercises": len(exercise_patterns),
+            "avg_ml_adoption": round(sum(p["ml_adoption_rate"] for p in exercise_patterns.values()) / len(exercise_patterns), 2),
+            "most_ml_friendly": sorted_patterns[0][0] if sorted_patterns else None,
+            "total_ml_sets": sum(p["ml_sets"] for p in exercise_patterns.values())
+        }
+    }
+
+
+def time_distribution(frame: SetFrame, sessions: int = 10) -> Dict:
+    """Distribution du temps par séance"""
+    workouts = frame.recent_workouts(sessions)
+    if not workouts:
+        return {"sessions": []}
+
+    sets = frame.for_workouts(row.id for row in workouts)
+    workout_ids = sets.numeric('workout_id')
+    exercise_time = dict(zip(*[array.tolist() for array in timeseries.group_sum(
+        workout_ids, np.nan_to_num(sets.numeric('duration_seconds'))
+    )]))
+    # Repos réel, sinon repos prévu (une valeur nulle passe à la suivante)
+    rest = [actual or base or 0 for actual, base in sets.rows('actual_rest_duration_seconds', 'base_rest_time_seconds')]
+    rest_time = dict(zip(*[array.tolist() for array in timeseries.group_sum(workout_ids, rest)]))
+    set_counts = dict(zip(*[array.tolist() for array in timeseries.group_sum(workout_ids)]))
+
+    session_data = []
+    for workout in workouts:
+        total_exercise_time = exercise_time.get(workout.id, 0)
+        total_rest_time = rest_time.get(workout.id, 0)
+        transition_time = max(0, workout.total_duration_minutes * 60 - total_exercise_time - total_rest_time)
+        session_data.append({
+            "date": workout.started_at.isoformat(),
+            "totalMinutes": workout.total_duration_minutes,
+            "exerciseTime": round(total_exercise_time / 60, 1),
+            "restTime": round(total_rest_time / 60, 1),
+            "transitionTime": round(transition_time / 60, 1),
+            "setsCount": int(set_counts.get(workout.id, 0))
+        })
+
+    return {"sessions": session_data}
+
+
+def workout_intensity_recovery(frame: SetFrame, sessions: int = 50) -> Dict:
+    """Charge (points de volume par seconde) et repos par point des dernières séances"""
+    workouts = frame.recent_workouts(sessions, with_sets=True)
+    if not workouts:
+        return {"sessions": []}
+
+    catalog = frame.catalog
+    sets = frame.for_workouts(row.id for row in workouts)
+    workout_ids = sets.numeric('workout_id')
+    exercise_seconds = dict(zip(*[array.tolist() for array in timeseries.group_sum(
+        workout_ids, np.nan_to_num(sets.numeric('duration_seconds'))
+    )]))
+    # Repos réel, sinon repos prévu (COALESCE)
+    rest = [actual if actual is not None else base or 0
+            for actual, base in sets.rows('actual_rest_duration_seconds', 'base_rest_time_seconds')]
+    calculated_rest = dict(zip(*[array.tolist() for array in timeseries.group_sum(workout_ids, rest)]))
+
+    # Volume total par séance (définition commune, cf. backend.volume)
+    known = np.array([catalog.get(exercise_id) is not None for exercise_id in sets['exercise_id']], dtype=bool)
+    volume_sets = sets.select(known)
+    volumes = compute_volumes(
+        volume_sets.numeric('weight'), volume_sets.numeric('reps'), None,
+        [catalog.get(exercise_id) for exercise_id in volume_sets['exercise_id']], frame.user,
+        estimate_weight=frame.estimate_weight
+    )
+    volume_by_workout = dict(zip(*[array.tolist() for array in timeseries.group_sum(
+        volume_sets.numeric('workout_id'), volumes
+    )]))
+
+    now = datetime.now(timezone.utc)
+    sessions_data = []
+    charges = []
+    ratios = []
+    for workout in workouts:
+        volume = volume_by_workout.get(workout.id, 0.0)
+        if volume <= 0:
+            continue
+
+        total_duration_sec = (workout.total_duration_minutes or 0) * 60
+        stored_rest_sec = workout.total_rest_time_seconds or 0
+        exercise_sec = int(exercise_seconds.get(workout.id, 0))
+        rest_calculated_sec = int(calculated_rest.get(workout.id, 0))
+        # Durée et repos effectifs : valeurs enregistrées, sinon calculées depuis les séries
+        duration_sec = total_duration_sec if total_duration_sec > 0 else max(60, exercise_sec + rest_calculated_sec)
+        rest_sec = stored_rest_sec if stored_rest_sec > 0 else rest_calculated_sec
+
+        # Charge = points de volume par SECONDE, ratio = secondes de repos par point
+        charge = round(volume / max(1, duration_sec), 4)
+        ratio = round(rest_sec / max(1, volume), 6)
+        charges.append(charge)
+        ratios.append(ratio)
+
+        sessions_data.append({
+            "date": workout.completed_at.isoformat(),
+            "charge": charge,  # points/seconde
+            "ratio": ratio,    # secondes_repos/point
+            "total_volume": round(volume, 1),
+            "total_duration_minutes": round(duration_sec / 60, 1),  # Juste pour affichage
+            "total_rest_minutes": round(rest_sec / 60, 1),          # Juste pour affichage
+            "days_ago": int((now.timestamp() - to_epoch(workout.completed_at)) // 86400),
+            # Debug en secondes
+            "debug_seconds": {
+                "duration_sec": duration_sec,
+                "rest_sec": rest_sec,
+                "exercise_sec": exercise_sec,
+                "original_duration_sec": total_duration_sec
+            }
+        })
+
+    # Médianes
+    median_charge = sorted(charges)[len(charges) // 2] if charges else 0
+    median_ratio = sorted(ratios)[len(ratios) // 2] if ratios else 0
+
+    return {
+        "sessions": sessions_data,
+        "medians": {
+            "charge": round(median_charge, 4),
+            "ratio": round(median_ratio, 6)
+        }
+    }
+
+
+# Graphiques calculés sur la fenêtre : nom -> (fonction, paramètre de fenêtre, valeur par défaut)
+FRAME_CHARTS = {
+    "ml-confidence": (ml_confidence, "days", 60),
+    "ml-adjustments-flow": (ml_adjustments_flow, "days", 30),
+    "ml-insights": (ml_insights, "days", 90),
+    "ml-progression": (ml_progression, "days", 60),
+    "ml-recommendations-accuracy": (ml_recommendations_accuracy, "days", 30),
+    "ml-exercise-patterns": (ml_exercise_patterns, "days", 60),
+    "time-distribution": (time_distribution, "sessions", 10),
+    "workout-intensity-recovery": (workout_intensity_recovery, "sessions", 50),
+}
+
+
+def chart_windows(charts: Iterable[str], days: Optional[int] = None,
+                  sessions: Optional[int] = None) -> Dict[str, int]:
+    """Fenêtre de chaque graphique : days / sessions remplacent la valeur par défaut"""
+    overrides = {"days": days, "sessions": sessions}
+    windows = {}
+    for name in charts:
+        _, kind, default = FRAME_CHARTS[name]
+        windows[name] = overrides[kind] if overrides[kind] is not None else default
+    return windows
+
+
+def load_frame(db: Session, user_id: int, windows: Dict[str, int],
+               estimate_weight: Optional[Callable] = None) -> SetFrame:
+    """Charge une fenêtre couvrant tous les graphiques demandés"""
+    longest = max((window for name, window in windows.items() if FRAME_CHARTS[name][1] == "days"), default=None)
+    recent = max((window for name, window in windows.items() if FRAME_CHARTS[name][1] == "sessions"), default=0)
+    return SetFrame.load(
+        db, user_id, since=_days_ago(longest) if longest is not None else None,
+        sessions=recent, estimate_weight=estimate_weight
+    )
+
+
+def build_charts(db: Session, user_id: int, charts: Iterable[str], days: Optional[int] = None,
+                 sessions: Optional[int] = None, estimate_weight: Optional[Callable] = None) -> Dict[str, Dict]:
+    """Calcule les graphiques de FRAME_CHARTS demandés sur une seule fenêtre chargée"""
+    windows = chart_windows(charts, days, sessions)
+    frame = load_frame(db, user_id, windows, estimate_weight)
+    return {name: FRAME_CHARTS[name][0](frame, window) for name, window in windows.items()}
@@ -0,0 +1,121 @@
+# backend/timeseries.py
+"""
+Agrégations de séries temporelles quotidiennes (NumPy) pour les endpoints de statistiques.
+
+Les jours sont manipulés en datetime64[D] et les séries sont denses : une valeur par
+jour de la période, jours sans données compris. Chaque opération est linéaire dans le
+nombre de jours ou de points :
+- bucket_daily : somme des points par jour (et par clé) sur une grille dense
+- rolling_sum : sommes glissantes par différence de sommes préfixes
+- cumulative : série cumulée
+- week_starts / group_by_week : regroupement par semaine ISO (lundi)
+- group_sum : somme par clé quelconque
+"""
+
+from datetime import date, datetime
+from typing import Hashable, List, Sequence, Tuple
+
+import numpy as np
+
+DAY = np.timedelta64(1, 'D')
+# Le 1970-01-01 (jour 0 de datetime64[D]) est un jeudi
+_EPOCH_WEEKDAY = 3
+
+
+def to_days(values) -> np.ndarray:
+    """Convertit des date / datetime / chaînes ISO en datetime64[D]"""
+    if isinstance(values, np.ndarray):
+        return values.astype('datetime64[D]')
+    values = [value.date() if isinstance(value, datetime) else value for value in values]
+    return np.asarray(values, dtype='datetime64[D]')
+
+
+def day_range(start: date, end: date) -> np.ndarray:
+    """Jours de start à end inclus"""
+    return np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + DAY, DAY)
+
+
+def day_labels(days: np.ndarray) -> List[str]:
+    """Dates ISO (AAAA-MM-JJ) des jours"""
+    return np.datetime_as_string(days, unit='D').tolist()
+
+
+def _day_positions(days, start: date, end: date) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Indice de chaque jour dans la grille start..end, masque des jours inclus, longueur"""
+    length = max(int((np.datetime64(end, 'D') - np.datetime64(start, 'D')) // DAY) + 1, 0)
+    if length == 0 or len(days) == 0:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=bool), length
+    positions = ((to_days(days) - np.datetime64(start, 'D')) // DAY).astype(np.intp)
+    return positions, (positions >= 0) & (positions < length), length
+
+
+def bucket_daily(days, values, start: date, end: date) -> np.ndarray:
+    """
+    Série dense des sommes de values par jour de start à end inclus
+    (les points hors période sont ignorés).
+    """
+    positions, inside, length = _day_positions(days, start, end)
+    series = np.zeros(length)
+    if inside.any():
+        np.add.at(series, positions[inside], np.asarray(values, dtype=float)[inside])
+    return series
+
+
+def bucket_daily_by_key(keys: Sequence[Hashable], key_order: Sequence[Hashable],
+                        days, values, start: date, end: date) -> np.ndarray:
+    """
+    Matrice dense (len(key_order), jours) des sommes par clé et par jour ;
+    les points dont la clé n'est pas dans key_order sont ignorés.
+    """
+    positions, inside, length = _day_positions(days, start, end)
+    matrix = np.zeros((len(key_order), length))
+    if not inside.any():
+        return matrix
+    rows = {key: row for row, key in enumerate(key_order)}
+    row_index = np.fromiter((rows.get(key, -1) for key in keys), dtype=np.intp, count=len(keys))
+    inside &= row_index >= 0
+    np.add.at(matrix, (row_index[inside], positions[inside]), np.asarray(values, dtype=float)[inside])
+    return matrix
+
+
+def rolling_sum(series: np.ndarray, window: int) -> np.ndarray:
+    """
+    Somme des window derniers points (point courant inclus) le long du dernier axe ;
+    les premiers points somment ce qui est disponible.
+    """
+    series = np.asarray(series, dtype=float)
+    if window <= 0:
+        return np.zeros_like(series)
+    prefix = np.cumsum(series, axis=-1)
+    shifted = np.zeros_like(prefix)
+    shifted[..., window:] = prefix[..., :-window]
+    return prefix - shifted
+
+
+def cumulative(series: np.ndarray) -> np.ndarray:
+    """Série cumulée le long du dernier axe"""
+    return np.cumsum(np.asarray(series, dtype=float), axis=-1)
+
+
+def week_starts(days) -> np.ndarray:
+    """Lundi de la semaine ISO de chaque jour"""
+    days = to_days(days)
+    weekday = (days.astype(np.int64) + _EPOCH_WEEKDAY) % 7
+    return days - weekday.astype('timedelta64[D]')
+
+
+def group_sum(keys, values=None) -> Tuple[np.ndarray, np.ndarray]:
+    """Clés distinctes (triées) et somme des values par clé (nombre de points sans values)"""
+    if len(keys) == 0:
+        return np.asarray(keys), np.zeros(0)
+    unique, positions = np.unique(np.asarray(keys), return_inverse=True)
+    weights = None if values is None else np.asarray(values, dtype=float)
+    return unique, np.bincount(positions.reshape(-1), weights=weights, minlength=len(unique))
+
+
+def group_by_week(days, values=None) -> Tuple[np.ndarray, np.ndarray]:
+    """Lundis des semaines ISO présentes et somme des values par semaine"""
+    if len(days) == 0:
+        return np.zeros(0, dtype='datetime64[D]'), np.zeros(0)
+    return group_sum(week_starts(days), values)
+
@@ -0,0 +1,101 @@
+# backend/volume.py
+"""
+Définition unique du volume d'une série (points d'effort normalisés), vectorisée.
+
+compute_volumes() travaille sur des colonnes (poids, reps, effort, exercice de chaque
+série) : les paramètres propres à chaque exercice (type, poids équivalent au poids du
+corps, facteur d'intensité, poids estimé) sont résolus une fois par exercice distinct,
+puis le calcul est fait en une passe NumPy. Toutes les statistiques de volume
+(progression, intensité / récupération, analyse ML) passent par elle.
+
+Règles (par série) :
+- isométrique : secondes × 20
+- poids du corps : poids de l'utilisateur × % du poids du corps (selon le niveau) × reps
+- hybride : poids × reps si lesté, sinon comme poids du corps
+- externe : poids × reps (poids estimé si absent)
+puis × facteur d'intensité de l'exercice, × multiplicateur d'effort (1-5) si fourni.
+Les séries sans reps valent 0. Les volumes ne sont pas arrondis : les agrégats
+s'arrondissent une fois, à l'affichage.
+"""
+
+from typing import Callable, Dict, Optional, Sequence
+
+import numpy as np
+
+# Multiplicateurs d'effort indexés par niveau (0 = non renseigné)
+EFFORT_MULTIPLIERS = np.array([1.0, 0.7, 0.85, 1.0, 1.15, 1.3])
+
+ISOMETRIC_POINTS_PER_SECOND = 20
+DEFAULT_BODYWEIGHT_PERCENTAGE = 65
+FALLBACK_WEIGHT = 20.0
+
+
+def bodyweight_equivalent(exercise, user) -> float:
+    """Charge équivalente au poids du corps pour un exercice et un utilisateur"""
+    percentage_data = exercise.bodyweight_percentage or {"intermediate": DEFAULT_BODYWEIGHT_PERCENTAGE}
+    percentage = percentage_data.get(user.experience_level, DEFAULT_BODYWEIGHT_PERCENTAGE)
+    return (user.weight or 0) * (percentage / 100)
+
+
+def compute_volumes(
+    weights: Sequence[Optional[float]],
+    reps: Sequence[Optional[int]],
+    effort: Optional[Sequence[Optional[int]]],
+    exercise_meta: Sequence,
+    user,
+    estimate_weight: Optional[Callable] = None
+) -> np.ndarray:
+    """
+    Volume de chaque série. exercise_meta donne l'exercice (Exercise ou CatalogExercise)
+    de chaque série ; effort peut être None (pas de multiplicateur). estimate_weight(user,
+    exercise) fournit le poids d'un exercice externe enregistré sans poids.
+    """
+    count = len(exercise_meta)
+    if count == 0:
+        return np.zeros(0)
+
+    # Paramètres résolus une fois par exercice distinct
+    codes: Dict[int, int] = {}
+    intensity, bodyweight, estimated, kind = [], [], [], []
+    index = np.empty(count, dtype=np.intp)
+    for position, exercise in enumerate(exercise_meta):
+        code = codes.get(exercise.id)
+        if code is None:
+            code = codes[exercise.id] = len(kind)
+            if exercise.exercise_type == "isometric":
+                kind.append(0)
+            elif exercise.weight_type == "bodyweight":
+                kind.append(1)
+            elif exercise.weight_type == "hybrid":
+                kind.append(2)
+            else:
+                kind.append(3)
+            intensity.append(exercise.intensity_factor or 1.0)
+            bodyweight.append(bodyweight_equivalent(exercise, user) if kind[-1] in (1, 2) else 0.0)
+            fallback = estimate_weight(user, exercise) if estimate_weight and kind[-1] == 3 else None
+            estimated.append(fallback if fallback is not None else FALLBACK_WEIGHT)
+        index[position] = code
+
+    kind = np.asarray(kind)[index]
+    intensity = np.asarray(intensity, dtype=float)[index]
+    bodyweight = np.asarray(bodyweight, dtype=float)[index]
+    estimated = np.asarray(estimated, dtype=float)[index]
+
+    weights = np.nan_to_num(np.asarray(weights, dtype=float).reshape(count))
+    reps = np.nan_to_num(np.asarray(reps, dtype=float).reshape(count))
+    loaded = weights > 0
+
+    load = np.select(
+        [kind == 0, kind == 1, (kind == 2) & ~loaded, kind == 3],
+        [ISOMETRIC_POINTS_PER_SECOND, bodyweight, bodyweight, np.where(loaded, weights, estimated)],
+        default=weights
+    )
+    volumes = load * reps * intensity
+
+    if effort is not None:
+        levels = np.nan_to_num(np.asarray(effort, dtype=float).reshape(count)).astype(int)
+        levels[(levels < 0) | (levels >= len(EFFORT_MULTIPLIERS))] = 0
+        volumes *= EFFORT_MULTIPLIERS[levels]
+
+    volumes[(reps <= 0) | (volumes < 0)] = 0.0
+    return volumes
@@ -1,5 +1,7 @@
-from typing import List, Set
+from typing import List, Set, Optional
 import logging
+from .load_combinations import reachable_totals
+from .plate_layouts import PlateLayoutTable, get_layout_table
 
 logger = logging.getLogger(__name__)
 
@@ -47,73 +49,27 @@ class WeightCalculator:
                 # Poids total des 2 dumbbells
                 weights.add(weight * 2)
         
-        # Barres courtes + disques
-        barres_courtes = config.get('barbell_short_pair', {})
-        if (barres_courtes.get('available', False) and 
-            barres_courtes.get('count', 0) >= 2):
-            
-            bar_weight = barres_courtes.get('weight', 2.5)
-            plates = config.get('weight_plates', {}).get('weights', {})
-            
-            if plates:
-                # Pour les dumbbells, on doit pouvoir équiper 2 barres identiquement
-                # Donc on a besoin de 4 disques du même poids (2 par barre)
-                dumbbell_combinations = set([0])  # Barres seules
-                
-                for weight_str, total_count in plates.items():
-                    weight = float(weight_str)
-                    # Nombre de QUADRUPLETS disponibles (4 disques identiques)
-                    quads_available = total_count // 4
-                    
-                    if quads_available > 0:
-                        # Ajouter toutes les combinaisons possibles
-                        new_combinations = set()
-                        for existing in dumbbell_combinations:
-                            for quads in range(1, quads_available + 1):
-                                # Poids total : 2 barres + 4 disques par quad
-                                total_weight = (bar_weight * 2) + existing + (weight * 4 * quads)
-                                new_combinations.add(total_weight)
-                        
-                        dumbbell_combinations.update(new_combinations)
-                
-                # Cas spécial : on peut aussi utiliser des PAIRES différentes sur chaque barre
-                # si on a au moins 2 disques de chaque poids
-                for combo in WeightCalculator._calculate_mixed_dumbbell_combinations(plates):
-                    total_weight = (bar_weight * 2) + combo
-                    weights.add(total_weight)
-                
-                # Ajouter toutes les combinaisons valides
-                for combo_weight in dumbbell_combinations:
-                    total = (bar_weight * 2) + combo_weight
-                    weights.add(total)
+        # Barres courtes + disques (énumération exacte, précalculée par profil)
+        loadings = WeightCalculator.get_short_bar_pair_loadings(config)
+        if loadings:
+            weights.update(loadings.totals)
         
         return sorted(list(weights))
 
     @staticmethod
-    def _calculate_mixed_dumbbell_combinations(plates: dict) -> List[float]:
-        """Calcule les combinaisons mixtes pour dumbbells (paires différentes)"""
-        combinations = set()
-        
-        # Pour chaque poids où on a au moins 2 disques
-        valid_weights = [(float(w), count) for w, count in plates.items() if count >= 2]
-        
-        # Générer les combinaisons en utilisant des paires
-        for i, (weight1, count1) in enumerate(valid_weights):
-            # Utiliser une paire de ce poids (2 disques sur les 2 barres)
-            combinations.add(weight1 * 2)
-            
-            # Combiner avec d'autres poids
-            for j, (weight2, count2) in enumerate(valid_weights[i+1:], i+1):
-                # On peut utiliser 1 paire de chaque
-                combinations.add((weight1 + weight2) * 2)
-                
-                # Si on a 4+ disques d'un poids, on peut en mettre 2 par barre
-                if count1 >= 4:
-                    combinations.add((weight1 * 2 + weight2) * 2)
-                if count2 >= 4:
-                    combinations.add((weight1 + weight2 * 2) * 2)
+    def get_short_bar_pair_loadings(config: dict) -> Optional[PlateLayoutTable]:
+        """
+        Table des chargements de la paire de barres courtes, None si non équipé.
+        Chaque barre est chargée symétriquement et les deux barres à l'identique :
+        un disque par côté consomme donc 4 disques de l'inventaire.
+        """
+        barres_courtes = config.get('barbell_short_pair', {})
+        if not (barres_courtes.get('available', False) and barres_courtes.get('count', 0) >= 2):
+            return None
         
-        return list(combinations)
+        bar_weight = float(barres_courtes.get('weight', 2.5))
+        plates = config.get('weight_plates', {}).get('weights', {}) or {}
+        return get_layout_table(bar_weight, plates, bars=2, group_size=4)
         
     @staticmethod
     def get_kettlebell_weights(config: dict) -> List[float]:
@@ -156,14 +112,9 @@ class WeightCalculator:
                 if count > 0:
                     weights.add(float(tension_str))
             
-            # Combinaisons si autorisées
+            # Combinaisons si autorisées (2 élastiques, dans la limite des quantités)
             if config['resistance_bands'].get('combinable', False):
-                # Ajouter quelques combinaisons simples
-                tension_values = [float(t) for t, c in tensions.items() if c > 0]
-                for t1 in tension_values:
-                    for t2 in tension_values:
-                        if t1 <= t2:  # Éviter doublons
-                            weights.add(t1 + t2)
+                weights.update(reachable_totals(tensions, min_pieces=2, max_pieces=2))
         
         return sorted(list(weights))
 
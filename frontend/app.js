@@ -5547,6 +5547,9 @@ async function preloadNextSeriesRecommendations() {
             workout_id: workoutId,
             current_fatigue: window.currentWorkoutSession?.sessionFatigue || 3,
             previous_effort: window.currentWorkoutSession?.currentSetEffort || 3,
+            exercise_order: window.currentWorkoutSession?.exerciseOrder,
+            set_order_global: (window.currentWorkoutSession?.globalSetCount || 0) + 1,
+            last_rest_duration: window.currentWorkoutSession?.lastActualRestDuration,
             session_history: sessionHistory,
             completed_sets_this_exercise: sessionHistory.length
         };
@@ -5874,6 +5877,8 @@ async function fetchMLRecommendations() {
     /**
      * Récupère les recommandations ML pures avec gestion d'historique complète
      */
+    // Le repos réel doit être enregistré avant la demande (recommandation précalculée côté serveur)
+    await window.currentWorkoutSession.restDurationUpdate;
     const sessionSets = window.currentWorkoutSession.completedSets.filter(s => s.exercise_id === currentExercise.id);
     const sessionHistory = sessionSets.map(set => ({
         weight: set.weight,
@@ -7096,7 +7101,7 @@ function skipRest() {
         window.currentWorkoutSession.totalRestTime += actualRestTime;
         console.log(`Repos ignoré après ${actualRestTime}s. Total: ${window.currentWorkoutSession.totalRestTime}s`);
         
-        updateLastSetRestDuration(actualRestTime);
+        window.currentWorkoutSession.restDurationUpdate = updateLastSetRestDuration(actualRestTime);
         workoutState.restStartTime = null;
     }
     
@@ -7117,7 +7122,7 @@ function endRest() {
         console.log(`Repos terminé (endRest) après ${actualRestTime}s. Total: ${window.currentWorkoutSession.totalRestTime}s`);
         
         //  Sauvegarder la durée réelle en base
-        updateLastSetRestDuration(actualRestTime);
+        window.currentWorkoutSession.restDurationUpdate = updateLastSetRestDuration(actualRestTime);
         
         workoutState.restStartTime = null;
     }
@@ -11800,6 +11805,14 @@ function calculateRestDuration() {
     return restDuration;
 }
 
+function getNextPlannedExerciseId() {
+    // Exercice suivant de la séance planifiée (précalcul de sa recommandation côté serveur)
+    const exercises = window.currentWorkoutSession.exercises;
+    if (!Array.isArray(exercises) || !currentExercise) return null;
+    const index = exercises.findIndex(ex => ex.exercise_id === currentExercise.id);
+    return index !== -1 && index < exercises.length - 1 ? exercises[index + 1].exercise_id : null;
+}
+
 async function saveFeedbackAndRest() {
     if (!workoutState.pendingSetData) {
         console.error('Pas de données de série en attente');
@@ -11822,6 +11835,8 @@ async function saveFeedbackAndRest() {
         effort_level: window.currentWorkoutSession.currentSetEffort,
         exercise_order_in_session: window.currentWorkoutSession.exerciseOrder,
         set_order_in_session: window.currentWorkoutSession.globalSetCount + 1,
+        session_fatigue: window.currentWorkoutSession.sessionFatigue,
+        next_exercise_id: getNextPlannedExerciseId(),
         base_rest_time_seconds: currentExercise.base_rest_time_seconds || 90,
         ml_weight_suggestion: workoutState.currentRecommendation?.weight_recommendation,
         ml_reps_suggestion: workoutState.currentRecommendation?.reps_recommendation,
@@ -11928,6 +11943,8 @@ async function saveFeedbackAndRest() {
         // CRITIQUE : Nettoyer IMMÉDIATEMENT après succès
         workoutState.pendingSetData = null;
         clearPendingDataBackup();
+        // Repos de la nouvelle série pas encore connu
+        window.currentWorkoutSession.lastActualRestDuration = null;
 
         // Ajouter aux séries complétées
         const setWithId = { ...setData, id: savedSet.id };
@@ -12956,6 +12973,8 @@ async function calibrateMotion() {
 
 // ===== MISE À JOUR DURÉE DE REPOS =====
 async function updateLastSetRestDuration(actualRestTime) {
+    // Transmis avec la prochaine demande de recommandation (last_rest_duration)
+    window.currentWorkoutSession.lastActualRestDuration = actualRestTime;
     try {
         console.log(`Tentative mise à jour repos: ${actualRestTime}s`);
         console.log(`Sets complétés: ${window.currentWorkoutSession.completedSets.length}`);
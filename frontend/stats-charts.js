@@ -17,6 +17,17 @@ let charts = {
 // Période actuelle pour le burndown
 let currentBurndownPeriod = 'week';
 
+// Graphiques de chaque onglet, chargés en un appel par l'endpoint bundle
+const TAB_BUNDLES = {
+    performance: ['muscle-volume', 'workout-intensity-recovery'],
+    adherence: ['attendance-calendar', 'volume-burndown'],
+    muscles: ['muscle-sunburst', 'recovery-gantt', 'muscle-balance'],
+    analytics: ['ml-insights', 'ml-recommendations-accuracy', 'ml-progression', 'ml-exercise-patterns']
+};
+
+// Réponses préchargées, par URL de l'endpoint individuel (consommées une fois)
+let bundledCharts = {};
+
 // ===== INITIALISATION =====
 // Helper pour accès sécurisé aux couleurs musculaires
 function getSafeMuscleColor(muscle) {
@@ -104,6 +115,8 @@ function loadActiveTabCharts(userId) {
 }
 
 async function loadTabCharts(userId, tabName) {
+    await prefetchTabBundle(userId, tabName);
+    
     switch (tabName) {
         case 'performance':
             await Promise.all([
@@ -142,6 +155,41 @@ async function loadTabCharts(userId, tabName) {
 }
 
 // ===== HELPERS =====
+function bundleChartUrl(userId, chart) {
+    // URL équivalente de l'endpoint individuel (paramètres par défaut du bundle)
+    if (chart === 'muscle-volume') return `/api/users/${userId}/stats/muscle-volume?days=30`;
+    if (chart === 'volume-burndown') return `/api/users/${userId}/stats/volume-burndown/${currentBurndownPeriod}`;
+    return `/api/users/${userId}/stats/${chart}`;
+}
+
+async function prefetchTabBundle(userId, tabName) {
+    const chartNames = TAB_BUNDLES[tabName];
+    if (!chartNames) return;
+    
+    try {
+        const data = await window.apiGet(
+            `/api/users/${userId}/stats/bundle?charts=${chartNames.join(',')}&period=${currentBurndownPeriod}`
+        );
+        bundledCharts = {};
+        Object.entries(data.charts || {}).forEach(([chart, chartData]) => {
+            bundledCharts[bundleChartUrl(userId, chart)] = chartData;
+        });
+    } catch (error) {
+        // Les graphiques se chargeront individuellement
+        console.warn('Préchargement stats indisponible:', error);
+        bundledCharts = {};
+    }
+}
+
+async function fetchStatsChart(url) {
+    if (url in bundledCharts) {
+        const data = bundledCharts[url];
+        delete bundledCharts[url];
+        return data;
+    }
+    return window.apiGet(url);
+}
+
 async function checkUserHasData(userId) {
     try {
         const stats = await window.apiGet(`/api/users/${userId}/stats`);
@@ -421,7 +469,7 @@ async function loadMuscleVolumeChart(userId) {
         console.log('📊 Chargement chart volume musculaire - période:', period);
         
         // NOUVEL endpoint dédié
-        const data = await window.apiGet(`/api/users/${userId}/stats/muscle-volume?days=${period}`);
+        const data = await fetchStatsChart(`/api/users/${userId}/stats/muscle-volume?days=${period}`);
         
         if (!data || !data.datasets || data.datasets.length === 0) {
             document.getElementById('recordsWaterfall').innerHTML = 
@@ -645,7 +693,7 @@ window.M6 = M6;
 // ===== GRAPHIQUE 5: CALENDRIER D'ASSIDUITÉ =====
 async function loadAttendanceCalendar(userId) {
     try {
-        const data = await window.apiGet(`/api/users/${userId}/stats/attendance-calendar`);
+        const data = await fetchStatsChart(`/api/users/${userId}/stats/attendance-calendar`);
         
         const container = document.getElementById('attendanceCalendar');
         container.innerHTML = '';
@@ -746,7 +794,7 @@ async function loadAttendanceCalendar(userId) {
 // ===== GRAPHIQUE 7: PROGRESSION SÉANCE OPTIMISÉE =====
 async function loadVolumeBurndownChart(userId, period) {
     try {
-        const data = await window.apiGet(`/api/users/${userId}/stats/volume- /${period}`);
+        const data = await fetchStatsChart(`/api/users/${userId}/stats/volume-burndown/${period}`);
         
         if (!data.dailyVolumes || data.dailyVolumes.length === 0) {
             showVolumeEmptyState();
@@ -978,7 +1026,7 @@ function showVolumeErrorState() {
 // ===== GRAPHIQUE 9: SUNBURST VOLUME MUSCULAIRE =====
 async function loadMuscleSunburst(userId) {
     try {
-        const data = await window.apiGet(`/api/users/${userId}/stats/muscle-sunburst`);
+        const data = await fetchStatsChart(`/api/users/${userId}/stats/muscle-sunburst`);
         
         const container = document.getElementById('muscleSunburst');
         
@@ -1082,7 +1130,7 @@ async function loadMuscleSunburst(userId) {
 // ===== GRAPHIQUE 10: GANTT RÉCUPÉRATION =====
 async function loadRecoveryGantt(userId) {
     try {
-        const data = await window.apiGet(`/api/users/${userId}/stats/recovery-gantt`);
+        const data = await fetchStatsChart(`/api/users/${userId}/stats/recovery-gantt`);
         
         const container = document.getElementById('recoveryGantt');
         container.innerHTML = '';
@@ -1138,7 +1186,7 @@ async function loadRecoveryGantt(userId) {
 // ===== GRAPHIQUE 11: SPIDER ÉQUILIBRE MUSCULAIRE =====
 async function loadMuscleBalanceChart(userId) {
     try {
-        const data = await window.apiGet(`/api/users/${userId}/stats/muscle-balance`);
+        const data = await fetchStatsChart(`/api/users/${userId}/stats/muscle-balance`);
         
         const ctx = document.getElementById('muscleBalanceChart').getContext('2d');
         
@@ -1253,7 +1301,7 @@ let mlCharts = {};
 // ===== DASHBOARD PRINCIPAL ML =====
 async function loadMLDashboard(userId) {
     try {
-        const data = await window.apiGet(`/api/users/${userId}/stats/ml-insights`);
+        const data = await fetchStatsChart(`/api/users/${userId}/stats/ml-insights`);
         
         if (data.error) {
             document.getElementById('mlStats').innerHTML = `
@@ -1345,7 +1393,7 @@ async function loadMLDashboard(userId) {
 // ===== GRAPHIQUE DE PRÉCISION DES RECOMMANDATIONS =====
 async function loadMLAccuracyChart(userId) {
     try {
-        const data = await window.apiGet(`/api/users/${userId}/stats/ml-recommendations-accuracy`);
+        const data = await fetchStatsChart(`/api/users/${userId}/stats/ml-recommendations-accuracy`);
         
         if (data.error) {
             const chartElement = document.getElementById('mlConfidenceChart');
@@ -1510,7 +1558,7 @@ async function loadMLProgressionAnalysis(userId) {
     }
     
     try {
-        const data = await window.apiGet(`/api/users/${userId}/stats/ml-progression`);
+        const data = await fetchStatsChart(`/api/users/${userId}/stats/ml-progression`);
         
         if (data.error || !data.exercises || data.exercises.length === 0) {
             container.innerHTML = `
@@ -1609,7 +1657,7 @@ async function loadMLProgressionAnalysis(userId) {
 // ===== PATTERNS PAR EXERCICE =====
 async function loadMLExercisePatterns(userId) {
     try {
-        const data = await window.apiGet(`/api/users/${userId}/stats/ml-exercise-patterns`);
+        const data = await fetchStatsChart(`/api/users/${userId}/stats/ml-exercise-patterns`);
         
         if (data.error) {
             return; // Pas d'affichage si pas de données
@@ -1697,7 +1745,7 @@ async function loadMLSankeyDiagram(userId) {
 // ===== GRAPHIQUE PROFIL SÉANCES =====
 async function loadIntensityRecoveryChart(userId) {
     try {
-        const data = await window.apiGet(`/api/users/${userId}/stats/workout-intensity-recovery`);
+        const data = await fetchStatsChart(`/api/users/${userId}/stats/workout-intensity-recovery`);
         
         if (!data.sessions || data.sessions.length === 0) {
             return;
@@ -0,0 +1,35 @@
+"""
+Fixtures communes : application FastAPI sur une base SQLite temporaire.
+Usage (depuis la racine du dépôt, exercises.json y est lu au démarrage) : python -m pytest tests
+"""
+
+import os
+import tempfile
+
+import pytest
+
+_DB_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'tests.db')}"
+# Tâches différées exécutées par les tests (job_queue.drain), pas par un thread
+os.environ["JOB_WORKER_THREADS"] = "0"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from backend.main import app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def user_id(client):
+    response = client.post("/api/users", json={
+        "name": "test", "birth_date": "1990-01-01T00:00:00", "height": 180, "weight": 80,
+        "experience_level": "intermediate", "equipment_config": {}
+    })
+    response.raise_for_status()
+    yield response.json()["id"]
+    client.delete(f"/api/users/{response.json()['id']}")
@@ -0,0 +1,82 @@
+"""
+Cumul daily_muscle_volume : seules les séances terminées y figurent, et
+volume-burndown en lit le nombre de séries par jour de début de séance.
+"""
+
+from backend import muscle_volume
+from backend.database import SessionLocal
+from backend.models import DailyMuscleVolume
+
+EXERCISE_IDS = (11, 12, 13)
+
+
+def _start_workout(client, user_id):
+    response = client.post(f"/api/users/{user_id}/workouts", json={"type": "free"})
+    response.raise_for_status()
+    return response.json()["workout"]
+
+
+def _log_sets(client, workout_id, count):
+    for index in range(count):
+        client.post(f"/api/workouts/{workout_id}/sets", json={
+            "exercise_id": EXERCISE_IDS[index % len(EXERCISE_IDS)], "set_number": index + 1,
+            "reps": 10, "weight": 50, "fatigue_level": 3, "effort_level": 3,
+            "exercise_order_in_session": 1, "set_order_in_session": index + 1
+        }).raise_for_status()
+
+
+def _burndown(client, user_id):
+    response = client.get(f"/api/users/{user_id}/stats/volume-burndown/week")
+    response.raise_for_status()
+    return response.json()
+
+
+def _rollup(user_id):
+    db = SessionLocal()
+    try:
+        return sorted(
+            (str(row.day), row.muscle_group, row.muscle, round(row.sets, 6), round(row.volume, 4))
+            for row in db.query(DailyMuscleVolume).filter(DailyMuscleVolume.user_id == user_id)
+        )
+    finally:
+        db.close()
+
+
+def test_burndown_counts_sets_of_completed_workouts_by_start_day(client, user_id):
+    workout = _start_workout(client, user_id)
+    _log_sets(client, workout["id"], 3)
+    assert _burndown(client, user_id)["totalVolume"] == 0
+
+    client.put(f"/api/workouts/{workout['id']}/complete", json={"total_duration": 1800}).raise_for_status()
+    summary = _burndown(client, user_id)
+    assert summary["totalVolume"] == 3
+    assert summary["dailyVolumes"] == [
+        {"date": workout["started_at"][:10], "volume": 3, "cumulative": 3}
+    ]
+
+    abandoned = _start_workout(client, user_id)
+    _log_sets(client, abandoned["id"], 2)
+    client.delete(f"/api/workouts/{abandoned['id']}/abandon").raise_for_status()
+    assert _burndown(client, user_id)["totalVolume"] == 3
+
+    client.delete(f"/api/workouts/{workout['id']}").raise_for_status()
+    assert _burndown(client, user_id)["totalVolume"] == 0
+
+
+def test_incremental_rollup_matches_rebuild(client, user_id):
+    completed = _start_workout(client, user_id)
+    _log_sets(client, completed["id"], 4)
+    client.put(f"/api/workouts/{completed['id']}/complete", json={"total_duration": 1800}).raise_for_status()
+    # Série ajoutée après la fin de séance
+    _log_sets(client, completed["id"], 1)
+    _log_sets(client, _start_workout(client, user_id)["id"], 2)
+
+    incremental = _rollup(user_id)
+    assert incremental
+
+    db = SessionLocal()
+    try:
+        muscle_volume.rebuild(db, user_id)
+    finally:
+        db.close()
+    assert _rollup(user_id) == incremental
@@ -0,0 +1,85 @@
+"""
+Pattern de progression : état incrémental, et reconstruction différée (tâche
+progression_backfill) limitée à la fenêtre quand l'état est absent.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from backend import progression_state
+from backend.database import SessionLocal
+from backend.job_queue import drain
+from backend.ml_recommendations import FitnessRecommendationEngine
+from backend.models import BackgroundJob, PerformanceStates, SetHistory
+
+EXERCISE_ID = 11
+LEGACY_PATTERN = {"typical_increment": 5.0, "sessions_before_progression": 2, "pattern_type": "linear"}
+
+
+def _log_sets(client, user_id, weights):
+    workout_id = client.post(f"/api/users/{user_id}/workouts", json={"type": "free"}).json()["workout"]["id"]
+    for index, weight in enumerate(weights):
+        client.post(f"/api/workouts/{workout_id}/sets", json={
+            "exercise_id": EXERCISE_ID, "set_number": index + 1, "reps": 8, "weight": weight,
+            "fatigue_level": 3, "effort_level": 3,
+            "exercise_order_in_session": 1, "set_order_in_session": index + 1
+        }).raise_for_status()
+
+
+def _pattern(db, user_id):
+    perf_state = db.query(PerformanceStates).filter(
+        PerformanceStates.user_id == user_id, PerformanceStates.exercise_id == EXERCISE_ID
+    ).one()
+    db.refresh(perf_state)
+    return perf_state.progression_pattern
+
+
+def _pending_backfills(db, user_id):
+    return db.query(BackgroundJob).filter(
+        BackgroundJob.dedupe_key == f"progression_backfill:{user_id}:{EXERCISE_ID}",
+        BackgroundJob.status == "pending"
+    ).count()
+
+
+def test_first_sets_update_state_without_backfill(client, user_id):
+    _log_sets(client, user_id, [40, 40, 42.5])
+    db = SessionLocal()
+    try:
+        assert _pattern(db, user_id)["state"]["records"] == 3
+        assert _pending_backfills(db, user_id) == 0
+    finally:
+        db.close()
+
+
+def test_missing_state_is_rebuilt_by_job_over_window(client, user_id):
+    _log_sets(client, user_id, [40, 42.5])
+    db = SessionLocal()
+    try:
+        # État antérieur à l'état incrémental, et une série hors fenêtre
+        perf_state = db.query(PerformanceStates).filter(
+            PerformanceStates.user_id == user_id, PerformanceStates.exercise_id == EXERCISE_ID
+        ).one()
+        perf_state.progression_pattern = dict(LEGACY_PATTERN)
+        window_days = progression_state.PROGRESSION_WINDOW_DAYS
+        db.add(SetHistory(
+            user_id=user_id, exercise_id=EXERCISE_ID, weight=20, reps=8, actual_reps=8,
+            fatigue_level=3, effort_level=3, exercise_order_in_session=1, set_order_in_session=1,
+            set_number_in_exercise=1,
+            success=True, date_performed=datetime.now(timezone.utc) - timedelta(days=window_days + 10)
+        ))
+        db.commit()
+
+        # Lecture : pattern stocké, pas de reconstruction pendant la requête
+        assert FitnessRecommendationEngine(db)._detect_progression_patterns(user_id, EXERCISE_ID) == LEGACY_PATTERN
+        db.commit()
+        assert "state" not in _pattern(db, user_id)
+        assert _pending_backfills(db, user_id) == 1
+
+        # Série enregistrée avant la reconstruction : comptée par la tâche
+        _log_sets(client, user_id, [45])
+        assert _pending_backfills(db, user_id) == 1
+
+        drain()
+        assert _pattern(db, user_id)["state"]["records"] == 3
+        assert _pattern(db, user_id)["state"]["current_weight"] == 45
+    finally:
+        db.close()
@@ -0,0 +1,63 @@
+"""
+Mise à jour du contexte de recommandation en cache à l'enregistrement d'une série.
+"""
+
+import pytest
+from sqlalchemy import event
+
+from backend.database import engine
+from backend.recommendation_context import RecommendationContextCache
+
+EXERCISE_ID = 11
+
+
+@pytest.fixture
+def statements():
+    """Requêtes SQL et commits, dans l'ordre"""
+    log = []
+
+    def on_execute(conn, cursor, statement, *args):
+        log.append(statement)
+
+    def on_commit(conn):
+        log.append("COMMIT")
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    event.listen(engine, "commit", on_commit)
+    yield log
+    event.remove(engine, "before_cursor_execute", on_execute)
+    event.remove(engine, "commit", on_commit)
+
+
+def _reloads_after_commit(log):
+    """Relectures par clé primaire de la série ou de son historique après le commit de la série"""
+    first_commit = log.index("COMMIT")
+    return [
+        statement for statement in log[first_commit:]
+        if "WHERE workout_sets.id = " in statement or "WHERE set_history.id = " in statement
+    ]
+
+
+@pytest.mark.parametrize("path", ["sets", "sets/log-and-recommend"])
+def test_record_set_uses_values_captured_before_commit(client, user_id, statements, path):
+    workout_id = client.post(f"/api/users/{user_id}/workouts", json={"type": "free"}).json()["workout"]["id"]
+    # SQLite réattribue les identifiants des séances supprimées
+    RecommendationContextCache.evict(workout_id)
+    client.post(f"/api/workouts/{workout_id}/recommendations", json={
+        "exercise_id": EXERCISE_ID, "set_number": 1, "current_fatigue": 3, "current_effort": 3
+    }).raise_for_status()
+    context = RecommendationContextCache.peek(workout_id)
+    assert context is not None
+
+    set_data = {
+        "exercise_id": EXERCISE_ID, "set_number": 1, "reps": 10, "weight": 60,
+        "fatigue_level": 3, "effort_level": 3,
+        "exercise_order_in_session": 1, "set_order_in_session": 1
+    }
+    statements.clear()
+    response = client.post(f"/api/workouts/{workout_id}/{path}",
+                           json=set_data if path == "sets" else {"set_data": set_data})
+    response.raise_for_status()
+
+    assert _reloads_after_commit(statements) == []
+    assert [workout_set.weight for workout_set in context.sets] == [60]
@@ -0,0 +1,71 @@
+"""
+Les recommandations précalculées après une série sont servies aux demandes telles
+que le client (frontend/app.js) les envoie.
+"""
+
+import pytest
+
+SESSION_FATIGUE = 2
+EXERCISE_ID, NEXT_EXERCISE_ID = 11, 12
+
+
+def _speculative_hits(client) -> int:
+    return client.get("/api/recommendations/context-cache/stats").json()["speculative_hits"]
+
+
+def _log_set(client, workout_id, set_number, set_order):
+    """Série telle qu'envoyée par saveFeedbackAndRest()"""
+    response = client.post(f"/api/workouts/{workout_id}/sets", json={
+        "exercise_id": EXERCISE_ID, "set_number": set_number, "reps": 10, "weight": 60,
+        "fatigue_level": 4, "effort_level": 4,
+        "exercise_order_in_session": 1, "set_order_in_session": set_order,
+        "session_fatigue": SESSION_FATIGUE, "next_exercise_id": NEXT_EXERCISE_ID
+    })
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+def _recommendations(client, workout_id, request):
+    """Demande telle qu'envoyée par fetchMLRecommendations() / la prévisualisation"""
+    response = client.post(f"/api/workouts/{workout_id}/recommendations", json=dict(
+        request, workout_id=workout_id, current_fatigue=SESSION_FATIGUE,
+        session_history=[], completed_sets_this_exercise=0
+    ))
+    response.raise_for_status()
+
+
+@pytest.fixture
+def workout_id(client, user_id):
+    workout_id = client.post(f"/api/users/{user_id}/workouts", json={"type": "ai"}).json()["workout"]["id"]
+    # Première demande : charge le contexte de séance (le précalcul n'a lieu que s'il est en cache)
+    _recommendations(client, workout_id, {"exercise_id": EXERCISE_ID, "set_number": 1, "previous_effort": 3,
+                                          "exercise_order": 1, "set_order_global": 1})
+    return workout_id
+
+
+def _assert_speculative_hit(client, workout_id, request):
+    hits = _speculative_hits(client)
+    _recommendations(client, workout_id, request)
+    assert _speculative_hits(client) == hits + 1
+
+
+def test_next_set_during_rest_preview(client, workout_id):
+    _log_set(client, workout_id, set_number=1, set_order=1)
+    _assert_speculative_hit(client, workout_id, {"exercise_id": EXERCISE_ID, "set_number": 2, "previous_effort": 4,
+                                                 "exercise_order": 1, "set_order_global": 2})
+
+
+def test_next_set_after_rest(client, workout_id):
+    set_id = _log_set(client, workout_id, set_number=1, set_order=1)
+    client.put(f"/api/sets/{set_id}/rest-duration", json={"actual_rest_duration_seconds": 95}).raise_for_status()
+    _assert_speculative_hit(client, workout_id, {"exercise_id": EXERCISE_ID, "set_number": 2, "previous_effort": 4,
+                                                 "exercise_order": 1, "set_order_global": 2,
+                                                 "last_rest_duration": 95})
+
+
+def test_first_set_of_next_exercise(client, workout_id):
+    _log_set(client, workout_id, set_number=1, set_order=1)
+    _log_set(client, workout_id, set_number=2, set_order=2)
+    _assert_speculative_hit(client, workout_id, {"exercise_id": NEXT_EXERCISE_ID, "set_number": 1,
+                                                 "previous_effort": 3, "exercise_order": 2,
+                                                 "set_order_global": 3})